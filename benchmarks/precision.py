@@ -0,0 +1,86 @@
+"""Memory, speed and accuracy of the reduced-precision / workspace mode.
+
+For each universe size, runs the backtest in plain float64 and with
+float32 storage plus a reused Workspace, and reports peak traced memory,
+wall-clock time, weight-history bytes and the largest deviations from the
+float64 results:
+
+    python -m benchmarks.precision --assets 50 200 500 --out bench_precision.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Sequence
+
+import pandas as pd
+
+from benchmarks.scaling import synthetic_returns
+from src.strategies.backtest import run_backtest
+from src.strategies.workspace import Workspace, compare_precision, weights_nbytes
+
+DEFAULT_ASSETS = (50, 200, 500)
+
+
+def _measure(returns: pd.DataFrame, **kwargs) -> Dict[str, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run_backtest(returns, **kwargs)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "weights_bytes": weights_nbytes(result)}
+
+
+def run_suite(
+    assets: Sequence[int] = DEFAULT_ASSETS,
+    n_obs: int = 1260,
+    window: int = 252,
+    dtype: str = "float32",
+    strategies: Sequence[str] = ("min_variance", "mean_variance", "risk_parity"),
+) -> List[Dict[str, object]]:
+    rows = []
+    for n_assets in assets:
+        returns = synthetic_returns(n_assets, n_obs)
+        kwargs = dict(window=window, solver="active_set", strategies=list(strategies), frontier_gammas=[1.0, 10.0, 100.0])
+        base = _measure(returns, **kwargs)
+        reduced = _measure(returns, storage_dtype=dtype, workspace=Workspace(), **kwargs)
+        accuracy = compare_precision(returns, dtype=dtype, **kwargs)
+        rows.append(
+            {
+                "n_assets": n_assets,
+                "seconds_float64": base["seconds"],
+                "seconds_reduced": reduced["seconds"],
+                "peak_bytes_float64": base["peak_bytes"],
+                "peak_bytes_reduced": reduced["peak_bytes"],
+                "weights_bytes_float64": base["weights_bytes"],
+                "weights_bytes_reduced": reduced["weights_bytes"],
+                "max_weight_error": float(accuracy["max_weight_error"].max()),
+                "max_return_error": float(accuracy["max_return_error"].max()),
+                "max_sharpe_change": float(accuracy["sharpe_change"].abs().max()),
+            }
+        )
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reduced-precision and workspace mode against float64")
+    parser.add_argument("--assets", type=int, nargs="+", default=list(DEFAULT_ASSETS))
+    parser.add_argument("--n_obs", type=int, default=1260)
+    parser.add_argument("--window", type=int, default=252)
+    parser.add_argument("--out", type=str, default="bench_precision.json")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows = run_suite(args.assets, n_obs=args.n_obs, window=args.window)
+    with open(args.out, "w") as fh:
+        json.dump(rows, fh, indent=2)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print(f"Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
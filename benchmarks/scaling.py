@@ -0,0 +1,202 @@
+"""Scaling benchmarks for the estimators, optimizers, backtest loop and metrics.
+
+Times each stage on synthetic factor-model return panels over a grid of
+universe sizes and history lengths, writes the timings to JSON, and compares
+against a previous run to flag slowdowns:
+
+    python -m benchmarks.scaling --out bench.json
+    python -m benchmarks.scaling --out new.json --baseline bench.json --threshold 0.25
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.allocations import mean_variance_weights, min_variance_weights, risk_parity_weights
+from src.strategies.backtest import run_backtest
+from src.strategies.covariance import ensure_psd, ewma_covariance, shrinkage_covariance
+from src.utils.metrics import compute_metrics, compute_metrics_table
+
+DEFAULT_ASSETS = (7, 50, 200, 500, 2000)
+DEFAULT_LENGTHS = (252, 1260)
+
+# Largest universe each stage is run on; the cold SLSQP solves and the full
+# backtest loop are impractical beyond these sizes.
+STAGE_MAX_ASSETS = {
+    "ewma_covariance": None,
+    "shrinkage_covariance": None,
+    "ensure_psd": None,
+    "min_variance_slsqp": 200,
+    "min_variance_active_set": 500,
+    "mean_variance_slsqp": 200,
+    "mean_variance_active_set": 500,
+    "risk_parity": 2000,
+    "run_backtest": 50,
+    "compute_metrics": None,
+    "compute_metrics_table": None,
+}
+
+
+@dataclass
+class BenchRecord:
+    stage: str
+    n_assets: int
+    n_obs: int
+    seconds: float
+    repeat: int
+
+
+def synthetic_returns(n_assets: int, n_obs: int, n_factors: int = 3, seed: int = 0) -> pd.DataFrame:
+    """Daily returns from a factor model with heterogeneous idiosyncratic vol."""
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0.0002, 0.01, size=(n_obs, n_factors))
+    loadings = rng.normal(0.8, 0.4, size=(n_assets, n_factors)) / np.sqrt(n_factors)
+    idio = rng.normal(0.0, 1.0, size=(n_obs, n_assets)) * rng.uniform(0.005, 0.02, size=n_assets)
+    dates = pd.bdate_range("2000-01-03", periods=n_obs)
+    return pd.DataFrame(factors @ loadings.T + idio, index=dates, columns=[f"A{i}" for i in range(n_assets)])
+
+
+def time_call(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Best wall-clock time of repeat calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _stage_calls(returns: pd.DataFrame) -> Dict[str, Callable[[], object]]:
+    cov = shrinkage_covariance(returns)
+    mu = returns.mean().values
+    bt_window = max(len(returns) // 4, 21)
+    port = returns.mean(axis=1)
+    turnover = pd.Series(np.zeros(len(returns)), index=returns.index)
+    return {
+        "ewma_covariance": lambda: ewma_covariance(returns),
+        "shrinkage_covariance": lambda: shrinkage_covariance(returns),
+        "ensure_psd": lambda: ensure_psd(cov),
+        "min_variance_slsqp": lambda: min_variance_weights(cov),
+        "min_variance_active_set": lambda: min_variance_weights(cov, solver="active_set"),
+        "mean_variance_slsqp": lambda: mean_variance_weights(mu, cov),
+        "mean_variance_active_set": lambda: mean_variance_weights(mu, cov, solver="active_set"),
+        "risk_parity": lambda: risk_parity_weights(cov),
+        "run_backtest": lambda: run_backtest(returns, window=bt_window, rebalance="monthly"),
+        "compute_metrics": lambda: compute_metrics(port, turnover),
+        "compute_metrics_table": lambda: compute_metrics_table(returns, returns * 0.0),
+    }
+
+
+def run_suite(
+    assets: Sequence[int] = DEFAULT_ASSETS,
+    lengths: Sequence[int] = DEFAULT_LENGTHS,
+    stages: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    seed: int = 0,
+) -> List[BenchRecord]:
+    stages = list(stages or STAGE_MAX_ASSETS)
+    unknown = set(stages) - set(STAGE_MAX_ASSETS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {sorted(unknown)}")
+    records = []
+    for n_obs in lengths:
+        for n_assets in assets:
+            returns = synthetic_returns(n_assets, n_obs, seed=seed)
+            calls = _stage_calls(returns)
+            for stage in stages:
+                cap = STAGE_MAX_ASSETS[stage]
+                if cap is not None and n_assets > cap:
+                    continue
+                seconds = time_call(calls[stage], repeat=repeat)
+                records.append(BenchRecord(stage, n_assets, n_obs, seconds, repeat))
+    return records
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def write_results(records: Sequence[BenchRecord], path: str) -> None:
+    payload = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [asdict(r) for r in records],
+    }
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2)
+
+
+def load_results(path: str) -> List[BenchRecord]:
+    with open(path) as fh:
+        payload = json.load(fh)
+    return [BenchRecord(**row) for row in payload["results"]]
+
+
+def compare(
+    baseline: Sequence[BenchRecord],
+    current: Sequence[BenchRecord],
+    threshold: float = 0.25,
+    min_seconds: float = 1e-3,
+) -> pd.DataFrame:
+    """Join two runs on (stage, n_assets, n_obs) and flag ratios above 1 + threshold.
+
+    Timings under min_seconds in both runs are never flagged, since they are
+    dominated by timer noise.
+    """
+    key = ["stage", "n_assets", "n_obs"]
+    base = pd.DataFrame([asdict(r) for r in baseline]).set_index(key)["seconds"]
+    cur = pd.DataFrame([asdict(r) for r in current]).set_index(key)["seconds"]
+    table = pd.concat({"baseline": base, "current": cur}, axis=1, join="inner")
+    table["ratio"] = table["current"] / table["baseline"]
+    noisy = table[["baseline", "current"]].max(axis=1) < min_seconds
+    table["regression"] = (table["ratio"] > 1.0 + threshold) & ~noisy
+    return table.reset_index()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scaling benchmarks on synthetic universes")
+    parser.add_argument("--assets", type=int, nargs="+", default=list(DEFAULT_ASSETS))
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(DEFAULT_LENGTHS))
+    parser.add_argument("--stages", type=str, nargs="+", default=None, choices=list(STAGE_MAX_ASSETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=str, default="bench_scaling.json")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    records = run_suite(args.assets, args.lengths, stages=args.stages, repeat=args.repeat)
+    write_results(records, args.out)
+    print(pd.DataFrame([asdict(r) for r in records]).to_string(index=False))
+    print(f"Results saved to {args.out}")
+
+    if args.baseline:
+        table = compare(load_results(args.baseline), records, threshold=args.threshold)
+        print(table.to_string(index=False))
+        regressions = table[table["regression"]]
+        if len(regressions):
+            print(f"{len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""CLI startup benchmark.
+
+Times ``python -m src.cli <command> --help`` in fresh interpreters and checks
+that building the parser does not pull in the numeric stack:
+
+    python -m benchmarks.startup --out bench_startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+
+COMMANDS = ("fetch", "backtest", "report", "sweep")
+
+# modules whose import dominates interpreter startup
+HEAVY_MODULES = ("numpy", "pandas", "scipy", "matplotlib", "yfinance")
+
+_PROBE = (
+    "import json, sys\n"
+    "from src.cli.__main__ import build_parser\n"
+    "build_parser()\n"
+    "print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))\n"
+)
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_command(argv: Sequence[str], repeat: int = 5) -> float:
+    """Best wall-clock time of running argv in a fresh interpreter."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=ROOT, env=_env(), capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def heavy_imports() -> List[str]:
+    """Heavy modules imported while building the full CLI parser."""
+    probe = _PROBE.format(heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def run_suite(commands: Sequence[str] = COMMANDS, repeat: int = 5) -> Dict[str, object]:
+    timings = {"python": time_command(["-c", "pass"], repeat=repeat)}
+    for command in commands:
+        timings[command] = time_command(["-m", "src.cli", command, "--help"], repeat=repeat)
+    return {"seconds": timings, "heavy_imports": heavy_imports()}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Startup time of the CLI subcommands")
+    parser.add_argument("--commands", type=str, nargs="+", default=list(COMMANDS), choices=list(COMMANDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=str, default="bench_startup.json")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    results = run_suite(args.commands, repeat=args.repeat)
+    results["meta"] = {"python": platform.python_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(args.out, "w") as fh:
+        json.dump(results, fh, indent=2)
+    for name, seconds in results["seconds"].items():
+        print(f"{name:>10}: {seconds * 1e3:8.1f} ms")
+    print(f"Heavy modules imported by the parser: {results['heavy_imports'] or 'none'}")
+    print(f"Results saved to {args.out}")
+    if results["heavy_imports"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Entry point for ``python -m src.cli <command>``.
+
+Each command module only imports the standard library at module level, so
+building the parser is cheap; numpy, pandas, scipy and matplotlib are loaded
+by the selected command's run().
+"""
+
+import argparse
+import importlib
+from typing import List, Optional
+
+COMMANDS = {
+    "fetch": "src.cli.fetch",
+    "backtest": "src.cli.backtest",
+    "report": "src.cli.report",
+    "sweep": "src.cli.sweep",
+    "pipeline": "src.cli.pipeline",
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Portfolio backtester")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, module_name in COMMANDS.items():
+        module = importlib.import_module(module_name)
+        sub = subparsers.add_parser(name, help=module.HELP, description=module.HELP)
+        module.add_arguments(sub)
+        sub.set_defaults(_run=module.run)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args._run(args)
+
+
+if __name__ == "__main__":
+    main()
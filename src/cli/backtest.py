@@ -1,45 +1,33 @@
 import argparse
 from pathlib import Path
 
-import pandas as pd
+from src.cli.common import add_backtest_arguments, add_data_arguments, add_render_arguments, load_data
 
-from src.data.loader import DEFAULT_END, DEFAULT_START, DEFAULT_TICKERS, load_prices_and_returns
-from src.strategies.backtest import run_backtest
-from src.utils.plotting import (
-    plot_cumulative_returns,
-    plot_drawdowns,
-    plot_rolling_vol,
-    plot_turnover,
-    plot_vol_target_diagnostic,
-    plot_weights,
-)
+HELP = "Run the walk-forward backtest and write metrics and figures"
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Portfolio backtester")
-    parser.add_argument("--start", type=str, default=DEFAULT_START)
-    parser.add_argument("--end", type=str, default=DEFAULT_END)
-    parser.add_argument("--tickers", type=str, nargs="*", default=DEFAULT_TICKERS)
-    parser.add_argument("--rebalance", type=str, default="monthly", choices=["weekly", "monthly", "quarterly"])
-    parser.add_argument("--window", type=int, default=252)
-    parser.add_argument("--tc_bps", type=float, default=5.0)
-    parser.add_argument("--cov_method", type=str, default="shrinkage", choices=["sample", "ewma", "shrinkage"])
-    parser.add_argument("--gamma", type=float, default=10.0)
-    parser.add_argument("--target_vol", type=float, default=0.10)
-    parser.add_argument("--lmax", type=float, default=1.5)
-    parser.add_argument("--force_download", action="store_true")
-    return parser.parse_args()
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_data_arguments(parser)
+    add_backtest_arguments(parser)
+    parser.add_argument("--result_cache", type=str, default=None, help="Directory for reusing covariance and optimizer results across runs")
+    add_render_arguments(parser)
+    parser.add_argument("--no_report", action="store_true", help="Save the result without writing metrics and figures")
+    parser.add_argument("--profile", action="store_true", help="Write a per-stage timing summary and a Chrome trace under the reports dir")
 
 
-def main() -> None:
-    args = parse_args()
+def run(args: argparse.Namespace) -> None:
+    from src.cli.report import RESULT_FILENAME, save_result, write_report
+    from src.strategies.backtest import run_backtest
+    from src.strategies.cache import ResultCache
+    from src.strategies.workspace import Workspace
+    from src.utils.profiling import disable as disable_profiling
+    from src.utils.profiling import enable as enable_profiling
+    from src.utils.profiling import timed
 
-    prices, returns = load_prices_and_returns(
-        tickers=args.tickers,
-        start=args.start,
-        end=args.end,
-        force_download=args.force_download,
-    )
+    profiler = enable_profiling() if args.profile else None
+
+    with timed("load_data"):
+        prices, returns = load_data(args)
     result = run_backtest(
         returns=returns,
         window=args.window,
@@ -49,29 +37,45 @@ def main() -> None:
         cov_method=args.cov_method,
         target_vol=args.target_vol,
         lmax=args.lmax,
+        solver=args.solver,
+        accounting=args.accounting,
+        frontier_gammas=args.frontier_gammas,
+        strategies=args.strategies,
+        cache=ResultCache(disk_dir=args.result_cache) if args.result_cache else None,
+        storage_dtype=args.storage_dtype,
+        workspace=Workspace() if args.reuse_buffers else None,
     )
 
-    reports_dir = Path("reports")
-    figures_dir = reports_dir / "figures"
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    figures_dir.mkdir(parents=True, exist_ok=True)
-
-    metrics_path = reports_dir / "metrics.csv"
-    result.metrics.to_csv(metrics_path)
-
-    plot_cumulative_returns(result.returns, figures_dir / "cumulative_returns.png")
-    plot_drawdowns(result.returns, figures_dir / "drawdowns.png")
-    plot_rolling_vol(result.returns, window=63, out_path=figures_dir / "rolling_vol.png")
-    plot_weights(result.weights["risk_parity"], "Risk Parity Weights", figures_dir / "weights_risk_parity.png")
-    plot_weights(result.weights["min_variance"], "Minimum Variance Weights", figures_dir / "weights_min_var.png")
-    plot_turnover(result.turnover, figures_dir / "turnover.png")
-    plot_vol_target_diagnostic(result.returns, result.weights["vol_target"], args.target_vol, figures_dir / "vol_target_diagnostic.png")
+    reports_dir = Path(args.reports_dir)
+    result_path = reports_dir / RESULT_FILENAME
+    save_result(result, {"target_vol": args.target_vol}, str(result_path))
 
     print("Backtest complete.")
-    print(f"Metrics saved to {metrics_path}")
-    print(f"Figures saved under {figures_dir}")
+    print(f"Result saved to {result_path}")
+    if not args.no_report:
+        write_report(result, args.target_vol, str(reports_dir), args.render_jobs, args.force_render)
     print(result.metrics.round(4))
 
+    if profiler is not None:
+        disable_profiling()
+        summary_path = reports_dir / "profile_summary.csv"
+        trace_path = reports_dir / "profile_trace.json"
+        summary = profiler.summary()
+        summary.to_csv(summary_path, index=False)
+        profiler.write_trace(str(trace_path))
+        print(summary.round(6).to_string(index=False))
+        print(f"Profile saved to {summary_path} and {trace_path}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Portfolio backtester")
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    run(parse_args())
+
 
 if __name__ == "__main__":
     main()
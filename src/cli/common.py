@@ -0,0 +1,68 @@
+"""Argument groups shared by the CLI subcommands.
+
+Only the standard library and src.data.universe are imported here so that
+building the parser (and --help) stays fast; data and numeric modules are
+imported by each command's run().
+"""
+
+import argparse
+from typing import TYPE_CHECKING, Tuple
+
+from src.data.universe import DEFAULT_END, DEFAULT_START, DEFAULT_TICKERS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COV_METHODS = ["sample", "ewma", "shrinkage", "factor"]
+REBALANCE_FREQS = ["weekly", "monthly", "quarterly"]
+SOLVERS = ["slsqp", "active_set"]
+ACCOUNTING_MODES = ["drift", "fixed"]
+STORAGE_DTYPES = ["float64", "float32"]
+
+
+def add_data_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--start", type=str, default=DEFAULT_START)
+    parser.add_argument("--end", type=str, default=DEFAULT_END)
+    parser.add_argument("--tickers", type=str, nargs="*", default=DEFAULT_TICKERS)
+    parser.add_argument("--force_download", action="store_true")
+    parser.add_argument("--update", action="store_true", help="Extend the cached prices with dates after the last cached row")
+    parser.add_argument("--cache_format", type=str, default="csv", choices=["csv", "npy"])
+
+
+def load_data(args: argparse.Namespace) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    from src.data.loader import load_prices_and_returns
+
+    return load_prices_and_returns(
+        tickers=args.tickers,
+        start=args.start,
+        end=args.end,
+        force_download=args.force_download,
+        cache_format=args.cache_format,
+        update=args.update,
+    )
+
+
+def add_backtest_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rebalance", type=str, default="monthly", choices=REBALANCE_FREQS)
+    parser.add_argument("--window", type=int, default=252)
+    parser.add_argument("--tc_bps", type=float, default=5.0)
+    parser.add_argument("--cov_method", type=str, default="shrinkage", choices=COV_METHODS)
+    parser.add_argument("--gamma", type=float, default=10.0)
+    parser.add_argument("--target_vol", type=float, default=0.10)
+    parser.add_argument("--lmax", type=float, default=1.5)
+    parser.add_argument("--solver", type=str, default="slsqp", choices=SOLVERS)
+    parser.add_argument("--accounting", type=str, default="drift", choices=ACCOUNTING_MODES, help="Let weights drift between rebalances, or hold them fixed")
+    parser.add_argument("--frontier_gammas", type=float, nargs="+", default=None, help="Also store the efficient frontier on these gammas at every rebalance")
+    parser.add_argument("--strategies", type=str, nargs="+", default=None, help="Registered strategies to evaluate (default: all built-ins)")
+    add_numeric_arguments(parser)
+
+
+def add_numeric_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--storage_dtype", type=str, default="float64", choices=STORAGE_DTYPES, help="Precision of stored weight histories, and of covariances when a cache holds them (sweeps)")
+    parser.add_argument("--reuse_buffers", action="store_true", help="Reuse scratch buffers across rebalances instead of allocating temporaries")
+
+
+def add_render_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--reports_dir", type=str, default="reports")
+    parser.add_argument("--render_jobs", type=int, default=None, help="Processes for figure rendering (default: all cores)")
+    parser.add_argument("--force_render", action="store_true", help="Redraw figures even when their inputs are unchanged")
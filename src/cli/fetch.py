@@ -0,0 +1,29 @@
+import argparse
+
+from src.cli.common import add_data_arguments, load_data
+
+HELP = "Download or update the cached prices and returns"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_data_arguments(parser)
+
+
+def run(args: argparse.Namespace) -> None:
+    prices, returns = load_data(args)
+    print(f"Prices: {len(prices)} rows x {prices.shape[1]} tickers, {prices.index[0].date()} to {prices.index[-1].date()}")
+    print(f"Returns: {len(returns)} rows")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=HELP)
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    run(parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+
+from src.cli.common import add_backtest_arguments, add_data_arguments, add_render_arguments
+
+HELP = "Rebuild prices, returns, backtest, metrics, figures and the LaTeX table, rerunning only changed stages"
+
+STAGES = ["prices", "returns", "backtest", "metrics", "figures", "latex"]
+LATEX_COLUMNS = {
+    "CAGR": ("CAGR", "pct"),
+    "Vol": ("Vol", "pct"),
+    "Sharpe": ("Sharpe", "num"),
+    "MaxDrawdown": ("Max DD", "pct"),
+    "AvgTurnover": ("Turnover", "pct"),
+    "CVaR95": ("CVaR 95\\%", "pct"),
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_data_arguments(parser)
+    add_backtest_arguments(parser)
+    add_render_arguments(parser)
+    parser.add_argument("--artifacts_dir", type=str, default=None, help="Stage outputs and manifest (default: <reports_dir>/artifacts)")
+    parser.add_argument("--targets", type=str, nargs="+", default=None, choices=STAGES, help="Stages to bring up to date (default: all)")
+    parser.add_argument("--force", type=str, nargs="*", default=None, choices=STAGES, help="Rerun these stages (all when given without names)")
+
+
+def fetch_prices(tickers, start, end, cache_format, force_download=False, update=False):
+    from src.data.loader import download_prices
+
+    return download_prices(
+        tickers=tickers,
+        start=start,
+        end=end,
+        force_download=force_download,
+        cache_format=cache_format,
+        update=update,
+    )
+
+
+def log_returns(prices):
+    from src.data.loader import compute_log_returns
+
+    return compute_log_returns(prices, returns_path=None)
+
+
+def backtest(returns, reuse_buffers=False, **params):
+    from src.strategies.backtest import run_backtest
+    from src.strategies.workspace import Workspace
+
+    return run_backtest(returns=returns, workspace=Workspace() if reuse_buffers else None, **params)
+
+
+def export_metrics(backtest, reports_dir):
+    from src.cli.report import write_metrics
+
+    return write_metrics(backtest, reports_dir)
+
+
+def render(backtest, target_vol, reports_dir, render_jobs=None, force_render=False):
+    from pathlib import Path
+
+    from src.cli.report import figure_specs
+    from src.utils.rendering import render_figures
+
+    figures_dir = Path(reports_dir) / "figures"
+    status = render_figures(figure_specs(backtest, target_vol), str(figures_dir), n_jobs=render_jobs, force=force_render)
+    return [str(figures_dir / name) for name in status]
+
+
+def metrics_table_tex(metrics) -> str:
+    """booktabs table of the headline metrics, one row per strategy."""
+    columns = [c for c in LATEX_COLUMNS if c in metrics.columns]
+    lines = [
+        "\\begin{table}[H]",
+        "\\centering",
+        "\\begin{tabular}{l" + "r" * len(columns) + "}",
+        "\\toprule",
+        "Strategy & " + " & ".join(LATEX_COLUMNS[c][0] for c in columns) + " \\\\",
+        "\\midrule",
+    ]
+    for name, row in metrics.iterrows():
+        cells = [f"{100 * row[c]:.2f}\\%" if LATEX_COLUMNS[c][1] == "pct" else f"{row[c]:.2f}" for c in columns]
+        lines.append(str(name).replace("_", "\\_") + " & " + " & ".join(cells) + " \\\\")
+    lines += ["\\bottomrule", "\\end{tabular}", "\\caption{Backtest metrics (generated by the pipeline).}", "\\end{table}", ""]
+    return "\n".join(lines)
+
+
+def write_latex(backtest, reports_dir):
+    from pathlib import Path
+
+    path = Path(reports_dir) / "metrics_table.tex"
+    path.write_text(metrics_table_tex(backtest.metrics))
+    return [str(path)]
+
+
+def build_pipeline(args: argparse.Namespace):
+    from pathlib import Path
+
+    from src.utils.pipeline import Pipeline, Stage
+
+    params = {
+        "window": args.window,
+        "rebalance": args.rebalance,
+        "tc_bps": args.tc_bps,
+        "gamma": args.gamma,
+        "cov_method": args.cov_method,
+        "target_vol": args.target_vol,
+        "lmax": args.lmax,
+        "solver": args.solver,
+        "accounting": args.accounting,
+        "frontier_gammas": args.frontier_gammas,
+        "strategies": args.strategies,
+        "storage_dtype": args.storage_dtype,
+    }
+    reports = args.reports_dir
+    stages = [
+        Stage(
+            "prices",
+            fetch_prices,
+            "frame",
+            params={"tickers": list(args.tickers), "start": args.start, "end": args.end, "cache_format": args.cache_format},
+            options={"force_download": args.force_download, "update": args.update},
+            code=("src.data",),
+        ),
+        Stage("returns", log_returns, "frame", deps=("prices",), code=("src.data",)),
+        Stage(
+            "backtest",
+            backtest,
+            "backtest",
+            deps=("returns",),
+            params=params,
+            options={"reuse_buffers": args.reuse_buffers},
+            code=("src.strategies", "src.utils.metrics"),
+        ),
+        Stage("metrics", export_metrics, "files", deps=("backtest",), params={"reports_dir": reports}, code=("src.cli.report",)),
+        Stage(
+            "figures",
+            render,
+            "files",
+            deps=("backtest",),
+            params={"target_vol": args.target_vol, "reports_dir": reports},
+            options={"render_jobs": args.render_jobs, "force_render": args.force_render},
+            code=("src.cli.report", "src.utils.plotting"),
+        ),
+        Stage("latex", write_latex, "files", deps=("backtest",), params={"reports_dir": reports}, code=("src.cli.pipeline",)),
+    ]
+    return Pipeline(stages, args.artifacts_dir or str(Path(reports) / "artifacts"))
+
+
+def run(args: argparse.Namespace) -> None:
+    pipeline = build_pipeline(args)
+    force = True if args.force == [] else set(args.force or ())
+    if args.force_download or args.update:
+        force = force if force is True else force | {"prices"}
+    if args.force_render:
+        force = force if force is True else force | {"figures"}
+    status = pipeline.run(targets=args.targets, force=force)
+    for name, state in status.items():
+        print(f"{name:10s} {state}")
+    print(f"Artifacts under {pipeline.artifacts_dir}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=HELP)
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    run(parse_args())
+
+
+if __name__ == "__main__":
+    main()
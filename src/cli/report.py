@@ -0,0 +1,102 @@
+import argparse
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.cli.common import add_render_arguments
+
+HELP = "Write metrics and figures from a saved backtest result"
+
+RESULT_FILENAME = "backtest_result.pkl"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_render_arguments(parser)
+    parser.add_argument("--result_path", type=str, default=None, help=f"Saved result (default: <reports_dir>/{RESULT_FILENAME})")
+
+
+def save_result(result, params: Dict[str, object], path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        pickle.dump({"result": result, "params": params}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_result(path: str):
+    with open(path, "rb") as fh:
+        payload = pickle.load(fh)
+    return payload["result"], payload["params"]
+
+
+def figure_specs(result, target_vol: float) -> list:
+    from src.utils.rendering import FigureSpec
+
+    specs = [
+        FigureSpec("cumulative_returns.png", "plot_cumulative_returns", (result.returns,)),
+        FigureSpec("drawdowns.png", "plot_drawdowns", (result.returns,)),
+        FigureSpec("rolling_vol.png", "plot_rolling_vol", (result.returns,), {"window": 63}),
+        FigureSpec("turnover.png", "plot_turnover", (result.turnover,)),
+    ]
+    if "risk_parity" in result.events:
+        specs.append(FigureSpec("weights_risk_parity.png", "plot_weights", (result.events["risk_parity"], "Risk Parity Weights")))
+    if "min_variance" in result.events:
+        specs.append(FigureSpec("weights_min_var.png", "plot_weights", (result.events["min_variance"], "Minimum Variance Weights")))
+    if "vol_target" in result.events:
+        specs.append(
+            FigureSpec(
+                "vol_target_diagnostic.png",
+                "plot_vol_target_diagnostic",
+                (result.returns, result.events["vol_target"], target_vol),
+            )
+        )
+    return specs
+
+
+def write_metrics(result, reports_dir: str = "reports") -> List[str]:
+    """metrics.csv (and frontier.csv when the result has frontiers); returns the paths written."""
+    reports = Path(reports_dir)
+    reports.mkdir(parents=True, exist_ok=True)
+    paths = [reports / "metrics.csv"]
+    result.metrics.to_csv(paths[0])
+    if result.frontiers is not None:
+        paths.append(reports / "frontier.csv")
+        result.frontiers.summary().to_csv(paths[1])
+    return [str(p) for p in paths]
+
+
+def write_report(
+    result,
+    target_vol: float,
+    reports_dir: str = "reports",
+    render_jobs: Optional[int] = None,
+    force_render: bool = False,
+) -> Dict[str, str]:
+    from src.utils.rendering import render_figures
+
+    figures_dir = Path(reports_dir) / "figures"
+    metrics_path = write_metrics(result, reports_dir)[0]
+    status = render_figures(figure_specs(result, target_vol), str(figures_dir), n_jobs=render_jobs, force=force_render)
+    n_cached = sum(1 for v in status.values() if v == "cached")
+
+    print(f"Metrics saved to {metrics_path}")
+    print(f"Figures saved under {figures_dir} ({len(status) - n_cached} rendered, {n_cached} unchanged)")
+    return status
+
+
+def run(args: argparse.Namespace) -> None:
+    path = args.result_path or str(Path(args.reports_dir) / RESULT_FILENAME)
+    result, params = load_result(path)
+    write_report(result, params["target_vol"], args.reports_dir, args.render_jobs, args.force_render)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=HELP)
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    run(parse_args())
+
+
+if __name__ == "__main__":
+    main()
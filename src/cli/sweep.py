@@ -0,0 +1,71 @@
+import argparse
+from pathlib import Path
+
+from src.cli.common import ACCOUNTING_MODES, COV_METHODS, REBALANCE_FREQS, SOLVERS, add_data_arguments, add_numeric_arguments, load_data
+
+HELP = "Parallel parameter sweep over the portfolio backtester"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_data_arguments(parser)
+    parser.add_argument("--rebalance", type=str, nargs="+", default=["monthly"], choices=REBALANCE_FREQS)
+    parser.add_argument("--window", type=int, nargs="+", default=[252])
+    parser.add_argument("--tc_bps", type=float, default=5.0)
+    parser.add_argument("--cov_method", type=str, nargs="+", default=["shrinkage"], choices=COV_METHODS)
+    parser.add_argument("--gamma", type=float, nargs="+", default=[10.0])
+    parser.add_argument("--target_vol", type=float, nargs="+", default=[0.10])
+    parser.add_argument("--lmax", type=float, nargs="+", default=[1.5])
+    parser.add_argument("--solver", type=str, nargs="+", default=["slsqp"], choices=SOLVERS)
+    parser.add_argument("--accounting", type=str, nargs="+", default=["drift"], choices=ACCOUNTING_MODES)
+    parser.add_argument("--strategies", type=str, nargs="+", default=None)
+    add_numeric_arguments(parser)
+    parser.add_argument("--n_jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--out", type=str, default="reports/sweep_metrics.csv")
+    parser.add_argument("--result_cache", type=str, default=None, help="Directory for reusing covariance and optimizer results across runs")
+
+
+def run(args: argparse.Namespace) -> None:
+    from src.strategies.sweep import run_sweep
+
+    _, returns = load_data(args)
+    grid = {
+        "window": args.window,
+        "rebalance": args.rebalance,
+        "cov_method": args.cov_method,
+        "gamma": args.gamma,
+        "target_vol": args.target_vol,
+        "lmax": args.lmax,
+        "solver": args.solver,
+        "accounting": args.accounting,
+    }
+    table = run_sweep(
+        returns,
+        grid,
+        tc_bps=args.tc_bps,
+        n_jobs=args.n_jobs,
+        strategies=args.strategies,
+        cache_dir=args.result_cache,
+        storage_dtype=args.storage_dtype,
+        reuse_buffers=args.reuse_buffers,
+    )
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out_path, index=False)
+
+    print(f"Sweep complete: {len(table)} rows.")
+    print(f"Metrics saved to {out_path}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=HELP)
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    run(parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,26 @@
+import json
 import os
 from pathlib import Path
-from typing import Iterable, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
-DEFAULT_TICKERS = ["SPY", "TLT", "IEF", "GLD", "EEM", "QQQ", "VNQ"]
-DEFAULT_START = "2012-01-01"
-DEFAULT_END = "2025-01-01"
+from src.data.universe import DEFAULT_END, DEFAULT_START, DEFAULT_TICKERS
+
+CACHE_FORMATS = ("csv", "npy")
+
+# fetch(tickers, start, end) -> prices indexed by date, end exclusive
+PriceFetcher = Callable[[List[str], str, str], pd.DataFrame]
 
 
 def ensure_parent(path: str) -> None:
     Path(path).parent.mkdir(parents=True, exist_ok=True)
 
 
-def download_prices(
-    tickers: Iterable[str] = DEFAULT_TICKERS,
-    start: str = DEFAULT_START,
-    end: str = DEFAULT_END,
-    price_path: str = "data/raw/prices.csv",
-    force_download: bool = False,
-) -> pd.DataFrame:
-    """Download adjusted close prices with caching."""
-    if os.path.exists(price_path) and not force_download:
-        prices = pd.read_csv(price_path, index_col=0, parse_dates=True)
-        return prices
+def yfinance_fetcher(tickers: List[str], start: str, end: str) -> pd.DataFrame:
+    """Adjusted close prices from Yahoo Finance."""
+    import yfinance as yf
 
     data = yf.download(list(tickers), start=start, end=end, progress=False, auto_adjust=False)
     if isinstance(data, pd.DataFrame):
@@ -35,22 +30,136 @@ def download_prices(
             prices = data
     else:
         prices = pd.DataFrame(data)
-    prices = prices.dropna(how="all")
-    ensure_parent(price_path)
-    prices.to_csv(price_path, index=True)
+    return prices
+
+
+def csv_fetcher(path: str) -> PriceFetcher:
+    """Fetcher serving prices from a local CSV file, e.g. as a stand-in for yfinance in tests."""
+
+    def fetch(tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        prices = pd.read_csv(path, index_col=0, parse_dates=True)
+        prices = prices[[t for t in tickers if t in prices.columns]]
+        mask = (prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))
+        return prices.loc[mask]
+
+    return fetch
+
+
+def _npy_dir(path: str) -> Path:
+    return Path(path).with_suffix("")
+
+
+def _check_format(cache_format: str) -> str:
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f"Unknown cache format: {cache_format}")
+    return cache_format
+
+
+def cache_exists(path: str, cache_format: str = "csv") -> bool:
+    if _check_format(cache_format) == "npy":
+        return (_npy_dir(path) / "values.npy").exists()
+    return os.path.exists(path)
+
+
+def save_frame(frame: pd.DataFrame, path: str, cache_format: str = "csv") -> None:
+    """Write a date-indexed frame as CSV or as a directory of .npy files.
+
+    The npy layout is values.npy (float64, rows x columns), index.npy
+    (datetime64) and columns.json next to each other in a directory named
+    after path without its suffix. Files are replaced atomically so readers
+    holding a memory map of the previous version keep a valid mapping.
+    """
+    if _check_format(cache_format) == "csv":
+        ensure_parent(path)
+        frame.to_csv(path, index=True)
+        return
+    target = _npy_dir(path)
+    target.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "values.npy": np.ascontiguousarray(frame.to_numpy(dtype=float)),
+        "index.npy": pd.DatetimeIndex(frame.index).values,
+    }
+    for name, array in arrays.items():
+        tmp = target / f".{name}.tmp"
+        with open(tmp, "wb") as fh:
+            np.save(fh, array)
+        os.replace(tmp, target / name)
+    tmp = target / ".columns.json.tmp"
+    tmp.write_text(json.dumps([str(c) for c in frame.columns]))
+    os.replace(tmp, target / "columns.json")
+
+
+def load_frame(path: str, cache_format: str = "csv", mmap: bool = True) -> pd.DataFrame:
+    """Read a frame written by save_frame; npy values are memory-mapped read-only by default."""
+    if _check_format(cache_format) == "csv":
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+    source = _npy_dir(path)
+    values = np.load(source / "values.npy", mmap_mode="r" if mmap else None)
+    index = pd.DatetimeIndex(np.load(source / "index.npy"))
+    columns = json.loads((source / "columns.json").read_text())
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def open_panel(path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Memory-map the values and index of an npy cache without building a frame."""
+    source = _npy_dir(path)
+    values = np.load(source / "values.npy", mmap_mode="r")
+    index = np.load(source / "index.npy", mmap_mode="r")
+    columns = json.loads((source / "columns.json").read_text())
+    return values, index, columns
+
+
+def _fetch(fetcher: Optional[PriceFetcher], tickers: Iterable[str], start: str, end: str) -> pd.DataFrame:
+    fetcher = fetcher or yfinance_fetcher
+    prices = fetcher(list(tickers), start, end)
+    return prices.dropna(how="all")
+
+
+def download_prices(
+    tickers: Iterable[str] = DEFAULT_TICKERS,
+    start: str = DEFAULT_START,
+    end: str = DEFAULT_END,
+    price_path: str = "data/raw/prices.csv",
+    force_download: bool = False,
+    fetcher: Optional[PriceFetcher] = None,
+    cache_format: str = "csv",
+    update: bool = False,
+) -> pd.DataFrame:
+    """Download adjusted close prices with caching.
+
+    With update=True an existing cache is extended with the dates after its
+    last row instead of being fetched again from start.
+    """
+    if cache_exists(price_path, cache_format) and not force_download:
+        prices = load_frame(price_path, cache_format)
+        if not update or len(prices) == 0:
+            return prices
+        fetch_start = (prices.index[-1] + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        if pd.Timestamp(fetch_start) >= pd.Timestamp(end):
+            return prices
+        new = _fetch(fetcher, prices.columns, fetch_start, end)
+        new = new.loc[new.index > prices.index[-1]].reindex(columns=prices.columns)
+        if len(new) == 0:
+            return prices
+        prices = pd.concat([prices, new])
+        save_frame(prices, price_path, cache_format)
+        return prices
+
+    prices = _fetch(fetcher, tickers, start, end)
+    save_frame(prices, price_path, cache_format)
     return prices
 
 
 def compute_log_returns(
     prices: pd.DataFrame,
     returns_path: Optional[str] = "data/processed/returns.csv",
+    cache_format: str = "csv",
 ) -> pd.DataFrame:
     """Compute log returns and cache to disk."""
     returns = np.log(prices / prices.shift(1))
     returns = returns.iloc[1:]
     if returns_path:
-        ensure_parent(returns_path)
-        returns.to_csv(returns_path, index=True)
+        save_frame(returns, returns_path, cache_format)
     return returns
 
 
@@ -61,6 +170,9 @@ def load_prices_and_returns(
     force_download: bool = False,
     price_path: str = "data/raw/prices.csv",
     returns_path: str = "data/processed/returns.csv",
+    fetcher: Optional[PriceFetcher] = None,
+    cache_format: str = "csv",
+    update: bool = False,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     prices = download_prices(
         tickers=tickers,
@@ -68,9 +180,17 @@ def load_prices_and_returns(
         end=end,
         price_path=price_path,
         force_download=force_download,
+        fetcher=fetcher,
+        cache_format=cache_format,
+        update=update,
     )
-    if os.path.exists(returns_path) and not force_download:
-        returns = pd.read_csv(returns_path, index_col=0, parse_dates=True)
+    if cache_exists(returns_path, cache_format) and not force_download:
+        returns = load_frame(returns_path, cache_format)
+        if update and len(returns) and prices.index[-1] > returns.index[-1]:
+            # only the rows after the cached history, anchored on its last price
+            tail = prices.loc[prices.index >= returns.index[-1]]
+            returns = pd.concat([returns, compute_log_returns(tail, returns_path=None)])
+            save_frame(returns, returns_path, cache_format)
     else:
-        returns = compute_log_returns(prices, returns_path=returns_path)
+        returns = compute_log_returns(prices, returns_path=returns_path, cache_format=cache_format)
     return prices, returns
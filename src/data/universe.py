@@ -0,0 +1,10 @@
+from typing import Dict, List, Sequence
+
+DEFAULT_TICKERS = ["SPY", "TLT", "IEF", "GLD", "EEM", "QQQ", "VNQ"]
+DEFAULT_START = "2012-01-01"
+DEFAULT_END = "2025-01-01"
+
+
+def union_tickers(universes: Dict[str, Sequence[str]]) -> List[str]:
+    """Tickers of all universes in first-seen order, e.g. to load their returns once."""
+    return list(dict.fromkeys(t for tickers in universes.values() for t in tickers))
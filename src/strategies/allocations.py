@@ -1,8 +1,15 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional, Tuple, Union
 
 import numpy as np
 from scipy.optimize import minimize
 
+from src.strategies.covariance import CovarianceMatrix, quad_form
+from src.strategies.qp import QPResult, solve_simplex_qp
+from src.strategies.workspace import SQUARE_A, QuadraticForm, Workspace
+from src.utils.profiling import record
+
+SOLVERS = ("slsqp", "active_set")
+
 
 def project_to_simplex(weights: np.ndarray) -> np.ndarray:
     """Project weights to simplex (non-negative, sum to 1)."""
@@ -24,16 +31,49 @@ def _minimize_with_constraints(
     objective: Callable[[np.ndarray], float],
     grad: Callable[[np.ndarray], np.ndarray],
     n_assets: int,
-) -> np.ndarray:
+    w0: Optional[np.ndarray] = None,
+) -> QPResult:
     cons = {"type": "eq", "fun": lambda w: np.sum(w) - 1.0}
     bounds = [(0.0, 1.0) for _ in range(n_assets)]
-    w0 = equal_weight(n_assets)
+    if w0 is None:
+        w0 = equal_weight(n_assets)
     res = minimize(objective, w0, jac=grad, bounds=bounds, constraints=cons, method="SLSQP")
-    return project_to_simplex(res.x)
+    return QPResult(
+        weights=project_to_simplex(res.x),
+        iterations=int(res.nit),
+        converged=bool(res.success),
+        status=str(res.message),
+    )
+
+
+def _finish(result: QPResult, return_info: bool, solver: str) -> Union[np.ndarray, Tuple[np.ndarray, QPResult]]:
+    record(f"{solver}.iterations", result.iterations)
+    if return_info:
+        return result.weights, result
+    return result.weights
 
 
-def min_variance_weights(cov: np.ndarray) -> np.ndarray:
+def _check_solver(solver: str) -> str:
+    solver = solver.lower()
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    return solver
+
+
+def min_variance_weights(
+    cov: np.ndarray,
+    solver: str = "slsqp",
+    w0: Optional[np.ndarray] = None,
+    return_info: bool = False,
+    workspace: Optional[Workspace] = None,
+) -> Union[np.ndarray, Tuple[np.ndarray, QPResult]]:
     n_assets = cov.shape[0]
+    if _check_solver(solver) == "active_set":
+        return _finish(solve_simplex_qp(cov, w0=w0, workspace=workspace), return_info, "active_set")
+    if workspace is not None:
+        quad = QuadraticForm(cov, workspace)
+        result = _minimize_with_constraints(quad.value, lambda w: 2 * quad.cov_w(w), n_assets, w0=w0)
+        return _finish(result, return_info, "slsqp")
 
     def objective(w: np.ndarray) -> float:
         return float(w @ cov @ w)
@@ -41,11 +81,37 @@ def min_variance_weights(cov: np.ndarray) -> np.ndarray:
     def grad(w: np.ndarray) -> np.ndarray:
         return 2 * cov @ w
 
-    return _minimize_with_constraints(objective, grad, n_assets)
+    return _finish(_minimize_with_constraints(objective, grad, n_assets, w0=w0), return_info, "slsqp")
 
 
-def mean_variance_weights(mu: np.ndarray, cov: np.ndarray, gamma: float = 10.0) -> np.ndarray:
+def mean_variance_weights(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    gamma: float = 10.0,
+    solver: str = "slsqp",
+    w0: Optional[np.ndarray] = None,
+    return_info: bool = False,
+    workspace: Optional[Workspace] = None,
+) -> Union[np.ndarray, Tuple[np.ndarray, QPResult]]:
     n_assets = cov.shape[0]
+    if _check_solver(solver) == "active_set":
+        if isinstance(cov, CovarianceMatrix):
+            # gamma * cov keeps cov's factorization for the free-set solves
+            scaled = cov.scaled(gamma, out=None if workspace is None else workspace.get(SQUARE_A, cov.shape, avoid=(cov,)))
+            return _finish(solve_simplex_qp(scaled, mu, w0=w0, workspace=workspace), return_info, "active_set")
+        if workspace is not None and isinstance(cov, np.ndarray):
+            scaled = np.multiply(cov, gamma, out=workspace.get(SQUARE_A, cov.shape, avoid=(cov,)))
+            return _finish(solve_simplex_qp(scaled, mu, w0=w0, workspace=workspace), return_info, "active_set")
+        return _finish(solve_simplex_qp(gamma * cov, mu, w0=w0), return_info, "active_set")
+    if workspace is not None:
+        quad = QuadraticForm(cov, workspace)
+        result = _minimize_with_constraints(
+            lambda w: float(-mu @ w + 0.5 * gamma * quad.value(w)),
+            lambda w: -mu + gamma * quad.cov_w(w),
+            n_assets,
+            w0=w0,
+        )
+        return _finish(result, return_info, "slsqp")
 
     def objective(w: np.ndarray) -> float:
         return float(-mu @ w + 0.5 * gamma * (w @ cov @ w))
@@ -53,17 +119,30 @@ def mean_variance_weights(mu: np.ndarray, cov: np.ndarray, gamma: float = 10.0)
     def grad(w: np.ndarray) -> np.ndarray:
         return -mu + gamma * cov @ w
 
-    return _minimize_with_constraints(objective, grad, n_assets)
+    return _finish(_minimize_with_constraints(objective, grad, n_assets, w0=w0), return_info, "slsqp")
 
 
-def risk_parity_weights(cov: np.ndarray, max_iter: int = 500, tol: float = 1e-8) -> np.ndarray:
+def risk_parity_weights(
+    cov: np.ndarray,
+    max_iter: int = 500,
+    tol: float = 1e-8,
+    workspace: Optional[Workspace] = None,
+) -> np.ndarray:
     n = cov.shape[0]
     w = equal_weight(n)
-    for _ in range(max_iter):
-        port_var = w @ cov @ w
+    # with a workspace, one product per iteration into a reused buffer
+    cov_w = None if workspace is None else workspace.get("risk_parity.cov_w", (n,))
+    # counts the iterations performed, including the one that meets tol
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        if cov_w is None:
+            port_var = w @ cov @ w
+            mrc = cov @ w
+        else:
+            mrc = np.dot(cov, w, out=cov_w)
+            port_var = w @ mrc
         if port_var <= 0:
             break
-        mrc = cov @ w
         rc = w * mrc
         target_rc = port_var / n
         diff = rc - target_rc
@@ -72,21 +151,111 @@ def risk_parity_weights(cov: np.ndarray, max_iter: int = 500, tol: float = 1e-8)
         # multiplicative update keeps positivity
         w = w * target_rc / (rc + 1e-12)
         w = project_to_simplex(w)
+    record("risk_parity.iterations", n_iter)
     return project_to_simplex(w)
 
 
+def _simplex_qp_batch(Q: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """argmin 0.5 w'Qw - c'w over the simplex for a stack of problems.
+
+    The equality-constrained optimum is solved for every matrix at once; it is
+    the answer wherever it is non-negative, and the remaining problems go
+    through the active-set solver, warm-started from its clipped value.
+    """
+    k, n, _ = Q.shape
+    rhs = np.stack([c, np.ones((k, n))], axis=-1)
+    sol = np.linalg.solve(Q, rhs)
+    qc, q1 = sol[..., 0], sol[..., 1]
+    nu = (qc.sum(axis=1) - 1.0) / q1.sum(axis=1)
+    w = qc - nu[:, None] * q1
+    for j in np.flatnonzero((w < 0).any(axis=1)):
+        w[j] = solve_simplex_qp(Q[j], c[j], w0=np.clip(w[j], 0.0, None)).weights
+    return w
+
+
+def min_variance_weights_batch(covs: np.ndarray) -> np.ndarray:
+    """Exact long-only minimum-variance weights for a stack of covariances (k, n, n)."""
+    covs = np.asarray(covs, dtype=float)
+    return _simplex_qp_batch(covs, np.zeros(covs.shape[:2]))
+
+
+def mean_variance_weights_batch(mu: np.ndarray, covs: np.ndarray, gamma: float = 10.0) -> np.ndarray:
+    """Exact long-only mean-variance weights for stacked means (k, n) and covariances (k, n, n)."""
+    covs = np.asarray(covs, dtype=float)
+    return _simplex_qp_batch(gamma * covs, np.asarray(mu, dtype=float))
+
+
 def apply_vol_targeting(
     weights: np.ndarray,
     recent_returns: np.ndarray,
     target_vol: float = 0.10,
     lmax: float = 1.5,
+    cov: Optional[np.ndarray] = None,
 ) -> Dict[str, float]:
-    """Return scaled allocation between risky bucket and cash."""
-    portfolio_rets = recent_returns @ weights
-    realized_vol = float(np.std(portfolio_rets) * np.sqrt(252))
+    """Return scaled allocation between risky bucket and cash.
+
+    With cov, the ex-ante volatility sqrt(252 w'Σw) is targeted instead of
+    the realised volatility of recent_returns; a CovarianceMatrix evaluates
+    it from the factorization it already holds.
+    """
+    if cov is not None:
+        realized_vol = float(np.sqrt(252 * quad_form(cov, weights)))
+    else:
+        portfolio_rets = recent_returns @ weights
+        realized_vol = float(np.std(portfolio_rets) * np.sqrt(252))
     scale = target_vol / (realized_vol + 1e-8)
     scale = float(min(scale, lmax))
     scaled_weights = weights * scale
     # residual goes to cash
     cash_weight = max(0.0, 1.0 - scaled_weights.sum())
     return {"risky": scaled_weights, "cash": cash_weight, "leverage": scale}
+
+
+def risk_parity_weights_batch(
+    covs: np.ndarray,
+    max_iter: int = 50,
+    tol: float = 1e-10,
+    return_info: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Equal-risk-contribution weights for a stack of covariance matrices.
+
+    Solves min 0.5 y'Σy - (1/n) Σ log(y_i) for every matrix in covs (shape
+    (k, n, n)) with a damped Newton method, then normalises y to the simplex.
+    Each step is also cut to 99% of the distance to the nearest y_i = 0, so y
+    stays strictly positive whatever the damping, and each matrix drops out
+    of the iteration once its Newton decrement is below tol. With
+    return_info a boolean array marking the matrices that reached tol within
+    max_iter is returned too; the weights of the others are the last
+    iterate, not the risk-parity portfolio.
+    """
+    covs = np.asarray(covs, dtype=float)
+    if covs.ndim == 2:
+        w, converged = risk_parity_weights_batch(covs[None], max_iter=max_iter, tol=tol, return_info=True)
+        return (w[0], converged[0]) if return_info else w[0]
+    k, n, _ = covs.shape
+    b = 1.0 / n
+    ones = np.ones(n)
+    # start on the budget surface y'Σy = 1 along the equal-weight direction
+    y = np.repeat(ones[None, :], k, axis=0) / np.sqrt(np.einsum("i,kij,j->k", ones, covs, ones))[:, None]
+    active = np.ones(k, dtype=bool)
+    n_iter = 0
+    while n_iter < max_iter and active.any():
+        n_iter += 1
+        idx = np.flatnonzero(active)
+        ya = y[idx]
+        ca = covs[idx]
+        grad = np.einsum("kij,kj->ki", ca, ya) - b / ya
+        hess = ca + (b / ya**2)[:, :, None] * np.eye(n)
+        step = np.linalg.solve(hess, grad[..., None])[..., 0]
+        decrement = np.sqrt(np.maximum(np.einsum("ki,ki->k", grad, step), 0.0))
+        damp = np.where(decrement > 0.25, 1.0 / (1.0 + decrement), 1.0)
+        # the 1 / (1 + decrement) bound assumes a self-concordant barrier, which
+        # the 1/n-scaled one is not, so positivity is enforced directly
+        shrinking = step > 0
+        to_boundary = np.where(shrinking, ya / np.where(shrinking, step, 1.0), np.inf).min(axis=1)
+        damp = np.minimum(damp, 0.99 * to_boundary)
+        y[idx] = ya - damp[:, None] * step
+        active[idx] = decrement > tol
+    record("risk_parity_batch.iterations", n_iter)
+    w = y / y.sum(axis=1, keepdims=True)
+    return (w, ~active) if return_info else w
@@ -1,33 +1,55 @@
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Tuple
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
-from src.strategies.allocations import apply_vol_targeting, equal_weight, mean_variance_weights, min_variance_weights, risk_parity_weights
-from src.strategies.covariance import ewma_covariance, sample_covariance, shrinkage_covariance
-from src.utils.metrics import compute_metrics
+from src.strategies.cache import ResultCache, content_key
+from src.strategies.covariance import FactorCovariance, RollingCovariance, ewma_covariance, factor_covariance, sample_covariance, shrinkage_covariance
+from src.strategies.frontier import FrontierHistory, efficient_frontier
+from src.strategies.registry import RebalanceContext, resolve_strategies
+from src.strategies.weights import WeightEvents, WeightsView, drifted_book, event_turnover
+from src.strategies.workspace import SQUARE_A, Workspace, from_storage, to_storage
+from src.strategies.workspace import storage_dtype as _storage_dtype
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
 
 
 REB_FREQ = {"weekly": 5, "monthly": 21, "quarterly": 63}
+ACCOUNTING_MODES = ("drift", "fixed")
 
 
 @dataclass
 class BacktestResult:
     returns: pd.DataFrame
-    weights: Dict[str, pd.DataFrame]
+    events: Dict[str, WeightEvents]
     turnover: pd.DataFrame
     metrics: pd.DataFrame
+    frontiers: Optional[FrontierHistory] = None
 
+    @property
+    def weights(self) -> WeightsView:
+        """Dense days x assets weights held per strategy (drifted under drift accounting), built lazily."""
+        return WeightsView(self.events)
 
-def get_covariance(returns: pd.DataFrame, method: str = "shrinkage", lam: float = 0.94) -> np.ndarray:
+
+def get_covariance(
+    returns: pd.DataFrame,
+    method: str = "shrinkage",
+    lam: float = 0.94,
+    n_factors: int = 5,
+    workspace: Optional[Workspace] = None,
+) -> Union[np.ndarray, FactorCovariance]:
     method = method.lower()
     if method == "sample":
         return sample_covariance(returns)
     if method == "ewma":
-        return ewma_covariance(returns, lam=lam)
+        return ewma_covariance(returns, lam=lam, workspace=workspace)
     if method == "shrinkage":
-        return shrinkage_covariance(returns)
+        return shrinkage_covariance(returns, workspace=workspace)
+    if method == "factor":
+        return factor_covariance(returns, n_factors=n_factors)
     raise ValueError(f"Unknown covariance estimator: {method}")
 
 
@@ -38,6 +60,120 @@ def should_rebalance(i: int, freq: str, last_reb: int) -> bool:
     return i - last_reb >= step
 
 
+def rebalance_schedule(n_obs: int, window: int, freq: str) -> np.ndarray:
+    """Row indices at which run_backtest rebalances (same rule as should_rebalance)."""
+    if freq not in REB_FREQ:
+        freq = "monthly"
+    step = REB_FREQ[freq]
+    return np.arange(max(window, step), n_obs, step)
+
+
+def _drift_factors(values: np.ndarray, bounds: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Asset growth since the last rebalance, in closed form per segment.
+
+    For every day, each asset's growth from its segment's rebalance through
+    the previous close (1 on rebalance days), and each asset's growth over
+    every complete segment. The running products advance one day of every
+    segment at a time, so the loop is over the segment length, not the days.
+    """
+    n_days = values.shape[-2]
+    since = np.ones_like(values)
+    starts = np.array([a for a, _ in bounds], dtype=np.intp)
+    ends = np.array([b for _, b in bounds], dtype=np.intp)
+    # days since the segment's rebalance, -1 before the first one
+    position = np.full(n_days, -1)
+    if len(bounds):
+        position[starts[0] :] = np.arange(starts[0], n_days) - np.repeat(starts, ends - starts)
+    for i in range(1, int((ends - starts).max(initial=0))):
+        rows = np.flatnonzero(position == i)
+        since[..., rows, :] = since[..., rows - 1, :] * (1.0 + values[..., rows - 1, :])
+    last = ends - 1
+    per_segment = since[..., last, :] * (1.0 + values[..., last, :])
+    return since, per_segment
+
+
+def account_rebalances(
+    bt_values: np.ndarray,
+    offsets: np.ndarray,
+    events: Dict[str, np.ndarray],
+    tc: float,
+    accounting: str = "drift",
+    initial: Optional[Dict[str, np.ndarray]] = None,
+    workspace: Optional[Workspace] = None,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], Dict[str, np.ndarray], Optional[np.ndarray]]:
+    """Daily returns, turnover, the book ahead of each event and the drift growth.
+
+    events[name][k] is the weight vector adopted on row offsets[k] of
+    bt_values and held until the next event; rows before the first event hold
+    nothing and the remainder of the book (1 - sum of weights) is cash earning
+    zero. With accounting="fixed" the weights are reapplied every day. With
+    "drift" positions move with their assets' returns between rebalances, and
+    turnover (and its cost tc per unit, charged on event rows) is measured
+    against the drifted book, which is returned per event. The last element
+    is each asset's growth since the segment's start through the previous
+    close (see WeightEvents.growth), shared by all strategies; it is None
+    with fixed accounting. Rows with a missing return are NaN and count as
+    no price change for the drift. initial[name], when given, is the book
+    held coming into row 0 (e.g. carried over from the previous chunk of a
+    longer panel) instead of nothing. Arrays may carry leading batch axes,
+    e.g. (paths, days, assets) with events (paths, events, assets). With a
+    workspace the drift products are formed one segment at a time in its
+    SQUARE_A buffer rather than as one more days x assets array; the
+    results agree to rounding.
+    """
+    if accounting not in ACCOUNTING_MODES:
+        raise ValueError(f"Unknown accounting mode: {accounting}")
+    n_days = bt_values.shape[-2]
+    missing = ~np.isfinite(bt_values).all(axis=-1)
+    clean = np.nan_to_num(bt_values) if missing.any() else bt_values
+    starts = [int(o) for o in offsets]
+    # the initial book is held as a leading segment up to the first event
+    lead = initial is not None and (not starts or starts[0] > 0)
+    seg_starts = [0] + starts if lead else starts
+    bounds = list(zip(seg_starts, seg_starts[1:] + [n_days]))
+    drift = accounting == "drift"
+    since = None
+    if drift:
+        since, per_segment = _drift_factors(clean, bounds)
+        # day return = (w * since) . r / (1 - sum(w) + w . since); since * r is shared by all strategies
+        weighted = since * clean if workspace is None else None
+
+    returns_hist: Dict[str, np.ndarray] = {}
+    turnover_hist: Dict[str, np.ndarray] = {}
+    books_before: Dict[str, np.ndarray] = {}
+    for name, ev in events.items():
+        held = np.concatenate([initial[name][..., None, :], ev], axis=-2) if lead else ev
+        gross = np.zeros(bt_values.shape[:-1])
+        for k, (a, b) in enumerate(bounds):
+            w = held[..., k, :, None]
+            if drift:
+                if weighted is None:
+                    out = workspace.get(SQUARE_A, since[..., a:b, :].shape, avoid=(since, clean))
+                    segment = np.multiply(since[..., a:b, :], clean[..., a:b, :], out=out)
+                else:
+                    segment = weighted[..., a:b, :]
+                gross[..., a:b] = (segment @ w)[..., 0] / ((1.0 - w.sum(axis=-2)) + (since[..., a:b, :] @ w)[..., 0])
+            else:
+                gross[..., a:b] = (clean[..., a:b, :] @ w)[..., 0]
+        gross[missing] = np.nan
+
+        before = np.zeros_like(held)
+        if drift:
+            before[..., 1:, :] = drifted_book(held[..., :-1, :], per_segment[..., :-1, :])
+        else:
+            before[..., 1:, :] = held[..., :-1, :]
+        if lead:
+            before = before[..., 1:, :]
+        elif initial is not None and len(starts):
+            before[..., 0, :] = initial[name]
+        turnover = np.zeros(bt_values.shape[:-1])
+        turnover[..., offsets] = event_turnover(ev, before)
+        returns_hist[name] = gross - tc * turnover
+        turnover_hist[name] = turnover
+        books_before[name] = before
+    return returns_hist, turnover_hist, books_before, since
+
+
 def run_backtest(
     returns: pd.DataFrame,
     window: int = 252,
@@ -47,67 +183,118 @@ def run_backtest(
     cov_method: str = "shrinkage",
     target_vol: float = 0.10,
     lmax: float = 1.5,
+    solver: str = "slsqp",
+    strategies: Optional[Sequence[str]] = None,
+    cache: Optional[ResultCache] = None,
+    accounting: str = "drift",
+    frontier_gammas: Optional[Sequence[float]] = None,
+    storage_dtype: str = "float64",
+    workspace: Optional[Workspace] = None,
 ) -> BacktestResult:
+    """Walk-forward backtest of the registered strategies.
+
+    With frontier_gammas the long-only efficient frontier on that gamma grid
+    is also traced from each rebalance's mean and covariance and returned
+    as result.frontiers. storage_dtype="float32" keeps the weight histories,
+    frontier weights and drift growth in single precision, halving their
+    memory; the estimators, optimizers and accounting still run in float64.
+    Covariances are only held beyond their rebalance when a cache is given,
+    so only then are they stored in float32 as well; without one there is
+    no covariance panel to shrink. A Workspace lends the covariance and
+    optimizer steps scratch buffers that are reused across rebalances (and
+    across runs sharing it).
+    """
     if len(returns) <= window:
         raise ValueError("Not enough data for the chosen window length.")
+    if accounting not in ACCOUNTING_MODES:
+        raise ValueError(f"Unknown accounting mode: {accounting}")
+    dtype = _storage_dtype(storage_dtype)
     assets = list(returns.columns)
     n_assets = len(assets)
     tc = tc_bps / 10000.0
 
-    strategy_names = ["equal_weight", "min_variance", "mean_variance", "risk_parity", "vol_target"]
-    weights_hist: Dict[str, List[np.ndarray]] = {k: [] for k in strategy_names}
-    turnover_hist: Dict[str, List[float]] = {k: [] for k in strategy_names}
-    returns_hist: Dict[str, List[float]] = {k: [] for k in strategy_names}
-
-    prev_weights: Dict[str, np.ndarray] = {k: np.zeros(n_assets) for k in strategy_names}
-    last_reb_index = 0
-
-    dates = returns.index
-    for i in range(window, len(dates)):
-        date = dates[i]
-        window_rets = returns.iloc[i - window : i]
-        todays_ret = returns.iloc[i].values
-        rebalance_today = should_rebalance(i, rebalance, last_reb_index)
-
-        if rebalance_today:
-            cov = get_covariance(window_rets, method=cov_method)
-            mu = window_rets.mean().values
-            ew = equal_weight(n_assets)
-            w_min = min_variance_weights(cov)
-            w_mv = mean_variance_weights(mu, cov, gamma=gamma)
-            w_rp = risk_parity_weights(cov)
-            vol_info = apply_vol_targeting(ew, window_rets.values, target_vol=target_vol, lmax=lmax)
-            w_vol = vol_info["risky"]
-
-            new_weights = {
-                "equal_weight": ew,
-                "min_variance": w_min,
-                "mean_variance": w_mv,
-                "risk_parity": w_rp,
-                "vol_target": w_vol,
-            }
-            last_reb_index = i
-        else:
-            new_weights = {k: prev_weights[k] for k in strategy_names}
+    specs = resolve_strategies(strategies)
+    strategy_names = [spec.name for spec in specs]
+    values = returns.to_numpy(dtype=float)
+    reb_idx = rebalance_schedule(len(values), window, rebalance)
+    params = {"gamma": gamma, "target_vol": target_vol, "lmax": lmax, "solver": solver, "cov_method": cov_method}
 
-        for name in strategy_names:
-            turnover = float(np.abs(new_weights[name] - prev_weights[name]).sum()) if rebalance_today else 0.0
-            cost = tc * turnover if rebalance_today else 0.0
-            port_ret = float(new_weights[name].dot(todays_ret) - cost)
+    # Phase 1: solve weights at rebalance dates only.
+    events: Dict[str, np.ndarray] = {k: np.zeros((len(reb_idx), n_assets), dtype=dtype) for k in strategy_names}
+    prev_weights: Dict[str, np.ndarray] = {}
+    if frontier_gammas is not None:
+        n_points = len(frontier_gammas)
+        frontier_weights = np.zeros((len(reb_idx), n_points, n_assets), dtype=dtype)
+        frontier_stats = np.zeros((2, len(reb_idx), n_points))
 
-            weights_hist[name].append(new_weights[name])
-            turnover_hist[name].append(turnover)
-            returns_hist[name].append(port_ret)
+    # Slide the covariance window incrementally between rebalances; fall back
+    # to full recomputation when the panel has gaps the running sums can't skip.
+    finite = bool(np.isfinite(values).all())
+    rolling_cov = None
+    if window >= 2 and finite and cov_method.lower() in RollingCovariance.METHODS:
+        rolling_cov = RollingCovariance(n_assets, window, method=cov_method, workspace=workspace)
+    cov_pos = 0
 
-            prev_weights[name] = new_weights[name]
+    def cov_at(i: int) -> np.ndarray:
+        if cache is None:
+            return estimate_cov(i)
+        # reduced-precision entries get their own keys
+        tag = () if dtype == np.float64 else (dtype.name,)
+        key = content_key("covariance", values[i - window : i], cov_method.lower(), *tag)
+        return from_storage(cache.get_or_compute(key, lambda: to_storage(estimate_cov(i), dtype)))
 
+    def estimate_cov(i: int) -> np.ndarray:
+        nonlocal cov_pos
+        with timed("covariance", method=cov_method):
+            if rolling_cov is None:
+                return get_covariance(returns.iloc[i - window : i], method=cov_method, workspace=workspace)
+            rolling_cov.update(values[cov_pos:i])
+            cov_pos = i
+            return rolling_cov.covariance()
+
+    def mu_at(i: int) -> np.ndarray:
+        if finite:
+            return values[i - window : i].mean(axis=0)
+        return returns.iloc[i - window : i].mean().values
+
+    for k, i in enumerate(reb_idx):
+        window_vals = values[i - window : i]
+        ctx = RebalanceContext(window_vals, partial(cov_at, i), partial(mu_at, i), params, prev_weights, cache=cache, workspace=workspace)
+        new_weights = {}
+        for spec in specs:
+            with timed(f"allocator.{spec.name}"):
+                new_weights[spec.name] = np.asarray(spec.func(ctx), dtype=float)
+        for name in strategy_names:
+            events[name][k] = new_weights[name]
+        prev_weights = new_weights
+        if frontier_gammas is not None:
+            with timed("frontier"):
+                frontier = efficient_frontier(ctx.mu, ctx.cov, frontier_gammas)
+            frontier_weights[k] = frontier.weights
+            frontier_stats[:, k] = frontier.expected_returns, frontier.volatilities
+
+    # Phase 2: daily accounting for every strategy with whole-array operations.
     backtest_index = returns.index[window:]
-    weights_df = {k: pd.DataFrame(np.vstack(v), index=backtest_index, columns=assets) for k, v in weights_hist.items()}
+    with timed("accounting"):
+        returns_hist, turnover_hist, before, growth = account_rebalances(
+            values[window:], reb_idx - window, events, tc, accounting, workspace=workspace
+        )
+    offsets = reb_idx - window
+    if growth is not None:
+        growth = growth.astype(dtype, copy=False)
+    weight_events = {
+        name: WeightEvents(backtest_index, returns.columns, offsets, events[name], before[name].astype(dtype, copy=False), growth)
+        for name in strategy_names
+    }
+
     turnover_df = pd.DataFrame(turnover_hist, index=backtest_index)
     ret_df = pd.DataFrame(returns_hist, index=backtest_index)
 
-    metrics_rows = []
-    for name in strategy_names:
-        metrics_rows.append(compute_metrics(ret_df[name], turnover_df[name], target_vol))
-    metrics = pd.DataFrame(metrics_rows, index=strategy_names)
-    return BacktestResult(returns=ret_df, weights=weights_df, turnover=turnover_df, metrics=metrics)
+    frontiers = None
+    if frontier_gammas is not None:
+        gammas = np.asarray(frontier_gammas, dtype=float)
+        frontiers = FrontierHistory(returns.index[reb_idx], returns.columns, gammas, frontier_weights, *frontier_stats)
+
+    with timed("metrics"):
+        metrics = compute_metrics_table(ret_df, turnover_df, target_vol)
+    return BacktestResult(returns=ret_df, events=weight_events, turnover=turnover_df, metrics=metrics, frontiers=frontiers)
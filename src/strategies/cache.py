@@ -0,0 +1,214 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.covariance import FactorCovariance
+from src.utils.pipeline import source_digest
+
+_MISSING = object()
+
+
+def _function_source(fn: Any) -> bytes:
+    """Source of fn, or its bytecode when the source cannot be read."""
+    try:
+        return inspect.getsource(fn).encode()
+    except (OSError, TypeError):
+        code = getattr(fn, "__code__", None)
+        return b"" if code is None else code.co_code
+
+
+def _update_hash(h: Any, obj: Any) -> None:
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        h.update(f"nd:{arr.dtype.str}:{arr.shape}".encode())
+        h.update(arr.data if arr.size else b"")
+    elif isinstance(obj, pd.DataFrame):
+        # window contents only; the dates themselves do not change the estimate
+        _update_hash(h, obj.to_numpy())
+    elif isinstance(obj, pd.Series):
+        _update_hash(h, obj.to_numpy())
+    elif isinstance(obj, FactorCovariance):
+        h.update(b"factor")
+        _update_hash(h, obj.loadings)
+        _update_hash(h, obj.specific)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"seq:{len(obj)}".encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif isinstance(obj, dict):
+        h.update(f"map:{len(obj)}".encode())
+        for key in sorted(obj):
+            h.update(repr(key).encode())
+            _update_hash(h, obj[key])
+    elif callable(obj):
+        h.update(f"fn:{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}".encode())
+        # the body too, so editing a function gives its results new keys
+        h.update(_function_source(obj))
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hex digest of arrays, frames, factor covariances and plain values."""
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _update_hash(h, part)
+    return h.hexdigest()
+
+
+def _nbytes(obj: Any) -> int:
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, FactorCovariance):
+        return int(obj.loadings.nbytes + obj.specific.nbytes)
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(item) for item in obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(item) for item in obj.values())
+    return sys.getsizeof(obj)
+
+
+def _freeze(obj: Any) -> Any:
+    """Mark cached arrays read-only so callers cannot alter a shared entry."""
+    if isinstance(obj, np.ndarray):
+        obj.flags.writeable = False
+    elif isinstance(obj, FactorCovariance):
+        obj.loadings.flags.writeable = False
+        obj.specific.flags.writeable = False
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _freeze(item)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _freeze(item)
+    return obj
+
+
+class ResultCache:
+    """Two-tier memo store for covariance estimates and optimizer outputs.
+
+    Entries live in an in-memory LRU bounded by max_bytes. When disk_dir is
+    set, entries are also pickled there and evicted least-recently-used once
+    the directory grows past disk_max_bytes, so later processes can reuse them.
+    Disk entries are also keyed by code_version, by default a digest of the
+    src.strategies sources, so editing an estimator or allocator (or a
+    helper they call) leaves the old entries unread until they are evicted
+    instead of serving stale results.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 2**20,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 2**30,
+        code_version: Optional[str] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        if code_version is None and self.disk_dir is not None:
+            code_version = source_digest("src.strategies")
+        self.code_version = code_version
+        # key -> (value, nbytes), least recently used first
+        self._memory: OrderedDict = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{content_key(key, self.code_version)}.pkl"
+
+    def _remember(self, key: str, value: Any) -> None:
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            _, (_, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key][0]
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as fh:
+                    value = _freeze(pickle.load(fh))
+                os.utime(path)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        value = _freeze(value)
+        self._remember(key, value)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for path in self.disk_dir.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self, disk: bool = False) -> None:
+        self._memory.clear()
+        self._memory_bytes = 0
+        if disk and self.disk_dir is not None:
+            for path in self.disk_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def call(self, fn: Callable[..., Any], *args: Any, ignore: Iterable[str] = (), **kwargs: Any) -> Any:
+        """Memoised fn(*args, **kwargs); keyword arguments named in ignore are left out of the key."""
+        ignored = set(ignore)
+        key_kwargs = {k: v for k, v in kwargs.items() if k not in ignored}
+        key = content_key(fn, args, key_kwargs)
+        return self.get_or_compute(key, lambda: fn(*args, **kwargs))
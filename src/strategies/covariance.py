@@ -1,28 +1,79 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+from scipy.linalg.lapack import dpotrf
+
+from src.strategies.workspace import SQUARE_A, SQUARE_B, Workspace
+
+# Workspace use (see src.strategies.workspace for the full order): pushes
+# form their rank-1 update in SQUARE_B, the rolling sample is built in
+# SQUARE_A (SQUARE_B as scratch), shrinkage writes SQUARE_B from it, and
+# ensure_psd symmetrises into SQUARE_A and, when clipping is needed, scales
+# the eigenvectors in SQUARE_B.
 
 
 def sample_covariance(returns: pd.DataFrame) -> np.ndarray:
     return np.asarray(returns.cov())
 
 
-def ewma_covariance(returns: pd.DataFrame, lam: float = 0.94) -> np.ndarray:
-    data = returns.values
-    n = data.shape[1]
-    cov = np.zeros((n, n))
-    for t in range(data.shape[0]):
-        cov = lam * cov + (1 - lam) * np.outer(data[t], data[t])
-    return ensure_psd(cov)
+def ewma_covariance(returns: pd.DataFrame, lam: float = 0.94, workspace: Optional[Workspace] = None) -> np.ndarray:
+    return ensure_psd(ewma_moment(returns, lam=lam), workspace=workspace)
+
+
+def ewma_moment(returns: pd.DataFrame, lam: float = 0.94) -> np.ndarray:
+    """EWMA second-moment matrix before PSD clipping.
+
+    The recursion S_t = lam S_{t-1} + (1 - lam) x_t x_t' started from zero
+    is summed in closed form, as one weighted product X' diag(d) X.
+    """
+    data = np.asarray(returns, dtype=float)
+    decay = (1 - lam) * lam ** np.arange(data.shape[0] - 1, -1, -1)
+    return (data * decay[:, None]).T @ data
 
 
 def shrinkage_covariance(
     returns: pd.DataFrame,
     shrinkage: float = 0.1,
     prior: Optional[np.ndarray] = None,
+    workspace: Optional[Workspace] = None,
 ) -> np.ndarray:
     sample = np.asarray(returns.cov())
+    return shrink_sample(sample, shrinkage, prior, workspace)
+
+
+def covariance_from_moment(moment: np.ndarray, method: str, shrinkage: float = 0.1) -> np.ndarray:
+    """Finish an estimator from its raw moment: the sample covariance, or the EWMA moment for "ewma".
+
+    Every step is elementwise or per diagonal entry up to the final PSD clip,
+    so applied to the block of a larger universe's moment it gives exactly
+    the estimate on that sub-universe.
+    """
+    method = method.lower()
+    if method == "sample":
+        return moment
+    if method == "ewma":
+        return ensure_psd(moment)
+    if method == "shrinkage":
+        return shrink_sample(moment, shrinkage, None)
+    raise ValueError(f"Unknown covariance estimator: {method}")
+
+
+def shrink_sample(
+    sample: np.ndarray,
+    shrinkage: float,
+    prior: Optional[np.ndarray] = None,
+    workspace: Optional[Workspace] = None,
+) -> np.ndarray:
+    """Shrink a sample covariance towards prior (its own diagonal by default), then clip to PSD."""
+    if workspace is not None and prior is None:
+        # same arithmetic as below, in a reused buffer
+        n = sample.shape[0]
+        cov = workspace.get(SQUARE_B, (n, n), avoid=(sample,))
+        np.multiply(sample, 1 - shrinkage, out=cov)
+        cov[np.diag_indices(n)] += shrinkage * np.diagonal(sample)
+        return ensure_psd(cov, workspace=workspace)
     if prior is None:
         diag = np.diag(np.diag(sample))
         prior = diag
@@ -30,9 +81,442 @@ def shrinkage_covariance(
     return ensure_psd(cov)
 
 
-def ensure_psd(matrix: np.ndarray, epsilon: float = 1e-6) -> np.ndarray:
-    sym = 0.5 * (matrix + matrix.T)
+def ensure_psd(matrix: np.ndarray, epsilon: float = 1e-6, workspace: Optional[Workspace] = None) -> np.ndarray:
+    """Clip eigenvalues at epsilon; also accepts a stack of matrices (..., n, n).
+
+    The symmetrised matrix is Cholesky-factored first. If that succeeds with
+    every pivot above epsilon (the usual case after shrinkage) it is returned
+    as is: a pivot is never below the smallest eigenvalue, so this passes
+    every matrix that needs no clipping. The eigendecomposition is only
+    computed otherwise. A single matrix comes back as a CovarianceMatrix that
+    keeps the factor for its solves. With a workspace the symmetrised input
+    and the scaled eigenvectors go into its buffers; the result is a new array
+    either way.
+    """
+    if np.ndim(matrix) == 2:
+        n = matrix.shape[0]
+        if workspace is not None:
+            sym = workspace.get(SQUARE_A, (n, n), avoid=(matrix,))
+            np.add(matrix, matrix.T, out=sym)
+            sym *= 0.5
+        else:
+            sym = 0.5 * (matrix + matrix.T)
+        chol = _pivots_exceed(sym, epsilon)
+        if chol is not None:
+            return CovarianceMatrix(sym.copy() if workspace is not None else sym, chol=chol)
+        eigvals, eigvecs = np.linalg.eigh(sym)
+        np.clip(eigvals, epsilon, None, out=eigvals)
+        if workspace is not None:
+            # matrix is no longer read once symmetrised, so it may be SQUARE_B itself
+            scaled = workspace.get(SQUARE_B, (n, n), avoid=(sym,))
+            np.multiply(eigvecs, eigvals, out=scaled)
+        else:
+            scaled = eigvecs * eigvals
+        return CovarianceMatrix(scaled @ eigvecs.T, eig=(eigvecs, eigvals))
+    sym = 0.5 * (matrix + np.swapaxes(matrix, -1, -2))
+    try:
+        chol = np.linalg.cholesky(sym)
+        if np.diagonal(chol, axis1=-2, axis2=-1).min() ** 2 > epsilon:
+            return sym
+    except np.linalg.LinAlgError:
+        pass
     eigvals, eigvecs = np.linalg.eigh(sym)
     eigvals = np.clip(eigvals, epsilon, None)
-    psd = eigvecs @ np.diag(eigvals) @ eigvecs.T
+    psd = (eigvecs * eigvals[..., None, :]) @ np.swapaxes(eigvecs, -1, -2)
     return psd
+
+
+def _pivots_exceed(sym: np.ndarray, epsilon: float) -> Optional[np.ndarray]:
+    """Lower Cholesky factor of sym if it exists with every pivot above epsilon, else None."""
+    chol, info = dpotrf(sym, lower=1, clean=1)
+    if info != 0 or np.diagonal(chol).min() ** 2 <= epsilon:
+        return None
+    return chol
+
+
+class CovarianceMatrix(np.ndarray):
+    """Dense covariance that keeps a factorization of itself for solves.
+
+    Returned by ensure_psd. Holds the clipped eigendecomposition when the
+    matrix needed repair, and otherwise the Cholesky factor from ensure_psd's
+    check (computed on the first solve for matrices built directly); scaled()
+    copies share it, so gamma * cov in the mean-variance
+    problem and the rescaled matrix inside the active-set solver reuse one
+    factorization. Arithmetic, products and casts give plain arrays (casts
+    and unpickled copies start without a factorization).
+    """
+
+    def __new__(
+        cls,
+        matrix: np.ndarray,
+        eig: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        chol: Optional[np.ndarray] = None,
+    ) -> "CovarianceMatrix":
+        obj = np.asarray(matrix, dtype=float).view(cls)
+        obj._eig = eig
+        obj._chol = chol
+        return obj
+
+    def __array_finalize__(self, obj) -> None:
+        self._eig = None
+        self._chol = None
+        self._source = None
+        self._scale = 1.0
+
+    def __array_wrap__(self, array, context=None, return_scalar=False):
+        array = array.view(np.ndarray)
+        return array[()] if return_scalar else array
+
+    @property
+    def repaired(self) -> bool:
+        """True if eigenvalues had to be clipped to make the matrix positive definite."""
+        return self._base()._eig is not None
+
+    def _base(self) -> "CovarianceMatrix":
+        return self if self._source is None else self._source
+
+    def cholesky(self) -> Optional[np.ndarray]:
+        """Lower Cholesky factor of the unscaled matrix, computed once; None if it fails."""
+        base = self._base()
+        if base._chol is None:
+            try:
+                base._chol = np.linalg.cholesky(base.view(np.ndarray))
+            except np.linalg.LinAlgError:
+                base._chol = False
+        return None if base._chol is False else base._chol
+
+    def scaled(self, factor: float, out: Optional[np.ndarray] = None) -> "CovarianceMatrix":
+        """factor * self, sharing this matrix's factorization."""
+        scaled = np.multiply(self.view(np.ndarray), factor, out=out).view(CovarianceMatrix)
+        scaled._source = self._base()
+        scaled._scale = self._scale * factor
+        return scaled
+
+    def _full_solve(self, b: np.ndarray) -> np.ndarray:
+        base = self._base()
+        if base._eig is not None:
+            vecs, vals = base._eig
+            proj = vecs.T @ b
+            x = vecs @ (proj / (vals if proj.ndim == 1 else vals[:, None]))
+        else:
+            chol = self.cholesky()
+            if chol is None:
+                raise np.linalg.LinAlgError("Covariance matrix is not positive definite.")
+            x = cho_solve((chol, True), b)
+        return x / self._scale
+
+    def _factor_is_cheaper(self, n_free: int) -> bool:
+        # flops of the Schur-complement route against factoring the free block
+        base = self._base()
+        if base._eig is None and base._chol is False:
+            return False
+        n = self.shape[0]
+        n_bound = n - n_free
+        cost = 2.0 * n * n * (n_bound + 2) + n_bound**3 / 3.0
+        if base._eig is None and base._chol is None:
+            cost += n**3 / 3.0
+        return cost < n_free**3 / 3.0
+
+    def solve(self, b: np.ndarray, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """Solve Σ_II x = b on the index subset idx (all assets by default).
+
+        A subset is solved from the full factorization through the Schur
+        complement on the left-out assets when that is cheaper than factoring
+        the block, and by a Cholesky factorization of the block otherwise.
+        Raises LinAlgError if the matrix is not positive definite.
+        """
+        b = np.asarray(b, dtype=float)
+        n = self.shape[0]
+        if idx is None or len(idx) == n:
+            return self._full_solve(b)
+        if not self._factor_is_cheaper(len(idx)):
+            block = self.view(np.ndarray)[np.ix_(idx, idx)]
+            return cho_solve(cho_factor(block, lower=True), b)
+        # x = Σ^-1 (E_I b + E_J m) with m chosen so that x vanishes on the rest J
+        rest = np.ones(n, dtype=bool)
+        rest[idx] = False
+        rest = np.flatnonzero(rest)
+        padded = np.zeros((n,) + b.shape[1:])
+        padded[idx] = b
+        units = np.zeros((n, len(rest)))
+        units[rest, np.arange(len(rest))] = 1.0
+        y = self._full_solve(padded)
+        g = self._full_solve(units)
+        m = np.linalg.solve(g[rest], -y[rest])
+        return (y + g @ m)[idx]
+
+    def quad(self, w: np.ndarray) -> float:
+        """w'Σw, from the factorization when one is held (never negative then)."""
+        base = self._base()
+        if base._eig is not None:
+            vecs, vals = base._eig
+            z = (vecs.T @ w) * np.sqrt(vals)
+        elif base._chol is not None and base._chol is not False:
+            z = base._chol.T @ w
+        else:
+            return float(w @ self.view(np.ndarray) @ w)
+        return float(z @ z) * self._scale
+
+
+def quad_form(cov, w: np.ndarray) -> float:
+    """w'Σw for a dense, CovarianceMatrix or FactorCovariance Σ."""
+    if isinstance(cov, (CovarianceMatrix, FactorCovariance)):
+        return cov.quad(w)
+    return float(w @ cov @ w)
+
+
+def stacked_covariance(
+    windows: np.ndarray,
+    method: str = "shrinkage",
+    lam: float = 0.94,
+    shrinkage: float = 0.1,
+) -> np.ndarray:
+    """Covariances of a stack of return windows (k, t, n) -> (k, n, n).
+
+    Same estimators as sample_covariance, ewma_covariance and
+    shrinkage_covariance applied to each window; windows must not contain NaNs.
+    """
+    windows = np.asarray(windows, dtype=float)
+    method = method.lower()
+    if method == "ewma":
+        t = windows.shape[1]
+        decay = (1 - lam) * lam ** np.arange(t - 1, -1, -1)
+        return ensure_psd(np.einsum("t,kti,ktj->kij", decay, windows, windows))
+    if method not in ("sample", "shrinkage"):
+        raise ValueError(f"Unknown covariance estimator for stacked windows: {method}")
+    centered = windows - windows.mean(axis=1, keepdims=True)
+    sample = np.einsum("kti,ktj->kij", centered, centered) / (windows.shape[1] - 1)
+    if method == "sample":
+        return sample
+    diag = np.einsum("kii->ki", sample)
+    cov = (1 - shrinkage) * sample
+    idx = np.arange(sample.shape[-1])
+    cov[:, idx, idx] += shrinkage * diag
+    return ensure_psd(cov)
+
+
+class RollingCovariance:
+    """Sliding-window covariance maintained with rank-1 add/drop updates.
+
+    Keeps running first and second moments (for the sample and shrinkage
+    estimators) and the windowed EWMA state, so moving the window forward by
+    one row costs O(n^2) instead of recomputing over the full window. The
+    matrices match sample_covariance, ewma_covariance and shrinkage_covariance
+    on the same window up to floating-point error. Rows must not contain NaNs.
+    Pushing a row updates the running moments in place; with a workspace the
+    rank-1 updates and the finishing steps of covariance() reuse its buffers
+    as well.
+    """
+
+    METHODS = ("sample", "ewma", "shrinkage")
+
+    def __init__(
+        self,
+        n_assets: int,
+        window: int,
+        method: str = "shrinkage",
+        lam: float = 0.94,
+        shrinkage: float = 0.1,
+        workspace: Optional[Workspace] = None,
+    ) -> None:
+        method = method.lower()
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown covariance estimator: {method}")
+        if window < 2:
+            raise ValueError("Rolling covariance needs a window of at least 2 rows.")
+        self.n_assets = n_assets
+        self.window = window
+        self.method = method
+        self.lam = lam
+        self.shrinkage = shrinkage
+        self.workspace = workspace
+        self._tail_weight = (1 - lam) * lam**window
+        self.reset()
+
+    def reset(self) -> None:
+        n = self.n_assets
+        self._buffer = np.zeros((self.window, n))
+        self._pos = 0
+        self._count = 0
+        self._sum = np.zeros(n)
+        self._outer = np.zeros((n, n))
+        self._ewma = np.zeros((n, n))
+        # with a workspace the rank-1 scratch is its shared SQUARE_B buffer
+        self._rank1 = np.empty((n, n)) if self.workspace is None else None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def push(self, row: np.ndarray) -> None:
+        """Add one row to the window, dropping the oldest row once full."""
+        x = np.asarray(row, dtype=float)
+        lam = self.lam
+        scratch = self._rank1
+        if scratch is None:
+            scratch = self.workspace.get(SQUARE_B, self._outer.shape)
+        rank1 = np.multiply.outer(x, x, out=scratch)
+        self._outer += rank1
+        rank1 *= 1 - lam
+        self._ewma *= lam
+        self._ewma += rank1
+        self._sum += x
+        if self._count == self.window:
+            old = self._buffer[self._pos]
+            rank1 = np.multiply.outer(old, old, out=scratch)
+            self._outer -= rank1
+            rank1 *= self._tail_weight
+            self._ewma -= rank1
+            self._sum -= old
+        else:
+            self._count += 1
+        self._buffer[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+
+    def update(self, rows: np.ndarray) -> None:
+        """Push several rows; rebuilds from scratch if they span a full window."""
+        rows = np.asarray(rows, dtype=float)
+        if len(rows) >= self.window:
+            self.reset()
+            rows = rows[-self.window :]
+        for row in rows:
+            self.push(row)
+
+    def values(self) -> np.ndarray:
+        """Rows currently in the window, oldest first."""
+        if self._count < self.window:
+            return self._buffer[: self._count].copy()
+        return np.roll(self._buffer, -self._pos, axis=0)
+
+    def mean(self) -> np.ndarray:
+        return self._sum / max(self._count, 1)
+
+    def sample(self) -> np.ndarray:
+        if self._count < 2:
+            raise ValueError("Need at least two rows for a sample covariance.")
+        if self.workspace is not None:
+            return self._sample_into(self.workspace.get(SQUARE_A, self._outer.shape, avoid=(self._outer,))).copy()
+        m = self._count
+        mean = self._sum / m
+        cov = (self._outer - m * np.outer(mean, mean)) / (m - 1)
+        return 0.5 * (cov + cov.T)
+
+    def _sample_into(self, out: np.ndarray) -> np.ndarray:
+        m = self._count
+        mean = self._sum / m
+        cov = self.workspace.get(SQUARE_B, out.shape, avoid=(out, self._outer))
+        np.multiply.outer(mean, mean, out=cov)
+        cov *= m
+        np.subtract(self._outer, cov, out=cov)
+        cov /= m - 1
+        np.add(cov, cov.T, out=out)
+        out *= 0.5
+        return out
+
+    def moment(self) -> np.ndarray:
+        """Raw moment behind covariance(); see covariance_from_moment."""
+        if self.method == "ewma":
+            return self._ewma.copy()
+        return self.sample()
+
+    def covariance(self) -> np.ndarray:
+        if self.method == "sample":
+            return self.sample()
+        if self.method == "ewma":
+            return ensure_psd(self._ewma, workspace=self.workspace)
+        if self.workspace is not None:
+            if self._count < 2:
+                raise ValueError("Need at least two rows for a sample covariance.")
+            sample = self._sample_into(self.workspace.get(SQUARE_A, self._outer.shape, avoid=(self._outer,)))
+            return shrink_sample(sample, self.shrinkage, None, self.workspace)
+        return shrink_sample(self.sample(), self.shrinkage, None)
+
+
+class FactorCovariance:
+    """Covariance kept in low-rank-plus-diagonal form B B' + diag(d).
+
+    B holds k factor loadings per asset and d the specific variances. Products,
+    quadratic forms and solves (via the Woodbury identity) cost O(n k) or
+    O(n k^2), so the n x n matrix is never formed unless to_dense() is called.
+    Supports cov @ x and x @ cov like a dense symmetric matrix.
+    """
+
+    # make numpy defer `ndarray @ FactorCovariance` to __rmatmul__
+    __array_ufunc__ = None
+
+    def __init__(self, loadings: np.ndarray, specific: np.ndarray) -> None:
+        self.loadings = np.asarray(loadings, dtype=float)
+        self.specific = np.asarray(specific, dtype=float)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        n = self.specific.shape[0]
+        return (n, n)
+
+    @property
+    def n_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    def diagonal(self) -> np.ndarray:
+        return self.specific + np.einsum("ij,ij->i", self.loadings, self.loadings)
+
+    def to_dense(self) -> np.ndarray:
+        return self.loadings @ self.loadings.T + np.diag(self.specific)
+
+    def submatrix(self, idx: np.ndarray) -> "FactorCovariance":
+        return FactorCovariance(self.loadings[idx], self.specific[idx])
+
+    def quad(self, w: np.ndarray) -> float:
+        f = self.loadings.T @ w
+        return float(f @ f + (self.specific * w) @ w)
+
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        d = self.specific if x.ndim == 1 else self.specific[:, None]
+        return self.loadings @ (self.loadings.T @ x) + d * x
+
+    def __rmatmul__(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 1:
+            return self @ x
+        return (self @ x.T).T
+
+    def __mul__(self, scalar: float) -> "FactorCovariance":
+        scalar = float(scalar)
+        if scalar < 0:
+            raise ValueError("FactorCovariance can only be scaled by a non-negative number.")
+        return FactorCovariance(self.loadings * np.sqrt(scalar), self.specific * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar: float) -> "FactorCovariance":
+        return self * (1.0 / float(scalar))
+
+    def solve(self, b: np.ndarray, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """Solve Σ_II x = b on the index subset idx (all assets by default)."""
+        B = self.loadings if idx is None else self.loadings[idx]
+        d = self.specific if idx is None else self.specific[idx]
+        b = np.asarray(b, dtype=float)
+        d_inv = 1.0 / d if b.ndim == 1 else (1.0 / d)[:, None]
+        scaled_b = d_inv * b
+        scaled_B = B / d[:, None]
+        capacitance = np.eye(B.shape[1]) + B.T @ scaled_B
+        return scaled_b - scaled_B @ np.linalg.solve(capacitance, B.T @ scaled_b)
+
+
+def factor_covariance(returns: pd.DataFrame, n_factors: int = 5, epsilon: float = 1e-10) -> FactorCovariance:
+    """Statistical (PCA) factor covariance from the leading singular vectors of the window.
+
+    Uses a thin SVD of the demeaned T x n window, so the n x n sample
+    covariance is never formed. Specific variances are what the factors leave
+    of each asset's sample variance, floored at epsilon.
+    """
+    data = np.asarray(returns, dtype=float)
+    t_obs = data.shape[0]
+    centred = (data - data.mean(axis=0)) / np.sqrt(max(t_obs - 1, 1))
+    _, sing, vt = np.linalg.svd(centred, full_matrices=False)
+    k = min(n_factors, len(sing))
+    loadings = vt[:k].T * sing[:k]
+    sample_var = np.einsum("ij,ij->j", centred, centred)
+    specific = np.maximum(sample_var - np.einsum("ij,ij->i", loadings, loadings), epsilon)
+    return FactorCovariance(loadings, specific)
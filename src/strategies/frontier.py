@@ -0,0 +1,190 @@
+"""Long-only efficient frontier of the mean-variance problem along its whole gamma path.
+
+With t = 1 / gamma the optimum of max mu'w - gamma / 2 w'Σw over the simplex
+is piecewise linear in t: on a fixed set of held assets it is a + t b, and
+it only bends where an asset drops to zero or a new one becomes worth
+buying. efficient_frontier follows that path from the minimum-variance
+portfolio (t = 0) through every such corner, so the full frontier costs one
+active-set solve plus one small linear solve per corner, and any number of
+gammas are read off the segments. Should the path break down numerically,
+the gammas are solved one by one with warm-started active-set calls instead.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.covariance import CovarianceMatrix, FactorCovariance
+from src.strategies.qp import solve_simplex_qp
+from src.utils.profiling import record
+
+DEFAULT_FRONTIER_GAMMAS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+
+Covariance = Union[np.ndarray, FactorCovariance]
+
+
+@dataclass
+class Frontier:
+    """Frontier portfolios, one row per gamma; returns and vols are per period of the inputs."""
+
+    gammas: np.ndarray
+    weights: np.ndarray
+    expected_returns: np.ndarray
+    volatilities: np.ndarray
+
+
+@dataclass
+class FrontierHistory:
+    """Frontiers on the same gamma grid at every rebalance, stacked along the first axis."""
+
+    dates: pd.Index
+    columns: pd.Index
+    gammas: np.ndarray
+    weights: np.ndarray
+    expected_returns: np.ndarray
+    volatilities: np.ndarray
+
+    def at(self, date) -> Frontier:
+        k = self.dates.get_loc(date)
+        return Frontier(self.gammas, self.weights[k], self.expected_returns[k], self.volatilities[k])
+
+    def summary(self) -> pd.DataFrame:
+        """Expected return and volatility per rebalance and gamma, in long form."""
+        k, g = self.expected_returns.shape
+        return pd.DataFrame(
+            {
+                "expected_return": self.expected_returns.ravel(),
+                "volatility": self.volatilities.ravel(),
+            },
+            index=pd.MultiIndex.from_product([self.dates, self.gammas], names=["date", "gamma"]),
+        )
+
+
+def _free_solution(cov: Covariance, mu: np.ndarray, idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """a, b, nu_a, nu_b with w_F = a + t b and nu = nu_a + t nu_b on the free set idx."""
+    rhs = np.column_stack([mu[idx], np.ones(len(idx))])
+    sol = None
+    if isinstance(cov, FactorCovariance):
+        sol = cov.solve(rhs, idx)
+    elif isinstance(cov, CovarianceMatrix):
+        try:
+            sol = cov.solve(rhs, idx)
+        except np.linalg.LinAlgError:
+            pass
+    if sol is None:
+        block = cov[np.ix_(idx, idx)]
+        try:
+            sol = np.linalg.solve(block, rhs)
+        except np.linalg.LinAlgError:
+            sol = np.linalg.lstsq(block, rhs, rcond=None)[0]
+    g, h = sol[:, 0], sol[:, 1]
+    s_g, s_h = g.sum(), h.sum()
+    return h / s_h, g - (s_g / s_h) * h, -1.0 / s_h, s_g / s_h
+
+
+def frontier_segments(
+    mu: np.ndarray,
+    cov: Covariance,
+    tol: float = 1e-10,
+    max_corners: Optional[int] = None,
+) -> Optional[List[Tuple[float, np.ndarray, np.ndarray]]]:
+    """Linear pieces (t_start, a, b) of the optimal weights a + t b, t = 1 / gamma.
+
+    Each piece holds from its t_start to the next one's; the last holds for
+    all larger t. Returns None if the path cannot be followed reliably
+    (degenerate ties or an ill-conditioned free block).
+    """
+    mu = np.asarray(mu, dtype=float)
+    n = len(mu)
+    if max_corners is None:
+        max_corners = 4 * n + 10
+    start = solve_simplex_qp(cov, w0=None)
+    if not start.converged:
+        return None
+    free = start.weights > tol
+    segments = []
+    t = 0.0
+    for _ in range(max_corners):
+        idx = np.flatnonzero(free)
+        a, b, nu_a, nu_b = _free_solution(cov, mu, idx)
+        a_full, b_full = np.zeros(n), np.zeros(n)
+        a_full[idx], b_full[idx] = a, b
+        w_now = a + t * b
+        if not np.isfinite(w_now).all() or np.any(w_now < -1e-6):
+            return None
+        segments.append((t, a_full, b_full))
+
+        # multipliers of the assets at zero: p + t q, must stay >= 0
+        bound = np.flatnonzero(~free)
+        p = (cov @ a_full)[bound] + nu_a
+        q = (cov @ b_full)[bound] - mu[bound] + nu_b
+        scale = max(float(np.abs(b).max(initial=0.0)), float(np.abs(q).max(initial=0.0)), tol)
+        t_next, event = np.inf, None
+        falling = b < -tol * scale
+        if falling.any():
+            hits = -a[falling] / b[falling]
+            k = int(np.argmin(hits))
+            t_next, event = max(hits[k], t), ("leave", idx[falling][k])
+        entering = q < -tol * scale
+        if entering.any():
+            hits = -p[entering] / q[entering]
+            k = int(np.argmin(hits))
+            if max(hits[k], t) < t_next:
+                t_next, event = max(hits[k], t), ("enter", bound[entering][k])
+        if event is None:
+            record("frontier.corners", len(segments))
+            return segments
+        kind, j = event
+        if kind == "leave" and free.sum() == 1:
+            return None
+        free[j] = kind == "enter"
+        t = t_next
+    return None
+
+
+def _evaluate(segments: List[Tuple[float, np.ndarray, np.ndarray]], t: float) -> np.ndarray:
+    starts = [s[0] for s in segments]
+    k = int(np.searchsorted(starts, t, side="right")) - 1
+    _, a, b = segments[max(k, 0)]
+    w = np.maximum(a + t * b, 0.0)
+    return w / w.sum()
+
+
+def efficient_frontier(
+    mu: np.ndarray,
+    cov: Covariance,
+    gammas: Optional[Sequence[float]] = DEFAULT_FRONTIER_GAMMAS,
+) -> Frontier:
+    """Long-only mean-variance optima for every gamma in gammas, from one path.
+
+    Rows match mean_variance_weights(mu, cov, gamma, solver="active_set").
+    With gammas=None the corner portfolios are returned instead: every
+    frontier portfolio is a mix of two adjacent corners, the first (gamma
+    inf) being the minimum-variance portfolio.
+    """
+    mu = np.asarray(mu, dtype=float)
+    segments = frontier_segments(mu, cov)
+    if gammas is None:
+        if segments is None:
+            raise ValueError("Could not trace the frontier corners for this mean and covariance.")
+        t_grid = np.array([s[0] for s in segments])
+        weights = np.array([_evaluate(segments, t) for t in t_grid])
+        with np.errstate(divide="ignore"):
+            gamma_arr = 1.0 / t_grid
+    else:
+        gamma_arr = np.asarray(gammas, dtype=float)
+        if np.any(gamma_arr <= 0):
+            raise ValueError("gammas must be positive.")
+        if segments is not None:
+            weights = np.array([_evaluate(segments, 1.0 / g) for g in gamma_arr])
+        else:
+            # continuation: each gamma warm-starts from its neighbour's support
+            weights = np.zeros((len(gamma_arr), len(mu)))
+            w_prev = None
+            for k in np.argsort(-gamma_arr):
+                w_prev = solve_simplex_qp(gamma_arr[k] * cov, mu, w0=w_prev).weights
+                weights[k] = w_prev
+    variances = np.array([float(w @ (cov @ w)) for w in weights])
+    return Frontier(gamma_arr, weights, weights @ mu, np.sqrt(np.maximum(variances, 0.0)))
@@ -0,0 +1,222 @@
+"""Stateful rebalancing engine for appending one bar at a time.
+
+OnlineRebalancer follows the same schedule, allocators and accounting as
+run_backtest, but keeps the rolling covariance state, the current window,
+the weights in force and the return/turnover history between calls, so a
+new daily bar costs one O(n^2) moment update (plus the allocators on
+rebalance days) instead of a rerun over the full history. The state can be
+checkpointed to disk with save() and restored with load().
+"""
+
+import os
+import pickle
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import ACCOUNTING_MODES, REB_FREQ, get_covariance
+from src.strategies.covariance import RollingCovariance
+from src.strategies.registry import RebalanceContext, resolve_strategies
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
+
+
+@dataclass
+class OnlineStep:
+    index: int
+    date: Optional[Hashable]
+    returns: Optional[Dict[str, float]]
+    turnover: Optional[Dict[str, float]]
+    weights: Dict[str, np.ndarray]
+    rebalanced: bool
+
+
+class OnlineRebalancer:
+    """Incremental counterpart of run_backtest.
+
+    push(row) books the day's portfolio returns with the weights in force
+    (row indices >= window, as in run_backtest's output) and, when the next
+    row index is on the rebalance schedule, solves the allocators on the
+    latest window. The returned OnlineStep.weights are the targets to hold
+    from the next bar on. Feeding the rows of a panel one by one reproduces
+    run_backtest on that panel up to floating-point error.
+    """
+
+    def __init__(
+        self,
+        assets: Sequence[Hashable],
+        window: int = 252,
+        rebalance: str = "monthly",
+        tc_bps: float = 5.0,
+        gamma: float = 10.0,
+        cov_method: str = "shrinkage",
+        target_vol: float = 0.10,
+        lmax: float = 1.5,
+        solver: str = "slsqp",
+        strategies: Optional[Sequence[str]] = None,
+        accounting: str = "drift",
+    ) -> None:
+        if window < 1:
+            raise ValueError("window must be positive.")
+        if accounting not in ACCOUNTING_MODES:
+            raise ValueError(f"Unknown accounting mode: {accounting}")
+        self.assets = list(assets)
+        self.window = window
+        self.rebalance = rebalance
+        self.tc = tc_bps / 10000.0
+        self.cov_method = cov_method
+        self.target_vol = target_vol
+        self.accounting = accounting
+        self.params = {"gamma": gamma, "target_vol": target_vol, "lmax": lmax, "solver": solver, "cov_method": cov_method}
+        # names only, so checkpoints do not pickle the allocator functions
+        self.strategies = [spec.name for spec in resolve_strategies(strategies)]
+        step = REB_FREQ.get(rebalance, REB_FREQ["monthly"])
+        self._step = step
+        self._first_rebalance = max(window, step)
+
+        n_assets = len(self.assets)
+        self._buffer = np.zeros((window, n_assets))
+        self._n_seen = 0
+        self._rolling: Optional[RollingCovariance] = None
+        if window >= 2 and cov_method.lower() in RollingCovariance.METHODS:
+            self._rolling = RollingCovariance(n_assets, window, method=cov_method)
+        self._rolling_stale = False
+
+        self.weights: Dict[str, np.ndarray] = {name: np.zeros(n_assets) for name in self.strategies}
+        # book as fractions of current value; drifts with returns under drift accounting
+        self.holdings: Dict[str, np.ndarray] = {name: np.zeros(n_assets) for name in self.strategies}
+        self.prev_weights: Dict[str, np.ndarray] = {}
+        self.last_rebalance: Optional[int] = None
+        self._pending_turnover: Dict[str, float] = {name: 0.0 for name in self.strategies}
+        self._dates: List[Hashable] = []
+        self._returns: List[List[float]] = []
+        self._turnover: List[List[float]] = []
+
+    @property
+    def n_seen(self) -> int:
+        return self._n_seen
+
+    def window_values(self) -> np.ndarray:
+        """The last window rows, oldest first (fewer before the window fills)."""
+        if self._n_seen < self.window:
+            return self._buffer[: self._n_seen].copy()
+        return np.roll(self._buffer, -(self._n_seen % self.window), axis=0)
+
+    def is_rebalance(self, i: int) -> bool:
+        """Whether run_backtest rebalances at row index i."""
+        return i >= self._first_rebalance and (i - self._first_rebalance) % self._step == 0
+
+    def push(self, row: np.ndarray, date: Optional[Hashable] = None) -> OnlineStep:
+        x = np.asarray(row, dtype=float)
+        if x.shape != (len(self.assets),):
+            raise ValueError(f"Expected a row of {len(self.assets)} returns, got shape {x.shape}.")
+        t = self._n_seen
+
+        day_returns = day_turnover = None
+        if t >= self.window:
+            day_returns, day_turnover = {}, {}
+            finite = bool(np.isfinite(x).all())
+            clean = x if finite else np.nan_to_num(x)
+            for name in self.strategies:
+                turnover = self._pending_turnover[name]
+                held = self.holdings[name]
+                gross = float(held @ clean)
+                day_returns[name] = (gross if finite else np.nan) - self.tc * turnover
+                day_turnover[name] = turnover
+                self._pending_turnover[name] = 0.0
+                if self.accounting == "drift":
+                    self.holdings[name] = held * (1.0 + clean) / (1.0 + gross)
+            self._dates.append(t if date is None else date)
+            self._returns.append([day_returns[name] for name in self.strategies])
+            self._turnover.append([day_turnover[name] for name in self.strategies])
+
+        self._buffer[t % self.window] = x
+        self._n_seen = t + 1
+        if self._rolling is not None:
+            if not np.isfinite(x).all():
+                self._rolling_stale = True
+            elif not self._rolling_stale:
+                self._rolling.push(x)
+
+        rebalanced = self.is_rebalance(self._n_seen)
+        if rebalanced:
+            self._rebalance()
+        return OnlineStep(t, date, day_returns, day_turnover, self.weights, rebalanced)
+
+    def update(self, returns: pd.DataFrame) -> Optional[OnlineStep]:
+        """Push every row of a frame in order; returns the last step."""
+        if list(returns.columns) != self.assets:
+            raise ValueError("Columns do not match the engine's assets.")
+        last = None
+        for date, row in zip(returns.index, returns.to_numpy(dtype=float)):
+            last = self.push(row, date)
+        return last
+
+    def _covariance(self, window_vals: np.ndarray) -> np.ndarray:
+        with timed("covariance", method=self.cov_method):
+            finite = bool(np.isfinite(window_vals).all())
+            if self._rolling is None or not finite:
+                return get_covariance(pd.DataFrame(window_vals), method=self.cov_method)
+            if self._rolling_stale:
+                # a non-finite row has left the window; rebuild the running sums
+                self._rolling.reset()
+                self._rolling.update(window_vals)
+                self._rolling_stale = False
+            return self._rolling.covariance()
+
+    @staticmethod
+    def _mean(window_vals: np.ndarray) -> np.ndarray:
+        if np.isfinite(window_vals).all():
+            return window_vals.mean(axis=0)
+        return pd.DataFrame(window_vals).mean().values
+
+    def _rebalance(self) -> None:
+        window_vals = self.window_values()
+        ctx = RebalanceContext(
+            window_vals,
+            partial(self._covariance, window_vals),
+            partial(self._mean, window_vals),
+            self.params,
+            self.prev_weights,
+        )
+        new_weights = {}
+        for spec in resolve_strategies(self.strategies):
+            with timed(f"allocator.{spec.name}"):
+                new_weights[spec.name] = np.asarray(spec.func(ctx), dtype=float)
+        for name in self.strategies:
+            self._pending_turnover[name] = float(np.abs(new_weights[name] - self.holdings[name]).sum())
+        self.weights = new_weights
+        self.holdings = dict(new_weights)
+        self.prev_weights = new_weights
+        self.last_rebalance = self._n_seen
+
+    def history(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Accumulated daily portfolio returns and turnover, one column per strategy."""
+        returns = pd.DataFrame(self._returns, index=self._dates, columns=self.strategies, dtype=float)
+        turnover = pd.DataFrame(self._turnover, index=self._dates, columns=self.strategies, dtype=float)
+        return returns, turnover
+
+    def metrics(self) -> pd.DataFrame:
+        returns, turnover = self.history()
+        return compute_metrics_table(returns, turnover, self.target_vol)
+
+    def save(self, path: str) -> None:
+        """Checkpoint the full engine state; the file is replaced atomically."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+
+    @classmethod
+    def load(cls, path: str) -> "OnlineRebalancer":
+        with open(path, "rb") as fh:
+            engine = pickle.load(fh)
+        if not isinstance(engine, cls):
+            raise ValueError(f"{path} does not hold an {cls.__name__} checkpoint.")
+        return engine
@@ -0,0 +1,223 @@
+"""Backtests over return panels read from disk in chunks.
+
+run_backtest_mmap runs the strategies of run_backtest over a panel in the
+npy cache layout of src.data.loader.save_frame, memory-mapped read-only.
+The panel is read front to back once: iter_windows serves the estimation
+windows from a buffer holding the last window rows plus one chunk, and the
+daily returns and turnover of each chunk are accounted and written straight
+into .npy files under out_dir (the layout of src.strategies.storage). Peak
+memory is therefore bounded by the window and chunk sizes (times the number
+of assets), not by the length of the history. The result is reopened
+memory-mapped with storage.open_backtest.
+"""
+
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.loader import open_panel
+from src.strategies.backtest import (
+    ACCOUNTING_MODES,
+    BacktestResult,
+    account_rebalances,
+    get_covariance,
+    rebalance_schedule,
+)
+from src.strategies.cache import ResultCache, content_key
+from src.strategies.covariance import RollingCovariance
+from src.strategies.registry import RebalanceContext, resolve_strategies
+from src.strategies.storage import create_array, open_backtest, write_meta
+from src.strategies.weights import drifted_book
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
+
+DEFAULT_CHUNK_ROWS = 4096
+
+
+def iter_windows(
+    values: np.ndarray,
+    window: int,
+    points: Iterable[int],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (i, values[i - window : i]) for increasing row indices i.
+
+    values is read in blocks of at least chunk_rows rows and only the rows a
+    later window can still need are kept, so a memory map larger than RAM is
+    never loaded whole. The yielded window is a view into the buffer and is
+    only valid until the next one is requested.
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be positive.")
+    buf = np.empty((0, values.shape[1]))
+    buf_start = 0  # row index of buf[0]
+    last = -1
+    for i in points:
+        i = int(i)
+        if i < window or i > len(values) or i <= last:
+            raise ValueError("Window end points must be increasing and within the panel.")
+        last = i
+        end = buf_start + len(buf)
+        if end < i:
+            lo = i - window
+            keep = buf[max(lo - buf_start, 0) :]
+            read_from = max(end, lo)
+            stop = min(len(values), max(i, end + chunk_rows))
+            buf = np.concatenate([keep, np.asarray(values[read_from:stop], dtype=float)])
+            buf_start = read_from - len(keep)
+        yield i, buf[i - window - buf_start : i - buf_start]
+
+
+def run_backtest_mmap(
+    source: str,
+    out_dir: str,
+    window: int = 252,
+    rebalance: str = "monthly",
+    tc_bps: float = 5.0,
+    gamma: float = 10.0,
+    cov_method: str = "shrinkage",
+    target_vol: float = 0.10,
+    lmax: float = 1.5,
+    solver: str = "slsqp",
+    strategies: Optional[Sequence[str]] = None,
+    cache: Optional[ResultCache] = None,
+    accounting: str = "drift",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> BacktestResult:
+    """run_backtest over the npy cache at source, writing the result under out_dir.
+
+    source follows the loader's convention (the cache path with or without
+    its suffix). Rows are accounted chunk_rows at a time with the book
+    carried over between chunks, so the result matches run_backtest on the
+    same panel up to floating-point error. Returns, turnover and rebalance
+    events are written to out_dir as they are produced and the returned
+    result maps them read-only; only the metrics table is built in memory.
+    """
+    if accounting not in ACCOUNTING_MODES:
+        raise ValueError(f"Unknown accounting mode: {accounting}")
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be positive.")
+    values, index, columns = open_panel(source)
+    n_obs, n_assets = values.shape
+    if n_obs <= window:
+        raise ValueError("Not enough data for the chosen window length.")
+    tc = tc_bps / 10000.0
+    specs = resolve_strategies(strategies)
+    names = [spec.name for spec in specs]
+    reb_idx = rebalance_schedule(n_obs, window, rebalance)
+    params = {"gamma": gamma, "target_vol": target_vol, "lmax": lmax, "solver": solver, "cov_method": cov_method}
+
+    target = Path(out_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    n_out = n_obs - window
+    out = {
+        "returns": create_array(target / "returns.npy", (n_out, len(names))),
+        "turnover": create_array(target / "turnover.npy", (n_out, len(names))),
+        "index": create_array(target / "index.npy", (n_out,), index.dtype),
+        "offsets": create_array(target / "offsets.npy", (len(reb_idx),), np.intp),
+        "events": create_array(target / "events.npy", (len(names), len(reb_idx), n_assets)),
+        "before": create_array(target / "before.npy", (len(names), len(reb_idx), n_assets)),
+    }
+    out["offsets"][:] = reb_idx - window
+    if accounting == "drift":
+        out["growth"] = create_array(target / "growth.npy", (n_out, n_assets))
+    elif (target / "growth.npy").exists():
+        (target / "growth.npy").unlink()
+
+    rolling = None
+    if window >= 2 and cov_method.lower() in RollingCovariance.METHODS:
+        rolling = RollingCovariance(n_assets, window, method=cov_method)
+    rolled_to = -window  # the rolling state holds the finite rows before this index
+
+    def estimate_cov(i: int, window_vals: np.ndarray) -> np.ndarray:
+        nonlocal rolled_to
+        with timed("covariance", method=cov_method):
+            if rolling is None or not np.isfinite(window_vals).all():
+                return get_covariance(pd.DataFrame(window_vals), method=cov_method)
+            if i - rolled_to >= window:
+                rolling.reset()
+                rolling.update(window_vals)
+            else:
+                rolling.update(window_vals[rolled_to - i :])
+            rolled_to = i
+            return rolling.covariance()
+
+    def cov_at(i: int, window_vals: np.ndarray) -> np.ndarray:
+        if cache is None:
+            return estimate_cov(i, window_vals)
+        key = content_key("covariance", window_vals, cov_method.lower())
+        return cache.get_or_compute(key, partial(estimate_cov, i, window_vals))
+
+    def mu_at(window_vals: np.ndarray) -> np.ndarray:
+        if np.isfinite(window_vals).all():
+            return window_vals.mean(axis=0)
+        return pd.DataFrame(window_vals).mean().values
+
+    windows = iter_windows(values, window, reb_idx, chunk_rows)
+    prev_weights: Dict[str, np.ndarray] = {}
+    book: Optional[Dict[str, np.ndarray]] = None
+    # asset growth from the event in force through the close before the chunk
+    carry: Optional[np.ndarray] = None
+    k0 = 0
+    for c0 in range(window, n_obs, chunk_rows):
+        c1 = min(c0 + chunk_rows, n_obs)
+        in_chunk = reb_idx[(reb_idx >= c0) & (reb_idx < c1)]
+        events = {name: np.empty((len(in_chunk), n_assets)) for name in names}
+        for k in range(len(in_chunk)):
+            i, window_vals = next(windows)
+            ctx = RebalanceContext(window_vals, partial(cov_at, i, window_vals), partial(mu_at, window_vals), params, prev_weights, cache=cache)
+            new_weights = {}
+            for spec in specs:
+                with timed(f"allocator.{spec.name}"):
+                    new_weights[spec.name] = np.asarray(spec.func(ctx), dtype=float)
+            for name in names:
+                events[name][k] = new_weights[name]
+            prev_weights = new_weights
+
+        chunk = np.asarray(values[c0:c1], dtype=float)
+        with timed("accounting", rows=c1 - c0):
+            returns_hist, turnover_hist, before, growth = account_rebalances(chunk, in_chunk - c0, events, tc, accounting, initial=book)
+        rows = slice(c0 - window, c1 - window)
+        if growth is not None:
+            # rows ahead of the chunk's first event continue the previous chunk's segment
+            if carry is not None:
+                growth[: int(in_chunk[0]) - c0 if len(in_chunk) else c1 - c0] *= carry
+            out["growth"][rows] = growth
+        k1 = k0 + len(in_chunk)
+        for s, name in enumerate(names):
+            out["returns"][rows, s] = returns_hist[name]
+            out["turnover"][rows, s] = turnover_hist[name]
+            out["events"][s, k0:k1] = events[name]
+            out["before"][s, k0:k1] = before[name]
+        out["index"][rows] = index[c0:c1]
+        k0 = k1
+
+        # book carried into the next chunk
+        if len(in_chunk):
+            start, held = int(in_chunk[-1]) - c0, {name: events[name][-1] for name in names}
+        elif book is not None:
+            start, held = 0, book
+        else:
+            start, held = 0, None
+        if held is not None and accounting == "drift":
+            growth = np.prod(1.0 + np.nan_to_num(chunk[start:]), axis=0)
+            held = {name: drifted_book(w, growth) for name, w in held.items()}
+            carry = growth if len(in_chunk) else carry * growth
+        book = held
+        for array in out.values():
+            array.flush()
+
+    with timed("metrics"):
+        index_out = pd.Index(out["index"])
+        metrics = compute_metrics_table(
+            pd.DataFrame(out["returns"], index=index_out, columns=names, copy=False),
+            pd.DataFrame(out["turnover"], index=index_out, columns=names, copy=False),
+            target_vol,
+        )
+    del out
+    params.update(accounting=accounting, tc_bps=tc_bps, window=window, rebalance=rebalance)
+    write_meta(str(target), names, columns, metrics, params)
+    return open_backtest(str(target))
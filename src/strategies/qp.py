@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from src.strategies.covariance import CovarianceMatrix, FactorCovariance
+from src.strategies.workspace import SQUARE_B, Workspace
+
+
+@dataclass
+class QPResult:
+    weights: np.ndarray
+    iterations: int
+    converged: bool
+    status: str
+
+
+def _solve_kkt(Q_ff: np.ndarray, c_f: np.ndarray) -> np.ndarray:
+    """Minimise 0.5 x'Qx - c'x subject to sum(x) = 1 on the free block."""
+    m = Q_ff.shape[0]
+    kkt = np.empty((m + 1, m + 1))
+    kkt[:m, :m] = Q_ff
+    kkt[:m, m] = 1.0
+    kkt[m, :m] = 1.0
+    kkt[m, m] = 0.0
+    rhs = np.append(c_f, 1.0)
+    try:
+        sol = np.linalg.solve(kkt, rhs)
+    except np.linalg.LinAlgError:
+        sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+    return sol
+
+
+def _solve_free(Q: Union[np.ndarray, FactorCovariance], idx: np.ndarray, c_f: np.ndarray) -> np.ndarray:
+    if isinstance(Q, (FactorCovariance, CovarianceMatrix)):
+        # solves on the free block with Q's own factorization, then eliminate the budget multiplier
+        try:
+            sol = Q.solve(np.column_stack([c_f, np.ones(len(idx))]), idx)
+        except np.linalg.LinAlgError:
+            return _solve_kkt(Q[np.ix_(idx, idx)], c_f)
+        a, b = sol[:, 0], sol[:, 1]
+        nu = (a.sum() - 1.0) / b.sum()
+        return np.append(a - nu * b, nu)
+    return _solve_kkt(Q[np.ix_(idx, idx)], c_f)
+
+
+def solve_simplex_qp(
+    Q: Union[np.ndarray, FactorCovariance],
+    c: Optional[np.ndarray] = None,
+    w0: Optional[np.ndarray] = None,
+    max_iter: Optional[int] = None,
+    tol: float = 1e-10,
+    workspace: Optional[Workspace] = None,
+) -> QPResult:
+    """Primal active-set solver for min 0.5 w'Qw - c'w s.t. sum(w) = 1, w >= 0.
+
+    Each iteration solves the equality-constrained problem on the current free
+    set and either steps to it (then frees the asset with the most negative
+    multiplier) or stops at the first bound it hits. Passing the previous
+    solution as w0 starts from its support, so when the active set has not
+    changed the solve finishes in a single iteration. Q may be a
+    FactorCovariance, in which case the free-set systems are solved with the
+    Woodbury identity, or a CovarianceMatrix, whose factorization they reuse.
+    A workspace holds the rescaled dense Q in its SQUARE_B buffer, which Q
+    itself must not overlap.
+    """
+    n = Q.shape[0]
+    scale = float(np.max(np.abs(Q.diagonal()))) or 1.0
+    if isinstance(Q, CovarianceMatrix):
+        Q = Q.scaled(1.0 / scale, out=None if workspace is None else workspace.get(SQUARE_B, Q.shape, avoid=(Q,)))
+    elif workspace is not None and isinstance(Q, np.ndarray):
+        Q = np.divide(Q, scale, out=workspace.get(SQUARE_B, Q.shape, avoid=(Q,)))
+    else:
+        Q = Q / scale
+    c = np.zeros(n) if c is None else np.asarray(c, dtype=float) / scale
+    if max_iter is None:
+        max_iter = 10 * n + 50
+
+    w = None if w0 is None else np.maximum(np.asarray(w0, dtype=float), 0.0)
+    if w is None or not np.isfinite(w).all() or w.sum() <= 0:
+        w = np.ones(n) / n
+    else:
+        w = w / w.sum()
+    free = w > 0
+
+    for it in range(1, max_iter + 1):
+        idx = np.flatnonzero(free)
+        sol = _solve_free(Q, idx, c[idx])
+        x, nu = sol[:-1], sol[-1]
+        step = x - w[idx]
+        blocking = step < -tol
+        if not np.any(x[blocking] < 0):
+            w[idx] = np.maximum(x, 0.0)
+            grad = Q @ w - c
+            lam = grad + nu
+            lam[free] = 0.0
+            j = int(np.argmin(lam))
+            if lam[j] >= -tol:
+                return QPResult(weights=w / w.sum(), iterations=it, converged=True, status="optimal")
+            free[j] = True
+            continue
+        ratios = np.full(len(idx), np.inf)
+        ratios[blocking] = w[idx][blocking] / -step[blocking]
+        k = int(np.argmin(ratios))
+        alpha = min(ratios[k], 1.0)
+        w[idx] = w[idx] + alpha * step
+        w[idx[k]] = 0.0
+        w[w < tol] = 0.0
+        free = w > 0
+    w = np.maximum(w, 0.0)
+    return QPResult(weights=w / w.sum(), iterations=max_iter, converged=False, status="max_iter")
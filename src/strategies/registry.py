@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.strategies.allocations import (
+    apply_vol_targeting,
+    equal_weight,
+    mean_variance_weights,
+    min_variance_weights,
+    risk_parity_weights,
+)
+from src.strategies.cache import ResultCache
+from src.strategies.workspace import Workspace
+
+DEFAULT_STRATEGIES = ("equal_weight", "min_variance", "mean_variance", "risk_parity", "vol_target")
+
+
+class RebalanceContext:
+    """Inputs shared by every strategy at one rebalance.
+
+    The covariance and mean are computed on first access and then reused, so
+    a run that only asks for strategies without a covariance never builds one.
+    With a ResultCache attached, memo() reuses allocator outputs across runs.
+    A Workspace, when given, lends allocators scratch buffers that persist
+    across rebalances.
+    """
+
+    def __init__(
+        self,
+        window_returns: np.ndarray,
+        cov_fn: Callable[[], np.ndarray],
+        mu_fn: Callable[[], np.ndarray],
+        params: Dict[str, object],
+        prev_weights: Optional[Dict[str, np.ndarray]] = None,
+        cache: Optional[ResultCache] = None,
+        workspace: Optional[Workspace] = None,
+    ) -> None:
+        self.window_returns = window_returns
+        self.params = params
+        self.prev_weights = prev_weights or {}
+        self.cache = cache
+        self.workspace = workspace
+        self._cov_fn = cov_fn
+        self._mu_fn = mu_fn
+        self._cov: Optional[np.ndarray] = None
+        self._mu: Optional[np.ndarray] = None
+
+    @property
+    def n_assets(self) -> int:
+        return self.window_returns.shape[1]
+
+    @property
+    def cov(self) -> np.ndarray:
+        if self._cov is None:
+            self._cov = self._cov_fn()
+        return self._cov
+
+    @property
+    def mu(self) -> np.ndarray:
+        if self._mu is None:
+            self._mu = self._mu_fn()
+        return self._mu
+
+    def memo(self, fn: Callable[..., np.ndarray], *args, ignore: Sequence[str] = (), **kwargs) -> np.ndarray:
+        """fn(*args, **kwargs), looked up in the attached cache by content when there is one."""
+        if self.cache is None:
+            return fn(*args, **kwargs)
+        return self.cache.call(fn, *args, ignore=ignore, **kwargs)
+
+    def warm_start(self, name: str) -> Optional[np.ndarray]:
+        """Previous weights of a strategy when the QP backend can use them."""
+        if self.params.get("solver", "slsqp") == "slsqp":
+            return None
+        return self.prev_weights.get(name)
+
+
+StrategyFn = Callable[[RebalanceContext], np.ndarray]
+
+
+@dataclass
+class StrategySpec:
+    name: str
+    func: StrategyFn
+
+
+_REGISTRY: Dict[str, StrategySpec] = {}
+
+
+def register_strategy(name: str, func: Optional[StrategyFn] = None, overwrite: bool = False):
+    """Register an allocator under name; usable directly or as a decorator.
+
+    The allocator receives a RebalanceContext and returns the weight vector to
+    hold until the next rebalance.
+    """
+
+    def decorator(fn: StrategyFn) -> StrategyFn:
+        if name in _REGISTRY and not overwrite:
+            raise ValueError(f"Strategy already registered: {name}")
+        _REGISTRY[name] = StrategySpec(name=name, func=fn)
+        return fn
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def unregister_strategy(name: str) -> None:
+    _REGISTRY.pop(name, None)
+
+
+def get_strategy(name: str) -> StrategySpec:
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown strategy: {name}")
+    return _REGISTRY[name]
+
+
+def available_strategies() -> List[str]:
+    return list(_REGISTRY)
+
+
+def resolve_strategies(names: Optional[Sequence[str]] = None) -> List[StrategySpec]:
+    if names is None:
+        names = DEFAULT_STRATEGIES
+    if not names:
+        raise ValueError("At least one strategy is required.")
+    return [get_strategy(name) for name in dict.fromkeys(names)]
+
+
+@register_strategy("equal_weight")
+def _equal_weight(ctx: RebalanceContext) -> np.ndarray:
+    return equal_weight(ctx.n_assets)
+
+
+@register_strategy("min_variance")
+def _min_variance(ctx: RebalanceContext) -> np.ndarray:
+    # a warm start only changes how fast the unique optimum is found, not the result
+    return ctx.memo(
+        min_variance_weights,
+        ctx.cov,
+        solver=ctx.params["solver"],
+        w0=ctx.warm_start("min_variance"),
+        workspace=ctx.workspace,
+        ignore=("w0", "workspace"),
+    )
+
+
+@register_strategy("mean_variance")
+def _mean_variance(ctx: RebalanceContext) -> np.ndarray:
+    return ctx.memo(
+        mean_variance_weights,
+        ctx.mu,
+        ctx.cov,
+        gamma=ctx.params["gamma"],
+        solver=ctx.params["solver"],
+        w0=ctx.warm_start("mean_variance"),
+        workspace=ctx.workspace,
+        ignore=("w0", "workspace"),
+    )
+
+
+@register_strategy("risk_parity")
+def _risk_parity(ctx: RebalanceContext) -> np.ndarray:
+    return ctx.memo(risk_parity_weights, ctx.cov, workspace=ctx.workspace, ignore=("workspace",))
+
+
+@register_strategy("vol_target")
+def _vol_target(ctx: RebalanceContext) -> np.ndarray:
+    ew = equal_weight(ctx.n_assets)
+    vol_info = apply_vol_targeting(ew, ctx.window_returns, target_vol=ctx.params["target_vol"], lmax=ctx.params["lmax"])
+    return vol_info["risky"]
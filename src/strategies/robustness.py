@@ -0,0 +1,349 @@
+"""Strategy robustness across resampled or simulated return paths.
+
+Paths are generated and backtested in batches: at each rebalance the windows
+of every path in the batch are stacked, their covariances estimated in one
+pass, and the allocators run on the whole stack (closed-form or batched
+solvers for the built-ins, a per-path loop over the registry otherwise).
+Daily accounting runs account_rebalances once over the whole stack. Only one
+metrics row per path and strategy is kept; with out_path set the rows are
+appended to a CSV as each batch finishes.
+"""
+
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.allocations import (
+    mean_variance_weights_batch,
+    min_variance_weights_batch,
+    risk_parity_weights_batch,
+)
+from src.strategies.backtest import ACCOUNTING_MODES, account_rebalances, rebalance_schedule
+from src.strategies.covariance import stacked_covariance
+from src.strategies.registry import RebalanceContext, resolve_strategies
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
+
+PATH_METHODS = ("bootstrap", "gaussian")
+BATCH_COV_METHODS = ("sample", "ewma", "shrinkage")
+
+
+def block_bootstrap_paths(
+    values: np.ndarray,
+    rngs: Sequence[np.random.Generator],
+    n_obs: int,
+    block: int = 21,
+) -> np.ndarray:
+    """Moving-block bootstrap of whole rows, one path per generator -> (k, n_obs, n)."""
+    n_rows = values.shape[0]
+    block = min(block, n_rows)
+    n_blocks = -(-n_obs // block)
+    offsets = np.arange(block)
+    idx = np.empty((len(rngs), n_obs), dtype=np.intp)
+    for j, rng in enumerate(rngs):
+        starts = rng.integers(0, n_rows - block + 1, size=n_blocks)
+        idx[j] = (starts[:, None] + offsets).ravel()[:n_obs]
+    return values[idx]
+
+
+def gaussian_paths(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    rngs: Sequence[np.random.Generator],
+    n_obs: int,
+) -> np.ndarray:
+    """Multivariate normal daily returns with the given moments -> (k, n_obs, n)."""
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    root = eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))
+    draws = np.stack([rng.standard_normal((n_obs, len(mu))) for rng in rngs])
+    return mu + draws @ root.T
+
+
+class BatchContext:
+    """RebalanceContext for a stack of paths: arrays carry a leading path axis."""
+
+    def __init__(
+        self,
+        window_returns: np.ndarray,
+        cov_fn: Callable[[], np.ndarray],
+        params: Dict[str, object],
+        prev_weights: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        self.window_returns = window_returns
+        self.params = params
+        self.prev_weights = prev_weights or {}
+        self._cov_fn = cov_fn
+        self._cov: Optional[np.ndarray] = None
+
+    @property
+    def n_paths(self) -> int:
+        return self.window_returns.shape[0]
+
+    @property
+    def n_assets(self) -> int:
+        return self.window_returns.shape[2]
+
+    @property
+    def cov(self) -> np.ndarray:
+        if self._cov is None:
+            self._cov = self._cov_fn()
+        return self._cov
+
+    @property
+    def mu(self) -> np.ndarray:
+        return self.window_returns.mean(axis=1)
+
+
+BatchStrategyFn = Callable[[BatchContext], np.ndarray]
+
+_BATCH_ALLOCATORS: Dict[str, BatchStrategyFn] = {}
+
+
+def register_batch_allocator(name: str, overwrite: bool = False):
+    """Decorator registering a stacked counterpart for a registered strategy."""
+
+    def decorator(fn: BatchStrategyFn) -> BatchStrategyFn:
+        if name in _BATCH_ALLOCATORS and not overwrite:
+            raise ValueError(f"Batch allocator already registered: {name}")
+        _BATCH_ALLOCATORS[name] = fn
+        return fn
+
+    return decorator
+
+
+@register_batch_allocator("equal_weight")
+def _equal_weight_batch(ctx: BatchContext) -> np.ndarray:
+    return np.full((ctx.n_paths, ctx.n_assets), 1.0 / ctx.n_assets)
+
+
+@register_batch_allocator("min_variance")
+def _min_variance_batch(ctx: BatchContext) -> np.ndarray:
+    return min_variance_weights_batch(ctx.cov)
+
+
+@register_batch_allocator("mean_variance")
+def _mean_variance_batch(ctx: BatchContext) -> np.ndarray:
+    return mean_variance_weights_batch(ctx.mu, ctx.cov, gamma=ctx.params["gamma"])
+
+
+@register_batch_allocator("risk_parity")
+def _risk_parity_batch(ctx: BatchContext) -> np.ndarray:
+    weights, converged = risk_parity_weights_batch(ctx.cov, return_info=True)
+    if not converged.all():
+        # give the slow matrices a longer run before refusing to use them
+        slow = np.flatnonzero(~converged)
+        weights[slow], converged[slow] = risk_parity_weights_batch(ctx.cov[slow], max_iter=500, return_info=True)
+    if not converged.all():
+        raise RuntimeError(f"Risk parity did not converge for {int((~converged).sum())} of {len(converged)} paths.")
+    return weights
+
+
+@register_batch_allocator("vol_target")
+def _vol_target_batch(ctx: BatchContext) -> np.ndarray:
+    # apply_vol_targeting on equal weights, for every path at once
+    ew = 1.0 / ctx.n_assets
+    realized_vol = (ctx.window_returns.sum(axis=2) * ew).std(axis=1) * np.sqrt(252)
+    scale = np.minimum(ctx.params["target_vol"] / (realized_vol + 1e-8), ctx.params["lmax"])
+    return np.repeat(scale[:, None] * ew, ctx.n_assets, axis=1)
+
+
+def _path_cov(ctx: BatchContext, j: int) -> np.ndarray:
+    return ctx.cov[j]
+
+
+def _allocate(name: str, ctx: BatchContext, func: Callable) -> np.ndarray:
+    batch_fn = _BATCH_ALLOCATORS.get(name)
+    if batch_fn is not None:
+        return batch_fn(ctx)
+    # no stacked version: run the registered allocator path by path
+    prev = ctx.prev_weights
+    out = np.empty((ctx.n_paths, ctx.n_assets))
+    for j in range(ctx.n_paths):
+        window = ctx.window_returns[j]
+        path_ctx = RebalanceContext(
+            window,
+            partial(_path_cov, ctx, j),
+            partial(window.mean, axis=0),
+            ctx.params,
+            {k: v[j] for k, v in prev.items()},
+        )
+        out[j] = func(path_ctx)
+    return out
+
+
+def backtest_paths(
+    paths: np.ndarray,
+    window: int = 252,
+    rebalance: str = "monthly",
+    tc_bps: float = 5.0,
+    gamma: float = 10.0,
+    cov_method: str = "shrinkage",
+    target_vol: float = 0.10,
+    lmax: float = 1.5,
+    strategies: Optional[Sequence[str]] = None,
+    accounting: str = "drift",
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """run_backtest's schedule and accounting on a stack of paths (k, t, n).
+
+    Returns the strategy names and daily portfolio returns and turnover, each
+    shaped (k, t - window, n_strategies). Mean-variance and minimum-variance
+    weights are the exact optima (as with solver="active_set"), and risk parity
+    uses risk_parity_weights_batch, raising if it does not converge.
+    """
+    paths = np.asarray(paths, dtype=float)
+    n_paths, n_obs, n_assets = paths.shape
+    if n_obs <= window:
+        raise ValueError("Not enough data for the chosen window length.")
+    if cov_method.lower() not in BATCH_COV_METHODS:
+        raise ValueError(f"Unknown covariance estimator for batched paths: {cov_method}")
+    if not np.isfinite(paths).all():
+        raise ValueError("Paths must not contain NaNs.")
+    if accounting not in ACCOUNTING_MODES:
+        raise ValueError(f"Unknown accounting mode: {accounting}")
+    tc = tc_bps / 10000.0
+    specs = resolve_strategies(strategies)
+    names = [spec.name for spec in specs]
+    params = {"gamma": gamma, "target_vol": target_vol, "lmax": lmax, "solver": "active_set", "cov_method": cov_method}
+    reb_idx = rebalance_schedule(n_obs, window, rebalance)
+
+    events = np.zeros((len(names), n_paths, len(reb_idx), n_assets))
+    prev_weights: Dict[str, np.ndarray] = {}
+    for k, i in enumerate(reb_idx):
+        windows = paths[:, i - window : i]
+        ctx = BatchContext(windows, partial(stacked_covariance, windows, cov_method), params, prev_weights)
+        new_weights = {}
+        for spec in specs:
+            with timed(f"allocator.{spec.name}", paths=n_paths):
+                new_weights[spec.name] = _allocate(spec.name, ctx, spec.func)
+        for s, name in enumerate(names):
+            events[s, :, k] = new_weights[name]
+        prev_weights = new_weights
+
+    with timed("accounting", paths=n_paths):
+        returns_hist, turnover_hist, _, _ = account_rebalances(
+            paths[:, window:], reb_idx - window, {name: events[s] for s, name in enumerate(names)}, tc, accounting
+        )
+    returns = np.stack([returns_hist[name] for name in names], axis=-1)
+    turnover = np.stack([turnover_hist[name] for name in names], axis=-1)
+    return names, returns, turnover
+
+
+def summarize_paths(
+    names: Sequence[str],
+    returns: np.ndarray,
+    turnover: np.ndarray,
+    target_vol: float = 0.10,
+    first_path: int = 0,
+) -> pd.DataFrame:
+    """One compute_metrics row per (path, strategy), computed in a single table pass."""
+    n_paths, n_days, n_strategies = returns.shape
+    columns = pd.MultiIndex.from_product([range(first_path, first_path + n_paths), list(names)], names=["path", "strategy"])
+    ret = pd.DataFrame(returns.transpose(1, 0, 2).reshape(n_days, -1), columns=columns)
+    to = pd.DataFrame(turnover.transpose(1, 0, 2).reshape(n_days, -1), columns=columns)
+    table = compute_metrics_table(ret, to, target_vol)
+    table.index = columns
+    return table.reset_index()
+
+
+def iter_path_summaries(
+    returns: pd.DataFrame,
+    n_paths: int = 1000,
+    method: str = "bootstrap",
+    n_obs: Optional[int] = None,
+    block: int = 21,
+    batch_size: int = 100,
+    seed: int = 0,
+    **backtest_kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Yield the metrics of each batch of generated paths as it is finished.
+
+    Every path draws from its own child seed, so a path's draws do not depend
+    on batch_size.
+    """
+    if method not in PATH_METHODS:
+        raise ValueError(f"Unknown path method: {method}")
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive.")
+    values = returns.to_numpy(dtype=float)
+    if not np.isfinite(values).all():
+        raise ValueError("Returns must not contain NaNs; drop or fill missing rows first.")
+    n_obs = n_obs or len(values)
+    target_vol = backtest_kwargs.get("target_vol", 0.10)
+    seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    if method == "gaussian":
+        mu, cov = values.mean(axis=0), np.cov(values, rowvar=False)
+
+    for start in range(0, n_paths, batch_size):
+        rngs = [np.random.default_rng(s) for s in seeds[start : start + batch_size]]
+        with timed("robustness.paths", paths=len(rngs)):
+            if method == "bootstrap":
+                paths = block_bootstrap_paths(values, rngs, n_obs, block=block)
+            else:
+                paths = gaussian_paths(mu, cov, rngs, n_obs)
+        names, path_returns, path_turnover = backtest_paths(paths, **backtest_kwargs)
+        with timed("metrics", paths=len(rngs)):
+            yield summarize_paths(names, path_returns, path_turnover, target_vol, first_path=start)
+
+
+def run_robustness(
+    returns: pd.DataFrame,
+    n_paths: int = 1000,
+    method: str = "bootstrap",
+    n_obs: Optional[int] = None,
+    block: int = 21,
+    batch_size: int = 100,
+    seed: int = 0,
+    out_path: Optional[str] = None,
+    window: int = 252,
+    rebalance: str = "monthly",
+    tc_bps: float = 5.0,
+    gamma: float = 10.0,
+    cov_method: str = "shrinkage",
+    target_vol: float = 0.10,
+    lmax: float = 1.5,
+    strategies: Optional[Sequence[str]] = None,
+    accounting: str = "drift",
+) -> pd.DataFrame:
+    """Backtest the strategies on n_paths generated panels; returns per-path metrics.
+
+    method="bootstrap" resamples blocks of block consecutive rows of returns,
+    method="gaussian" draws from a normal with the sample mean and covariance.
+    With out_path, each batch's rows are appended to that CSV as it finishes.
+    """
+    batches = iter_path_summaries(
+        returns,
+        n_paths=n_paths,
+        method=method,
+        n_obs=n_obs,
+        block=block,
+        batch_size=batch_size,
+        seed=seed,
+        window=window,
+        rebalance=rebalance,
+        tc_bps=tc_bps,
+        gamma=gamma,
+        cov_method=cov_method,
+        target_vol=target_vol,
+        lmax=lmax,
+        strategies=strategies,
+        accounting=accounting,
+    )
+    if out_path:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    tables = []
+    for k, table in enumerate(batches):
+        if out_path:
+            table.to_csv(out_path, mode="w" if k == 0 else "a", header=k == 0, index=False)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def robustness_summary(table: pd.DataFrame, quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> pd.DataFrame:
+    """Quantiles of each metric across paths, one row per strategy and quantile."""
+    metrics = table.drop(columns=["path"]).groupby("strategy", sort=False)
+    summary = metrics.quantile(list(quantiles))
+    summary.index.names = ["strategy", "quantile"]
+    return summary
@@ -0,0 +1,153 @@
+"""Directory-of-.npy storage for BacktestResult.
+
+Every array of a result is its own .npy file, so a saved result reopens
+memory-mapped read-only in milliseconds and only the pages that are looked
+at are read. Labels and parameters go to meta.json next to them:
+
+    returns.npy, turnover.npy   days x strategies
+    index.npy                   dates of those rows
+    offsets.npy                 row of each rebalance event
+    events.npy, before.npy      strategies x events x assets
+    metrics.npy                 strategies x metrics
+    growth.npy                  days x assets, only under drift accounting
+    frontier_*.npy              only when the result carries frontiers
+
+All strategies of a result must share the rebalance offsets (and the drift
+growth), as they do in run_backtest.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import BacktestResult
+from src.strategies.frontier import FrontierHistory
+from src.strategies.weights import WeightEvents
+
+FORMAT_VERSION = 1
+RESULT_ARRAYS = ("returns", "turnover", "index", "offsets", "events", "before", "metrics")
+FRONTIER_ARRAYS = ("frontier_index", "frontier_weights", "frontier_returns", "frontier_vols")
+
+
+def create_array(path: Path, shape: Tuple[int, ...], dtype=float) -> np.ndarray:
+    """Writable memory map backed by a new .npy file, for results written incrementally."""
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+
+def _index_values(index: pd.Index) -> np.ndarray:
+    values = np.asarray(index)
+    return values.astype(str) if values.dtype == object else values
+
+
+def _save_array(target: Path, name: str, array: np.ndarray) -> None:
+    tmp = target / f".{name}.npy.tmp"
+    with open(tmp, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp, target / f"{name}.npy")
+
+
+def write_meta(
+    out_dir: str,
+    strategies,
+    columns,
+    metrics: pd.DataFrame,
+    params: Optional[Dict[str, object]] = None,
+    frontier_gammas: Optional[np.ndarray] = None,
+) -> None:
+    """metrics.npy and meta.json; written last, so a directory with meta.json is complete."""
+    target = Path(out_dir)
+    _save_array(target, "metrics", metrics.to_numpy(dtype=float))
+    meta = {
+        "format": FORMAT_VERSION,
+        "strategies": [str(s) for s in strategies],
+        "columns": [str(c) for c in columns],
+        "metrics_index": [str(i) for i in metrics.index],
+        "metrics_columns": [str(c) for c in metrics.columns],
+        "frontier_gammas": None if frontier_gammas is None else [float(g) for g in frontier_gammas],
+        "params": params or {},
+    }
+    tmp = target / ".meta.json.tmp"
+    tmp.write_text(json.dumps(meta, indent=1))
+    os.replace(tmp, target / "meta.json")
+
+
+def save_backtest(result: BacktestResult, out_dir: str, params: Optional[Dict[str, object]] = None) -> None:
+    """Write result under out_dir; params (JSON-serialisable) are kept in meta.json."""
+    names = list(result.returns.columns)
+    first = result.events[names[0]]
+    for name in names:
+        ev = result.events[name]
+        if not (np.array_equal(ev.offsets, first.offsets) and ev.columns.equals(first.columns)):
+            raise ValueError("All strategies must share rebalance dates and assets to be stored together.")
+        if ev.accounting != first.accounting:
+            raise ValueError("All strategies must share the accounting mode to be stored together.")
+    target = Path(out_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    for stale in ("meta.json", "growth.npy"):
+        if (target / stale).exists():
+            (target / stale).unlink()
+
+    values = np.stack([result.events[n].values for n in names])
+    before = [result.events[n].before for n in names]
+    arrays = {
+        "returns": result.returns.to_numpy(dtype=float),
+        "turnover": result.turnover[names].to_numpy(dtype=float),
+        "index": _index_values(result.returns.index),
+        "offsets": first.offsets,
+        "events": values,
+        "before": np.zeros_like(values) if any(b is None for b in before) else np.stack(before),
+    }
+    if first.growth is not None:
+        arrays["growth"] = first.growth
+    frontier_gammas = None
+    if result.frontiers is not None:
+        fr = result.frontiers
+        frontier_gammas = fr.gammas
+        arrays.update(
+            frontier_weights=fr.weights,
+            frontier_returns=fr.expected_returns,
+            frontier_vols=fr.volatilities,
+            frontier_index=_index_values(fr.dates),
+        )
+    for name, array in arrays.items():
+        _save_array(target, name, array)
+    write_meta(str(target), names, first.columns, result.metrics, params, frontier_gammas)
+
+
+def open_backtest(out_dir: str, mmap: bool = True) -> BacktestResult:
+    """BacktestResult over a directory written by save_backtest, memory-mapped read-only by default."""
+    source = Path(out_dir)
+    meta = json.loads((source / "meta.json").read_text())
+    mode = "r" if mmap else None
+    arrays = {name: np.load(source / f"{name}.npy", mmap_mode=mode) for name in RESULT_ARRAYS}
+    names = meta["strategies"]
+    index = pd.Index(arrays["index"])
+    columns = pd.Index(meta["columns"])
+    returns = pd.DataFrame(arrays["returns"], index=index, columns=names, copy=False)
+    turnover = pd.DataFrame(arrays["turnover"], index=index, columns=names, copy=False)
+    growth = np.load(source / "growth.npy", mmap_mode=mode) if (source / "growth.npy").exists() else None
+    events = {
+        name: WeightEvents(index, columns, arrays["offsets"], arrays["events"][s], arrays["before"][s], growth)
+        for s, name in enumerate(names)
+    }
+    metrics = pd.DataFrame(np.asarray(arrays["metrics"]), index=meta["metrics_index"], columns=meta["metrics_columns"])
+    frontiers = None
+    if meta.get("frontier_gammas") is not None:
+        fr = {name: np.load(source / f"{name}.npy", mmap_mode=mode) for name in FRONTIER_ARRAYS}
+        frontiers = FrontierHistory(
+            pd.Index(fr["frontier_index"]),
+            columns,
+            np.asarray(meta["frontier_gammas"]),
+            fr["frontier_weights"],
+            fr["frontier_returns"],
+            fr["frontier_vols"],
+        )
+    return BacktestResult(returns=returns, events=events, turnover=turnover, metrics=metrics, frontiers=frontiers)
+
+
+def backtest_params(out_dir: str) -> Dict[str, object]:
+    return json.loads((Path(out_dir) / "meta.json").read_text())["params"]
@@ -0,0 +1,128 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import run_backtest
+from src.strategies.cache import ResultCache
+from src.strategies.workspace import Workspace
+
+SWEEP_PARAMS = ("window", "rebalance", "cov_method", "gamma", "target_vol", "lmax", "solver", "accounting")
+
+# Per-worker view of the returns panel; set once by the pool initializer.
+_SHARED: Dict[str, object] = {}
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict[str, object]]:
+    """Cartesian product of a parameter grid, in the order of SWEEP_PARAMS."""
+    unknown = set(grid) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    keys = [k for k in SWEEP_PARAMS if k in grid]
+    values = [list(grid[k]) for k in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def attach_shared(name: str) -> shared_memory.SharedMemory:
+    """Attach to a shared-memory block by name without registering it for cleanup in this process."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no track argument
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(
+    shm_name: str,
+    shape: Tuple[int, int],
+    dtype: str,
+    index: pd.Index,
+    columns: pd.Index,
+    cache_dir: Optional[str] = None,
+    storage_dtype: str = "float64",
+    reuse_buffers: bool = False,
+) -> None:
+    shm = attach_shared(shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    values.flags.writeable = False
+    _SHARED["shm"] = shm
+    _SHARED["returns"] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+    _set_numeric(cache_dir, storage_dtype, reuse_buffers)
+
+
+def _set_numeric(cache_dir: Optional[str], storage_dtype: str, reuse_buffers: bool) -> None:
+    _SHARED["cache"] = ResultCache(disk_dir=cache_dir)
+    _SHARED["storage_dtype"] = storage_dtype
+    _SHARED["workspace"] = Workspace() if reuse_buffers else None
+
+
+def _run_one(params: Dict[str, object], tc_bps: float, strategies: Optional[Sequence[str]]) -> pd.DataFrame:
+    returns = _SHARED["returns"]
+    result = run_backtest(
+        returns,
+        tc_bps=tc_bps,
+        strategies=strategies,
+        cache=_SHARED.get("cache"),
+        storage_dtype=_SHARED.get("storage_dtype", "float64"),
+        workspace=_SHARED.get("workspace"),
+        **params,
+    )
+    return _tidy_metrics(result.metrics, params)
+
+
+def _tidy_metrics(metrics: pd.DataFrame, params: Dict[str, object]) -> pd.DataFrame:
+    table = metrics.rename_axis("strategy").reset_index()
+    for pos, (key, value) in enumerate(params.items()):
+        table.insert(pos, key, value)
+    return table
+
+
+def run_sweep(
+    returns: pd.DataFrame,
+    grid: Dict[str, Sequence],
+    tc_bps: float = 5.0,
+    n_jobs: Optional[int] = None,
+    strategies: Optional[Sequence[str]] = None,
+    cache_dir: Optional[str] = None,
+    storage_dtype: str = "float64",
+    reuse_buffers: bool = False,
+) -> pd.DataFrame:
+    """Run run_backtest over every combination in grid.
+
+    The returns panel is placed in shared memory once and mapped read-only by
+    each worker, so tasks only carry their parameter dict. Each worker keeps a
+    ResultCache, so combinations sharing a window and estimator reuse the
+    covariance and weights; cache_dir adds a disk tier shared across workers
+    and runs. storage_dtype and reuse_buffers are passed on as run_backtest's
+    storage_dtype (which then also applies to the cached covariances) and a
+    Workspace kept per worker. Returns a tidy table with one row per
+    (parameter combination, strategy).
+    """
+    combos = expand_grid(grid)
+    if not combos:
+        return pd.DataFrame()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(combos))
+
+    values = np.ascontiguousarray(returns.to_numpy(dtype=float))
+    if n_jobs == 1:
+        _SHARED["returns"] = pd.DataFrame(values, index=returns.index, columns=returns.columns, copy=False)
+        _set_numeric(cache_dir, storage_dtype, reuse_buffers)
+        try:
+            tables = [_run_one(params, tc_bps, strategies) for params in combos]
+        finally:
+            _SHARED.clear()
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            init_args = (shm.name, values.shape, values.dtype.str, returns.index, returns.columns, cache_dir, storage_dtype, reuse_buffers)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=init_args) as pool:
+                tables = list(pool.map(_run_one, combos, itertools.repeat(tc_bps), itertools.repeat(strategies)))
+        finally:
+            shm.close()
+            shm.unlink()
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,231 @@
+"""Nested walk-forward tuning of the estimator and allocator parameters.
+
+At every outer rebalance the parameters (window, covariance estimator with
+its lam or shrinkage, and gamma) are chosen by the out-of-sample Sharpe ratio
+of each candidate over the n_folds rebalance periods just before it, so only
+data available at that date is used. Inner folds sit on the rebalance grid,
+so a fold scored once serves every later rebalance that looks back over it,
+and the candidate weights at a grid point double as the outer weights there.
+
+Work is split into one task per (grid point, window): the window mean and
+sample covariance are computed once per task and shared by every shrinkage,
+EWMA and gamma candidate, and with the active-set solver all gammas of an
+estimator are read off one efficient-frontier path.
+Tasks run in a process pool over a shared-memory copy of the returns.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.allocations import mean_variance_weights, min_variance_weights
+from src.strategies.backtest import REB_FREQ, BacktestResult, account_rebalances
+from src.strategies.covariance import shrink_sample, stacked_covariance
+from src.strategies.frontier import efficient_frontier
+from src.strategies.sweep import attach_shared
+from src.strategies.weights import WeightEvents
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
+
+TUNING_PARAMS = ("window", "cov_method", "lam", "shrinkage", "gamma")
+TUNED_STRATEGIES = ("mean_variance", "min_variance")
+TUNING_COV_METHODS = ("sample", "ewma", "shrinkage")
+
+DEFAULT_GRID: Dict[str, Sequence] = {
+    "window": [126, 252],
+    "cov_method": ["shrinkage", "ewma"],
+    "lam": [0.94, 0.97],
+    "shrinkage": [0.05, 0.1, 0.3],
+    "gamma": [2.0, 5.0, 10.0, 20.0],
+}
+
+# (window, cov_method, lam, shrinkage, gamma); unused entries are None
+Candidate = Tuple[int, str, Optional[float], Optional[float], Optional[float]]
+
+_SHARED: Dict[str, object] = {}
+
+
+@dataclass
+class TuningResult:
+    backtest: BacktestResult
+    choices: pd.DataFrame
+
+
+def candidate_grid(grid: Dict[str, Sequence], strategy: str = "mean_variance") -> List[Candidate]:
+    """Distinct candidates of a grid; lam only applies to ewma and shrinkage to shrinkage."""
+    unknown = set(grid) - set(TUNING_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown tuning parameters: {sorted(unknown)}")
+    if strategy not in TUNED_STRATEGIES:
+        raise ValueError(f"Strategy cannot be tuned: {strategy}")
+    merged = {**DEFAULT_GRID, **grid}
+    for method in merged["cov_method"]:
+        if method not in TUNING_COV_METHODS:
+            raise ValueError(f"Unknown covariance estimator: {method}")
+    candidates: Dict[Candidate, None] = {}
+    gammas = merged["gamma"] if strategy == "mean_variance" else [None]
+    for window, method, lam, shrink, gamma in itertools.product(
+        merged["window"], merged["cov_method"], merged["lam"], merged["shrinkage"], gammas
+    ):
+        if window < 2:
+            raise ValueError("Candidate windows must be at least 2 rows.")
+        key = (
+            int(window),
+            method,
+            float(lam) if method == "ewma" else None,
+            float(shrink) if method == "shrinkage" else None,
+            None if gamma is None else float(gamma),
+        )
+        candidates[key] = None
+    return list(candidates)
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], dtype: str) -> None:
+    shm = attach_shared(shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    values.flags.writeable = False
+    _SHARED["shm"] = shm
+    _SHARED["values"] = values
+
+
+def _evaluate_point(
+    point: int,
+    window: int,
+    candidates: Sequence[Candidate],
+    horizon: int,
+    solver: str,
+) -> Dict[Candidate, Tuple[np.ndarray, np.ndarray]]:
+    """Weights of each candidate fitted on the window before point, and their returns over the next horizon rows."""
+    values: np.ndarray = _SHARED["values"]
+    train = values[point - window : point]
+    fold = values[point : point + horizon]
+    mu = train.mean(axis=0)
+    sample = stacked_covariance(train[None], method="sample")[0]
+    out: Dict[Candidate, Tuple[np.ndarray, np.ndarray]] = {}
+    # candidates come sorted, so each estimator's gammas are contiguous
+    for (method, lam, shrink), group in itertools.groupby(candidates, key=lambda c: c[1:4]):
+        group = list(group)
+        if method == "sample":
+            cov = sample
+        elif method == "shrinkage":
+            cov = shrink_sample(sample, shrink, None)
+        else:
+            cov = stacked_covariance(train[None], method="ewma", lam=lam)[0]
+        if group[0][4] is None:
+            weights = [min_variance_weights(cov, solver=solver)]
+        elif solver == "active_set":
+            # one frontier path gives the exact optimum for every gamma
+            weights = list(efficient_frontier(mu, cov, [c[4] for c in group]).weights)
+        else:
+            weights = [mean_variance_weights(mu, cov, gamma=c[4], solver=solver) for c in group]
+        for cand, w in zip(group, weights):
+            out[cand] = (w, fold @ w)
+    return out
+
+
+def _evaluate_task(task: Tuple[int, int, List[Candidate], int, str]) -> Tuple[int, Dict[Candidate, Tuple[np.ndarray, np.ndarray]]]:
+    point, window, candidates, horizon, solver = task
+    with timed("tuning.evaluate", window=window):
+        return point, _evaluate_point(point, window, candidates, horizon, solver)
+
+
+def _sharpe(returns: np.ndarray, freq: int = 252) -> float:
+    vol = returns.std()
+    if not np.isfinite(vol) or vol <= 0:
+        return -np.inf
+    return float(returns.mean() / vol * np.sqrt(freq))
+
+
+def walk_forward_tune(
+    returns: pd.DataFrame,
+    grid: Optional[Dict[str, Sequence]] = None,
+    strategy: str = "mean_variance",
+    n_folds: int = 6,
+    rebalance: str = "monthly",
+    tc_bps: float = 5.0,
+    target_vol: float = 0.10,
+    solver: str = "active_set",
+    n_jobs: Optional[int] = None,
+    accounting: str = "drift",
+) -> TuningResult:
+    """Backtest strategy with its parameters re-tuned at every rebalance.
+
+    grid overrides entries of DEFAULT_GRID. Each candidate is scored by the
+    Sharpe ratio of its (cost-free) returns over the n_folds rebalance periods
+    preceding the rebalance, refitting at the start of each period as the
+    backtest would. The backtest starts once the longest window plus n_folds
+    periods of history are available; accounting is as in run_backtest.
+    choices records the winning parameters and their validation score per
+    rebalance.
+    """
+    if n_folds < 1:
+        raise ValueError("n_folds must be positive.")
+    candidates = candidate_grid(grid or {}, strategy)
+    step = REB_FREQ.get(rebalance, REB_FREQ["monthly"])
+    values = np.ascontiguousarray(returns.to_numpy(dtype=float))
+    if not np.isfinite(values).all():
+        raise ValueError("Returns must not contain NaNs; drop or fill missing rows first.")
+    n_obs = len(values)
+    max_window = max(c[0] for c in candidates)
+    start = max_window + n_folds * step
+    if n_obs <= start:
+        raise ValueError("Not enough data for the longest window and the validation folds.")
+
+    # grid points shared by the outer schedule and the inner folds
+    reb_idx = np.arange(start, n_obs, step)
+    points = np.arange(start - n_folds * step, n_obs, step)
+    by_window: Dict[int, List[Candidate]] = {}
+    for cand in sorted(candidates, key=lambda c: (c[0], c[1], c[2] or 0.0, c[3] or 0.0, c[4] or 0.0)):
+        by_window.setdefault(cand[0], []).append(cand)
+    tasks = [(int(p), w, cands, step, solver) for p in points for w, cands in by_window.items()]
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(tasks))
+    with timed("tuning", tasks=len(tasks)):
+        if n_jobs == 1:
+            _SHARED["values"] = values
+            try:
+                evaluated = [_evaluate_task(task) for task in tasks]
+            finally:
+                _SHARED.clear()
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            try:
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                init_args = (shm.name, values.shape, values.dtype.str)
+                with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=init_args) as pool:
+                    evaluated = list(pool.map(_evaluate_task, tasks, chunksize=max(1, len(tasks) // (4 * n_jobs))))
+            finally:
+                shm.close()
+                shm.unlink()
+
+    results: Dict[int, Dict[Candidate, Tuple[np.ndarray, np.ndarray]]] = {}
+    for point, out in evaluated:
+        results.setdefault(point, {}).update(out)
+
+    events = np.zeros((len(reb_idx), values.shape[1]))
+    rows = []
+    for k, i in enumerate(reb_idx):
+        folds = [results[int(i - m * step)] for m in range(n_folds, 0, -1)]
+        scores = [_sharpe(np.concatenate([fold[cand][1] for fold in folds])) for cand in candidates]
+        best = int(np.argmax(scores))
+        cand = candidates[best]
+        events[k] = results[int(i)][cand][0]
+        rows.append(dict(zip(TUNING_PARAMS, cand), score=scores[best]))
+
+    name = f"tuned_{strategy}"
+    tc = tc_bps / 10000.0
+    with timed("accounting"):
+        returns_hist, turnover_hist, before, growth = account_rebalances(values[start:], reb_idx - start, {name: events}, tc, accounting)
+    index = returns.index[start:]
+    ret_df = pd.DataFrame(returns_hist, index=index)
+    turnover_df = pd.DataFrame(turnover_hist, index=index)
+    weight_events = {name: WeightEvents(index, returns.columns, reb_idx - start, events, before[name], growth)}
+    metrics = compute_metrics_table(ret_df, turnover_df, target_vol)
+    choices = pd.DataFrame(rows, index=returns.index[reb_idx])
+    return TuningResult(BacktestResult(returns=ret_df, events=weight_events, turnover=turnover_df, metrics=metrics), choices)
@@ -0,0 +1,163 @@
+"""Backtests of several sub-universes of one returns panel in a single pass.
+
+run_universes follows run_backtest for every universe but estimates the
+covariance once per rebalance on the union of their tickers: the raw moment
+(sample covariance or EWMA moment) of the union window is computed, or
+rolled forward, once and each universe takes its block of it before the
+estimator's shrinkage or PSD step, which gives exactly the matrix a
+separate run would estimate. Factor covariances are fitted on the union and
+restricted to each universe, so they use the union's factors. This pays off
+when the universes overlap, e.g. a master list and sleeves that each drop a
+few tickers.
+"""
+
+from functools import partial
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import ACCOUNTING_MODES, BacktestResult, account_rebalances, rebalance_schedule
+from src.strategies.cache import ResultCache
+from src.strategies.covariance import (
+    FactorCovariance,
+    RollingCovariance,
+    covariance_from_moment,
+    ewma_moment,
+    factor_covariance,
+)
+from src.strategies.registry import RebalanceContext, resolve_strategies
+from src.strategies.weights import WeightEvents
+from src.utils.metrics import compute_metrics_table
+from src.utils.profiling import timed
+
+
+def universe_positions(columns: Sequence[str], universes: Dict[str, Sequence[str]]) -> Dict[str, np.ndarray]:
+    """Column positions of each universe's tickers, in the universe's order."""
+    if not universes:
+        raise ValueError("At least one universe is required.")
+    pos = {c: k for k, c in enumerate(columns)}
+    out = {}
+    for name, tickers in universes.items():
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            raise ValueError(f"Universe {name} is empty.")
+        missing = [t for t in tickers if t not in pos]
+        if missing:
+            raise ValueError(f"Universe {name} has tickers missing from the returns: {missing}")
+        out[name] = np.array([pos[t] for t in tickers], dtype=np.intp)
+    return out
+
+
+def run_universes(
+    returns: pd.DataFrame,
+    universes: Dict[str, Sequence[str]],
+    window: int = 252,
+    rebalance: str = "monthly",
+    tc_bps: float = 5.0,
+    gamma: float = 10.0,
+    cov_method: str = "shrinkage",
+    target_vol: float = 0.10,
+    lmax: float = 1.5,
+    solver: str = "slsqp",
+    strategies: Optional[Sequence[str]] = None,
+    cache: Optional[ResultCache] = None,
+    accounting: str = "drift",
+) -> Dict[str, BacktestResult]:
+    """run_backtest on returns[universes[name]] for every name, sharing the covariance work.
+
+    returns must hold every ticker of every universe (e.g. loaded once for
+    their union); other columns are ignored. The results are keyed by
+    universe name and carry the universe's tickers in the given order.
+    """
+    if len(returns) <= window:
+        raise ValueError("Not enough data for the chosen window length.")
+    if accounting not in ACCOUNTING_MODES:
+        raise ValueError(f"Unknown accounting mode: {accounting}")
+    method = cov_method.lower()
+    if method not in RollingCovariance.METHODS + ("factor",):
+        raise ValueError(f"Unknown covariance estimator: {cov_method}")
+    positions = universe_positions(list(returns.columns), universes)
+    union = np.unique(np.concatenate(list(positions.values())))
+    # positions within the union panel
+    members = {name: np.searchsorted(union, idx) for name, idx in positions.items()}
+    values = returns.to_numpy(dtype=float)[:, union]
+    n_union = len(union)
+    tc = tc_bps / 10000.0
+
+    specs = resolve_strategies(strategies)
+    strategy_names = [spec.name for spec in specs]
+    reb_idx = rebalance_schedule(len(values), window, rebalance)
+    params = {"gamma": gamma, "target_vol": target_vol, "lmax": lmax, "solver": solver, "cov_method": cov_method}
+    events = {u: {k: np.zeros((len(reb_idx), len(members[u]))) for k in strategy_names} for u in members}
+    prev_weights: Dict[str, Dict[str, np.ndarray]] = {u: {} for u in members}
+
+    finite = bool(np.isfinite(values).all())
+    rolling_cov = None
+    if window >= 2 and finite and method in RollingCovariance.METHODS:
+        rolling_cov = RollingCovariance(n_union, window, method=method)
+    cov_pos = 0
+
+    def union_moment(i: int) -> Union[np.ndarray, FactorCovariance]:
+        nonlocal cov_pos
+        with timed("covariance", method=cov_method, assets=n_union):
+            if method == "factor":
+                return factor_covariance(values[i - window : i])
+            if rolling_cov is not None:
+                rolling_cov.update(values[cov_pos:i])
+                cov_pos = i
+                return rolling_cov.moment()
+            window_frame = pd.DataFrame(values[i - window : i])
+            if method == "ewma":
+                return ewma_moment(window_frame)
+            return np.asarray(window_frame.cov())
+
+    def union_mean(i: int) -> np.ndarray:
+        if finite:
+            return values[i - window : i].mean(axis=0)
+        return pd.DataFrame(values[i - window : i]).mean().values
+
+    for k, i in enumerate(reb_idx):
+        window_vals = values[i - window : i]
+        shared: Dict[str, object] = {}
+
+        def moment(i: int = i):
+            if "moment" not in shared:
+                shared["moment"] = union_moment(i)
+            return shared["moment"]
+
+        def cov_of(idx: np.ndarray) -> Union[np.ndarray, FactorCovariance]:
+            full = moment()
+            if isinstance(full, FactorCovariance):
+                return full.submatrix(idx)
+            return covariance_from_moment(full[np.ix_(idx, idx)], method)
+
+        def mu_of(idx: np.ndarray, i: int = i) -> np.ndarray:
+            if "mu" not in shared:
+                shared["mu"] = union_mean(i)
+            return shared["mu"][idx]
+
+        for u, idx in members.items():
+            ctx = RebalanceContext(window_vals[:, idx], partial(cov_of, idx), partial(mu_of, idx), params, prev_weights[u], cache=cache)
+            new_weights = {}
+            for spec in specs:
+                with timed(f"allocator.{spec.name}"):
+                    new_weights[spec.name] = np.asarray(spec.func(ctx), dtype=float)
+            for name in strategy_names:
+                events[u][name][k] = new_weights[name]
+            prev_weights[u] = new_weights
+
+    backtest_index = returns.index[window:]
+    offsets = reb_idx - window
+    results = {}
+    for u, idx in members.items():
+        columns = returns.columns[union[idx]]
+        with timed("accounting"):
+            returns_hist, turnover_hist, before, growth = account_rebalances(values[window:, idx], offsets, events[u], tc, accounting)
+        weight_events = {name: WeightEvents(backtest_index, columns, offsets, events[u][name], before[name], growth) for name in strategy_names}
+        ret_df = pd.DataFrame(returns_hist, index=backtest_index)
+        turnover_df = pd.DataFrame(turnover_hist, index=backtest_index)
+        with timed("metrics"):
+            metrics = compute_metrics_table(ret_df, turnover_df, target_vol)
+        results[u] = BacktestResult(returns=ret_df, events=weight_events, turnover=turnover_df, metrics=metrics)
+    return results
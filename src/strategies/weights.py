@@ -0,0 +1,150 @@
+"""Compact storage for portfolio weights that change only at rebalances."""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def event_turnover(values: np.ndarray, before: Optional[np.ndarray] = None) -> np.ndarray:
+    """Sum of absolute weight changes at each event (..., events, assets).
+
+    before holds the book just ahead of each event; by default that is the
+    previous event's weights, starting from an empty book.
+    """
+    if before is None:
+        before = np.zeros_like(values)
+        before[..., 1:, :] = values[..., :-1, :]
+    return np.abs(values - before).sum(axis=-1)
+
+
+def drifted_book(weights: np.ndarray, growth: np.ndarray) -> np.ndarray:
+    """Weights (remainder in cash) after each asset grew by growth, as fractions of the new value."""
+    drifted = weights * growth
+    return drifted / (1.0 - weights.sum(axis=-1) + drifted.sum(axis=-1))[..., None]
+
+
+@dataclass(eq=False)
+class WeightEvents:
+    """Weights adopted at rebalance events, and the book they leave until the next one.
+
+    values[k] is set on row offsets[k] of index; rows before the first event
+    hold nothing. before[k], when given, is the (drifted) book just ahead of
+    event k, against which its turnover is measured; otherwise the previous
+    event's weights are. growth, given under drift accounting, holds each
+    asset's growth (days x assets) from the event in force through the
+    previous close; the book then drifts with it between events, and
+    to_frame(), at(), step_points() and gross() describe that drifted book.
+    Without it the weights are held flat ("fixed" accounting). Either way a
+    day's weights times its asset returns give the day's gross return.
+    Storage is events x assets (plus the growth panel shared by all
+    strategies of a run) instead of days x assets per strategy; the daily
+    frame is built on first use by to_frame() and not pickled.
+    """
+
+    index: pd.Index
+    columns: pd.Index
+    offsets: np.ndarray
+    values: np.ndarray
+    before: Optional[np.ndarray] = None
+    growth: Optional[np.ndarray] = None
+    _dense: Optional[pd.DataFrame] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.offsets = np.asarray(self.offsets, dtype=np.intp)
+        self.values = np.asarray(self.values)
+        if self.values.dtype.kind != "f":
+            self.values = self.values.astype(float)
+        if self.values.shape != (len(self.offsets), len(self.columns)):
+            raise ValueError("values must have one row per event and one column per asset.")
+        if self.before is not None and np.shape(self.before) != self.values.shape:
+            raise ValueError("before must have the same shape as values.")
+        if self.growth is not None and np.shape(self.growth) != (len(self.index), len(self.columns)):
+            raise ValueError("growth must have one row per date and one column per asset.")
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = dict(self.__dict__)
+        state["_dense"] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def accounting(self) -> str:
+        return "fixed" if self.growth is None else "drift"
+
+    @property
+    def dates(self) -> pd.Index:
+        return self.index[self.offsets]
+
+    def segment_ids(self) -> np.ndarray:
+        """Event in force on each row of index, -1 before the first one."""
+        return np.searchsorted(self.offsets, np.arange(len(self.index)), side="right") - 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """Dense days x assets view of the book held each day (cached)."""
+        if self._dense is None:
+            seg = self.segment_ids()
+            held = seg >= 0
+            dense = np.zeros((len(self.index), len(self.columns)))
+            dense[held] = self.values[seg[held]]
+            if self.growth is not None:
+                dense[held] = drifted_book(dense[held], self.growth[held])
+            self._dense = pd.DataFrame(dense, index=self.index, columns=self.columns)
+        return self._dense
+
+    def event_frame(self) -> pd.DataFrame:
+        """One row per rebalance, indexed by the date the weights take effect."""
+        return pd.DataFrame(self.values, index=self.dates, columns=self.columns)
+
+    def at(self, date) -> pd.Series:
+        """Weights held on date (zeros before the first event)."""
+        pos = self.index.get_loc(date)
+        k = np.searchsorted(self.offsets, pos, side="right") - 1
+        row = self.values[k] if k >= 0 else np.zeros(len(self.columns))
+        if k >= 0 and self.growth is not None:
+            row = drifted_book(np.asarray(row, dtype=float), self.growth[pos])
+        return pd.Series(row, index=self.columns, name=date)
+
+    def turnover(self) -> pd.Series:
+        return pd.Series(event_turnover(self.values, self.before), index=self.dates)
+
+    def gross(self) -> pd.Series:
+        """Gross exposure (sum of weights) from each change on: per event, or per day once drifting."""
+        if self.growth is not None and len(self):
+            return self.to_frame().iloc[self.offsets[0] :].sum(axis=1)
+        return pd.Series(self.values.sum(axis=1), index=self.dates)
+
+    def step_points(self) -> Tuple[pd.Index, np.ndarray]:
+        """(x, y) vertices tracing the held weights as a step function up to the last date.
+
+        Fixed weights need two vertices per event; a drifting book has one per day.
+        """
+        if not len(self):
+            return self.index[:0], np.zeros((0, len(self.columns)))
+        if self.growth is not None:
+            dense = self.to_frame().iloc[self.offsets[0] :]
+            return dense.index, dense.to_numpy()
+        edges = list(self.dates[1:]) + [self.index[-1]]
+        x = [d for pair in zip(self.dates, edges) for d in pair]
+        y = np.repeat(self.values, 2, axis=0)
+        return pd.DatetimeIndex(x) if isinstance(self.index, pd.DatetimeIndex) else pd.Index(x), y
+
+
+class WeightsView(Mapping):
+    """Read-only mapping from strategy to its dense weights frame, built on access."""
+
+    def __init__(self, events: Dict[str, WeightEvents]) -> None:
+        self._events = events
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        return self._events[name].to_frame()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._events)
+
+    def __len__(self) -> int:
+        return len(self._events)
@@ -0,0 +1,186 @@
+"""Scratch buffers reused across rebalances, and reduced-precision storage.
+
+A Workspace hands out named arrays that keep their memory between calls, so
+the n x n temporaries of the covariance finishing steps (symmetrisation,
+shrinkage, eigenvalue clipping), the active-set solver, the matrix-vector
+products inside the SLSQP and risk-parity loops and the per-segment
+products of the drift accounting are allocated once per run instead of once
+per rebalance, iteration or run phase. Results handed back to callers are
+always fresh arrays; only intermediates live in the workspace, so a cached
+covariance is never overwritten by a later rebalance. Without a workspace
+every kernel allocates its temporaries exactly as before.
+
+The n x n steps share two buffers, used in this order within a rebalance:
+
+1. RollingCovariance.push forms each rank-1 update in SQUARE_B.
+2. The rolling sample covariance is built in SQUARE_A (SQUARE_B as scratch).
+3. Shrinkage writes SQUARE_B from it.
+4. ensure_psd symmetrises into SQUARE_A and, when clipping is needed, scales
+   the eigenvectors in SQUARE_B; it returns a fresh copy.
+5. The mean-variance allocator scales the covariance into SQUARE_A and the
+   active-set solver rescales that into SQUARE_B.
+
+After the last rebalance the drift accounting reuses SQUARE_A for its
+segment products, so the buffers stand in for a days x assets temporary
+rather than adding to the accounting peak. Every step names the arrays it
+reads as avoid, so an overlap in this order raises instead of silently
+corrupting an input.
+
+STORAGE_DTYPES selects the dtype weight histories (and covariances held in
+a ResultCache) are kept in; all arithmetic stays in float64.
+compare_precision reports what float32 storage and the workspace save
+against a plain float64 run, and how far the results move.
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+STORAGE_DTYPES = {"float64": np.float64, "float32": np.float32}
+
+# The two scratch buffers shared by the covariance finishing steps, the
+# active-set solver and the drift accounting, in the order described above.
+SQUARE_A = "square.a"
+SQUARE_B = "square.b"
+
+
+def storage_dtype(name: str) -> np.dtype:
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown storage dtype: {name}")
+    return np.dtype(STORAGE_DTYPES[name])
+
+
+def to_storage(value, dtype: np.dtype):
+    """Dense arrays cast to the storage dtype; anything else (e.g. FactorCovariance) unchanged."""
+    if isinstance(value, np.ndarray) and value.dtype != dtype:
+        return value.astype(dtype)
+    return value
+
+
+def from_storage(value):
+    """Stored arrays back in float64 for computation."""
+    if isinstance(value, np.ndarray) and value.dtype != np.float64:
+        return value.astype(np.float64)
+    return value
+
+
+class Workspace:
+    """Named scratch arrays, allocated on first request and reused afterwards.
+
+    get(name, shape) returns a view of the named buffer with that shape,
+    growing the buffer only when a larger size (or another dtype) is asked
+    for, so one buffer can serve steps of different shapes. Its contents are
+    whatever the last user left in it. Arrays passed as avoid (the inputs of
+    the step about to write the buffer) must not overlap it, which is
+    checked rather than assumed. Not safe to share between threads.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: Dict[str, np.ndarray] = {}
+        self.allocations = 0
+        self.reuses = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.float64, avoid: Sequence[np.ndarray] = ()) -> np.ndarray:
+        size = int(np.prod(shape))
+        buf = self._buffers.get(name)
+        if buf is not None and buf.size >= size and buf.dtype == dtype:
+            self.reuses += 1
+        else:
+            buf = np.empty(size, dtype=dtype)
+            self._buffers[name] = buf
+            self.allocations += 1
+        view = buf[:size].reshape(shape)
+        for arr in avoid:
+            if isinstance(arr, np.ndarray) and np.shares_memory(view, arr):
+                raise ValueError(f"Workspace buffer {name!r} overlaps an input of the step writing it.")
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+class QuadraticForm:
+    """w'Σw and Σw evaluated from one matrix-vector product per point.
+
+    SLSQP asks for the objective and its gradient at the same w; the product
+    is computed into a workspace buffer once and reused by both. cov may be
+    dense or anything supporting cov @ w (e.g. FactorCovariance).
+    """
+
+    def __init__(self, cov: np.ndarray, workspace: Workspace, name: str = "quad") -> None:
+        n = cov.shape[0]
+        self.cov = cov
+        self._w = workspace.get(f"{name}.w", (n,))
+        self._cov_w = workspace.get(f"{name}.cov_w", (n,))
+        self._valid = False
+
+    def cov_w(self, w: np.ndarray) -> np.ndarray:
+        if not (self._valid and np.array_equal(w, self._w)):
+            if isinstance(self.cov, np.ndarray):
+                np.dot(self.cov, w, out=self._cov_w)
+            else:
+                self._cov_w[:] = self.cov @ w
+            self._w[:] = w
+            self._valid = True
+        return self._cov_w
+
+    def value(self, w: np.ndarray) -> float:
+        return float(w @ self.cov_w(w))
+
+
+def _events_nbytes(events) -> int:
+    return events.values.nbytes + (0 if events.before is None else np.asarray(events.before).nbytes)
+
+
+def weights_nbytes(result) -> int:
+    """Bytes held by a BacktestResult's weight histories (events, books, frontiers)."""
+    total = sum(_events_nbytes(ev) for ev in result.events.values())
+    if result.frontiers is not None:
+        total += result.frontiers.weights.nbytes
+    return total
+
+
+def compare_precision(
+    returns: pd.DataFrame,
+    dtype: str = "float32",
+    reuse_buffers: bool = True,
+    **backtest_kwargs,
+) -> pd.DataFrame:
+    """Run run_backtest in float64 and in the reduced mode; one row per strategy.
+
+    Each run gets its own ResultCache, so the reduced run also reads its
+    covariances back from reduced-precision storage. Columns give the
+    weight-history bytes of both runs and the bytes saved, the largest
+    absolute differences in weights and daily returns, and the change in
+    each headline metric. The workspace's buffer count and size are
+    attached as attrs.
+    """
+    from src.strategies.backtest import run_backtest
+    from src.strategies.cache import ResultCache
+
+    reference = run_backtest(returns, cache=ResultCache(), **backtest_kwargs)
+    workspace = Workspace() if reuse_buffers else None
+    reduced = run_backtest(returns, storage_dtype=dtype, workspace=workspace, cache=ResultCache(), **backtest_kwargs)
+
+    rows = {}
+    for name, ev in reference.events.items():
+        other = reduced.events[name]
+        ref_bytes, red_bytes = _events_nbytes(ev), _events_nbytes(other)
+        rows[name] = {
+            "weights_bytes_float64": ref_bytes,
+            f"weights_bytes_{dtype}": red_bytes,
+            "bytes_saved": ref_bytes - red_bytes,
+            "max_weight_error": float(np.abs(np.asarray(other.values, dtype=float) - ev.values).max(initial=0.0)),
+            "max_return_error": float(np.nanmax(np.abs(reduced.returns[name] - reference.returns[name]), initial=0.0)),
+            "sharpe_change": float(reduced.metrics.loc[name, "Sharpe"] - reference.metrics.loc[name, "Sharpe"]),
+            "cagr_change": float(reduced.metrics.loc[name, "CAGR"] - reference.metrics.loc[name, "CAGR"]),
+        }
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.attrs["total_bytes_saved"] = weights_nbytes(reference) - weights_nbytes(reduced)
+    if workspace is not None:
+        table.attrs["workspace_bytes"] = workspace.nbytes
+        table.attrs["workspace_allocations"] = workspace.allocations
+        table.attrs["workspace_reuses"] = workspace.reuses
+    return table
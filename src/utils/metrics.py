@@ -53,3 +53,149 @@ def compute_metrics(daily_returns: pd.Series, turnover: pd.Series, target_vol: f
             "CVaR95": cvar_95,
         }
     )
+
+
+METRIC_COLUMNS = [
+    "CAGR",
+    "Vol",
+    "Sharpe",
+    "Sortino",
+    "MaxDrawdown",
+    "Calmar",
+    "AvgTurnover",
+    "RealizedVol",
+    "VolMinusTarget",
+    "VaR95",
+    "CVaR95",
+]
+
+
+def compute_metrics_table(returns: pd.DataFrame, turnover: pd.DataFrame, target_vol: float = 0.10, freq: int = 252) -> pd.DataFrame:
+    """compute_metrics for every column of returns in one pass over the 2-D array.
+
+    Returns one row per column with the same values compute_metrics gives for
+    that column. Columns containing NaNs fall back to compute_metrics, which
+    skips missing values the pandas way.
+    """
+    r = returns.to_numpy(dtype=float)
+    to = turnover[returns.columns].to_numpy(dtype=float)
+    if not np.isfinite(r).all():
+        rows = [compute_metrics(returns[c], turnover[c], target_vol) for c in returns.columns]
+        return pd.DataFrame(rows, index=returns.columns)
+
+    n_obs = r.shape[0]
+    years = n_obs / freq
+    growth = np.cumprod(1 + r, axis=0)
+    if years > 0:
+        cagr = growth[-1] ** (1 / years) - 1
+    else:
+        cagr = np.zeros(r.shape[1])
+    vol = r.std(axis=0) * np.sqrt(freq)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(vol > 0, cagr / vol, 0.0)
+
+        neg = r < 0
+        n_neg = neg.sum(axis=0)
+        neg_mean = np.where(neg, r, 0.0).sum(axis=0) / n_neg
+        downside = np.sqrt(np.where(neg, (r - neg_mean) ** 2, 0.0).sum(axis=0) / n_neg)
+        sortino = np.where(downside > 0, cagr / (downside * np.sqrt(freq)), 0.0)
+
+        max_dd = (growth / np.maximum.accumulate(growth, axis=0) - 1).min(axis=0) if n_obs else np.zeros(r.shape[1])
+        calmar = np.where(max_dd < 0, -cagr / max_dd, 0.0)
+
+        var_95 = np.percentile(r, 5, axis=0)
+        tail = r <= var_95
+        cvar_95 = np.where(tail.any(axis=0), np.where(tail, r, 0.0).sum(axis=0) / tail.sum(axis=0), var_95)
+
+    table = pd.DataFrame(
+        {
+            "CAGR": cagr,
+            "Vol": vol,
+            "Sharpe": sharpe,
+            "Sortino": sortino,
+            "MaxDrawdown": max_dd,
+            "Calmar": calmar,
+            "AvgTurnover": to.mean(axis=0),
+            "RealizedVol": vol,
+            "VolMinusTarget": vol - target_vol,
+            "VaR95": var_95,
+            "CVaR95": cvar_95,
+        },
+        index=returns.columns,
+    )
+    return table[METRIC_COLUMNS]
+
+
+def rolling_sharpe(returns: pd.DataFrame, window: int = 63, freq: int = 252) -> pd.DataFrame:
+    """Annualised mean over volatility on a trailing window (sample std, as in rolling_volatility)."""
+    roll = returns.rolling(window)
+    std = roll.std()
+    return (roll.mean() * freq) / (std * np.sqrt(freq)).where(std > 0)
+
+
+def rolling_volatility(returns: pd.DataFrame, window: int = 63, freq: int = 252) -> pd.DataFrame:
+    return returns.rolling(window).std() * np.sqrt(freq)
+
+
+def rolling_drawdown(returns: pd.DataFrame, window: int = 252) -> pd.DataFrame:
+    """Drawdown from the highest level of the last window days."""
+    cum = (1 + returns).cumprod()
+    return cum / cum.rolling(window, min_periods=1).max() - 1
+
+
+def bootstrap_ci(
+    returns: pd.DataFrame,
+    n_boot: int = 1000,
+    block: int = 21,
+    alpha: float = 0.05,
+    seed: int = 0,
+    freq: int = 252,
+) -> pd.DataFrame:
+    """Moving-block bootstrap confidence intervals for Sharpe and CAGR of every column.
+
+    Each resample stitches randomly placed blocks of block days into a path of
+    the original length. Because Sharpe and CAGR only need the sums of r, r^2
+    and log(1 + r) over a path, each block contributes differences of prefix
+    sums. The whole batch is therefore computed from an (n_boot, n_blocks)
+    array of block starts, with no per-resample loop and no materialised paths.
+    """
+    r = returns.to_numpy(dtype=float)
+    n_obs, n_cols = r.shape
+    if n_obs == 0:
+        raise ValueError("Cannot bootstrap an empty return series.")
+    block = max(1, min(block, n_obs))
+    n_blocks = -(-n_obs // block)
+    lengths = np.full(n_blocks, block)
+    lengths[-1] = n_obs - block * (n_blocks - 1)
+
+    zero = np.zeros((1, n_cols))
+    prefix = {
+        "r": np.vstack([zero, np.cumsum(r, axis=0)]),
+        "r2": np.vstack([zero, np.cumsum(r**2, axis=0)]),
+        "log": np.vstack([zero, np.cumsum(np.log1p(r), axis=0)]),
+    }
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n_obs - block + 1, size=(n_boot, n_blocks))
+    ends = starts + lengths
+
+    def path_sums(name: str) -> np.ndarray:
+        c = prefix[name]
+        return (c[ends] - c[starts]).sum(axis=1)
+
+    mean = path_sums("r") / n_obs
+    var = np.maximum(path_sums("r2") / n_obs - mean**2, 0.0)
+    vol = np.sqrt(var) * np.sqrt(freq)
+    cagr = np.exp(path_sums("log") * freq / n_obs) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(vol > 0, cagr / vol, 0.0)
+
+    lo, hi = alpha / 2, 1 - alpha / 2
+    return pd.DataFrame(
+        {
+            "Sharpe_lo": np.quantile(sharpe, lo, axis=0),
+            "Sharpe_hi": np.quantile(sharpe, hi, axis=0),
+            "CAGR_lo": np.quantile(cagr, lo, axis=0),
+            "CAGR_hi": np.quantile(cagr, hi, axis=0),
+        },
+        index=returns.columns,
+    )
@@ -0,0 +1,233 @@
+"""Stage-hashed pipeline with persisted artifacts.
+
+A Pipeline is an ordered list of Stages. Each stage is a function of the
+outputs of the stages it depends on plus its own parameters, and its output
+is saved under the artifacts directory in one of the ARTIFACT_KINDS. The
+stage key hashes its name, parameters, the source of its function and of
+the modules it lists in code, and the output hashes of its dependencies; a
+stage runs only when that key differs from the one in the manifest (or its
+artifact is gone) and otherwise its saved output is reused. A stage that
+reruns but produces the same output leaves the stages after it cached.
+
+Artifacts can be opened without running anything through load_artifact,
+which is what the notebooks do.
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from src.utils.profiling import timed
+from src.utils.rendering import content_hash
+
+MANIFEST_NAME = ".pipeline_manifest.json"
+DEFAULT_ARTIFACTS_DIR = "reports/artifacts"
+
+
+@dataclass
+class ArtifactKind:
+    save: Callable[[Any, Path], None]
+    load: Callable[[Path], Any]
+    exists: Callable[[Path], bool]
+    digest: Callable[[Any], str]
+
+
+def _save_frame(frame, path: Path) -> None:
+    from src.data.loader import save_frame
+
+    save_frame(frame, str(path), "npy")
+
+
+def _load_frame(path: Path):
+    from src.data.loader import load_frame
+
+    return load_frame(str(path), "npy")
+
+
+def _save_backtest(result, path: Path) -> None:
+    from src.strategies.storage import save_backtest
+
+    save_backtest(result, str(path))
+
+
+def _load_backtest(path: Path):
+    from src.strategies.storage import open_backtest
+
+    return open_backtest(str(path))
+
+
+def _save_files(paths: Sequence[str], path: Path) -> None:
+    path.with_suffix(".json").write_text(json.dumps([str(p) for p in paths], indent=1))
+
+
+def _load_files(path: Path) -> List[str]:
+    return json.loads(path.with_suffix(".json").read_text())
+
+
+def _files_exist(path: Path) -> bool:
+    listing = path.with_suffix(".json")
+    return listing.exists() and all(Path(p).exists() for p in _load_files(path))
+
+
+def _files_digest(paths: Sequence[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for p in paths:
+        h.update(str(p).encode())
+        h.update(Path(p).read_bytes())
+    return h.hexdigest()
+
+
+ARTIFACT_KINDS: Dict[str, ArtifactKind] = {
+    # date-indexed frames, in the loader's npy layout
+    "frame": ArtifactKind(_save_frame, _load_frame, lambda p: (p / "values.npy").exists(), content_hash),
+    # BacktestResult, in the layout of src.strategies.storage
+    "backtest": ArtifactKind(_save_backtest, _load_backtest, lambda p: (p / "meta.json").exists(), content_hash),
+    # files the stage wrote elsewhere (e.g. under reports/); the artifact lists their paths
+    "files": ArtifactKind(_save_files, _load_files, _files_exist, _files_digest),
+}
+
+
+@dataclass
+class Stage:
+    """One step of a Pipeline.
+
+    func is called with the dependency outputs as keyword arguments named
+    after their stages, then params and options. params are part of the
+    stage key, options (e.g. a number of processes) are not.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    kind: str
+    deps: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    options: Dict[str, Any] = field(default_factory=dict)
+    code: Sequence[str] = ()
+
+
+@lru_cache(maxsize=None)
+def source_digest(module_name: str) -> str:
+    """Hash of a module's source, or of every .py file of a package."""
+    module = importlib.import_module(module_name)
+    if hasattr(module, "__path__"):
+        files = sorted(p for d in module.__path__ for p in Path(d).rglob("*.py"))
+    else:
+        files = [Path(inspect.getfile(module))]
+    h = hashlib.blake2b(digest_size=16)
+    for f in files:
+        h.update(f.name.encode())
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def _load_manifest(path: Path) -> Dict[str, Dict[str, str]]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], artifacts_dir: str = DEFAULT_ARTIFACTS_DIR) -> None:
+        self.stages = list(stages)
+        self.artifacts_dir = Path(artifacts_dir)
+        seen = set()
+        for stage in self.stages:
+            if stage.kind not in ARTIFACT_KINDS:
+                raise ValueError(f"Unknown artifact kind: {stage.kind}")
+            if stage.name in seen:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            missing = [d for d in stage.deps if d not in seen]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on {missing}, which must come before it.")
+            seen.add(stage.name)
+        self._by_name = {stage.name: stage for stage in self.stages}
+
+    def path(self, name: str) -> Path:
+        return self.artifacts_dir / name
+
+    def stage_key(self, stage: Stage, manifest: Dict[str, Dict[str, str]]) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{stage.name}:{stage.kind}".encode())
+        h.update(inspect.getsource(stage.func).encode())
+        h.update(content_hash(stage.params).encode())
+        for module_name in stage.code:
+            h.update(source_digest(module_name).encode())
+        for dep in stage.deps:
+            h.update(manifest[dep]["output"].encode())
+        return h.hexdigest()
+
+    def _closure(self, targets: Optional[Iterable[str]]) -> set:
+        if targets is None:
+            return set(self._by_name)
+        needed, todo = set(), list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in self._by_name:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in needed:
+                needed.add(name)
+                todo.extend(self._by_name[name].deps)
+        return needed
+
+    def run(
+        self,
+        targets: Optional[Iterable[str]] = None,
+        force: Union[bool, Iterable[str]] = False,
+    ) -> Dict[str, str]:
+        """Bring targets (default: every stage) and their dependencies up to date.
+
+        force reruns every stage (True) or the named ones regardless of
+        their keys. Returns stage name -> "ran" | "cached".
+        """
+        needed = self._closure(targets)
+        forced = set(self._by_name) if force is True else set(force or ())
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.artifacts_dir / MANIFEST_NAME
+        manifest = _load_manifest(manifest_path)
+
+        outputs: Dict[str, Any] = {}
+        status: Dict[str, str] = {}
+        for stage in self.stages:
+            if stage.name not in needed:
+                continue
+            kind = ARTIFACT_KINDS[stage.kind]
+            key = self.stage_key(stage, manifest)
+            entry = manifest.get(stage.name, {})
+            if stage.name not in forced and entry.get("key") == key and kind.exists(self.path(stage.name)):
+                status[stage.name] = "cached"
+                continue
+            inputs = {dep: outputs[dep] if dep in outputs else self.load(dep) for dep in stage.deps}
+            with timed(f"stage.{stage.name}"):
+                value = stage.func(**inputs, **stage.params, **stage.options)
+                kind.save(value, self.path(stage.name))
+            outputs[stage.name] = value
+            manifest[stage.name] = {"key": key, "output": kind.digest(value), "kind": stage.kind}
+            tmp = manifest_path.with_name(f"{MANIFEST_NAME}.tmp")
+            tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+            os.replace(tmp, manifest_path)
+            status[stage.name] = "ran"
+        return status
+
+    def load(self, name: str) -> Any:
+        return ARTIFACT_KINDS[self._by_name[name].kind].load(self.path(name))
+
+
+def load_artifact(name: str, artifacts_dir: str = DEFAULT_ARTIFACTS_DIR) -> Any:
+    """Saved output of a pipeline stage, without running anything.
+
+    Frames and backtest results come back memory-mapped read-only.
+    """
+    root = Path(artifacts_dir)
+    entry = _load_manifest(root / MANIFEST_NAME).get(name)
+    if entry is None or not ARTIFACT_KINDS[entry["kind"]].exists(root / name):
+        raise FileNotFoundError(f"No artifact {name!r} under {root}; build it with `python -m src.cli pipeline`.")
+    return ARTIFACT_KINDS[entry["kind"]].load(root / name)
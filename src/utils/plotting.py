@@ -6,11 +6,15 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from src.strategies.weights import WeightEvents
+from src.utils.profiling import profiled
+
 
 def ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
 
+@profiled("plot.cumulative_returns")
 def plot_cumulative_returns(ret_df: pd.DataFrame, out_path: str) -> None:
     ensure_dir(Path(out_path).parent.as_posix())
     cum = (1 + ret_df).cumprod()
@@ -23,6 +27,7 @@ def plot_cumulative_returns(ret_df: pd.DataFrame, out_path: str) -> None:
     plt.close()
 
 
+@profiled("plot.drawdowns")
 def plot_drawdowns(ret_df: pd.DataFrame, out_path: str) -> None:
     ensure_dir(Path(out_path).parent.as_posix())
     fig, ax = plt.subplots(figsize=(10, 5))
@@ -38,6 +43,7 @@ def plot_drawdowns(ret_df: pd.DataFrame, out_path: str) -> None:
     plt.close()
 
 
+@profiled("plot.rolling_vol")
 def plot_rolling_vol(ret_df: pd.DataFrame, window: int, out_path: str) -> None:
     ensure_dir(Path(out_path).parent.as_posix())
     ann_factor = np.sqrt(252)
@@ -49,9 +55,14 @@ def plot_rolling_vol(ret_df: pd.DataFrame, window: int, out_path: str) -> None:
     plt.close()
 
 
-def plot_weights(weights: pd.DataFrame, title: str, out_path: str) -> None:
+@profiled("plot.weights")
+def plot_weights(weights: WeightEvents, title: str, out_path: str) -> None:
     ensure_dir(Path(out_path).parent.as_posix())
-    weights.plot.area(figsize=(10, 5))
+    # two vertices per rebalance trace fixed weights; a drifting book needs one per day
+    x, y = weights.step_points()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.stackplot(x, y.T, labels=[str(c) for c in weights.columns])
+    ax.legend(loc="upper left")
     plt.title(title)
     plt.ylabel("Weight")
     plt.tight_layout()
@@ -59,6 +70,7 @@ def plot_weights(weights: pd.DataFrame, title: str, out_path: str) -> None:
     plt.close()
 
 
+@profiled("plot.turnover")
 def plot_turnover(turnover: pd.DataFrame, out_path: str) -> None:
     ensure_dir(Path(out_path).parent.as_posix())
     fig, ax = plt.subplots(figsize=(10, 5))
@@ -70,9 +82,10 @@ def plot_turnover(turnover: pd.DataFrame, out_path: str) -> None:
     plt.close()
 
 
+@profiled("plot.vol_target_diagnostic")
 def plot_vol_target_diagnostic(
     ret_df: pd.DataFrame,
-    weights: pd.DataFrame,
+    weights: WeightEvents,
     target_vol: float,
     out_path: str,
     window: int = 63,
@@ -80,13 +93,17 @@ def plot_vol_target_diagnostic(
     ensure_dir(Path(out_path).parent.as_posix())
     ann_factor = np.sqrt(252)
     vol = ret_df["vol_target"].rolling(window).std() * ann_factor
-    leverage = weights.sum(axis=1)
+    # per rebalance for fixed weights, per day once the book drifts
+    leverage = weights.gross()
+    if len(leverage):
+        # hold the last exposure through the final date
+        leverage.loc[weights.index[-1]] = leverage.iloc[-1]
     fig, ax1 = plt.subplots(figsize=(10, 5))
     ax1.plot(vol.index, vol, label="Realized Vol", color="tab:blue")
     ax1.axhline(target_vol, color="black", linestyle="--", label="Target Vol")
     ax1.set_ylabel("Volatility")
     ax2 = ax1.twinx()
-    ax2.plot(leverage.index, leverage, color="tab:orange", label="Gross Exposure")
+    ax2.step(leverage.index, leverage, where="post", color="tab:orange", label="Gross Exposure")
     ax2.set_ylabel("Leverage")
     ax1.legend(loc="upper left")
     ax2.legend(loc="upper right")
@@ -0,0 +1,146 @@
+"""Lightweight timing hooks for the backtest hot path.
+
+Hooks are no-ops until a Profiler is enabled: timed() then returns a shared
+null context and record() returns immediately, so leaving them in place costs
+one global lookup per call. When enabled, spans and counters are collected in
+memory and can be summarised per stage or written as a Chrome trace file
+(loadable in chrome://tracing or Perfetto).
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+_ACTIVE: Optional["Profiler"] = None
+_NULL = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "args", "start")
+
+    def __init__(self, profiler: "Profiler", name: str, args: Dict[str, object]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        self.profiler.spans.append((self.name, self.start, end - self.start, threading.get_ident(), self.args))
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.origin = time.perf_counter_ns()
+        self.spans: List[Tuple[str, int, int, int, Dict[str, object]]] = []
+        self.counters: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+    def span(self, name: str, args: Optional[Dict[str, object]] = None) -> _Span:
+        return _Span(self, name, args or {})
+
+    def count(self, name: str, value: float) -> None:
+        self.counters[name].append((time.perf_counter_ns(), float(value)))
+
+    def summary(self) -> pd.DataFrame:
+        """One row per timed stage (seconds) and per counter (recorded values)."""
+        rows = []
+        durations: Dict[str, List[int]] = defaultdict(list)
+        for name, _, dur, _, _ in self.spans:
+            durations[name].append(dur)
+        for name, durs in durations.items():
+            total = sum(durs) / 1e9
+            rows.append(
+                {"name": name, "kind": "time_s", "calls": len(durs), "total": total, "mean": total / len(durs), "max": max(durs) / 1e9}
+            )
+        for name, samples in self.counters.items():
+            values = [v for _, v in samples]
+            rows.append(
+                {"name": name, "kind": "count", "calls": len(values), "total": sum(values), "mean": sum(values) / len(values), "max": max(values)}
+            )
+        table = pd.DataFrame(rows, columns=["name", "kind", "calls", "total", "mean", "max"])
+        return table.sort_values(["kind", "total"], ascending=[False, False]).reset_index(drop=True)
+
+    def trace_events(self) -> List[Dict[str, object]]:
+        pid = os.getpid()
+        events: List[Dict[str, object]] = []
+        for name, start, dur, tid, args in self.spans:
+            events.append(
+                {"name": name, "ph": "X", "ts": (start - self.origin) / 1e3, "dur": dur / 1e3, "pid": pid, "tid": tid, "args": args}
+            )
+        for name, samples in self.counters.items():
+            for ts, value in samples:
+                events.append({"name": name, "ph": "C", "ts": (ts - self.origin) / 1e3, "pid": pid, "args": {"value": value}})
+        return sorted(events, key=lambda e: e["ts"])
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w") as fh:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, fh)
+
+
+def enable() -> Profiler:
+    global _ACTIVE
+    _ACTIVE = Profiler()
+    return _ACTIVE
+
+
+def disable() -> Optional[Profiler]:
+    global _ACTIVE
+    profiler, _ACTIVE = _ACTIVE, None
+    return profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _ACTIVE
+
+
+@contextlib.contextmanager
+def profiling():
+    """Enable profiling for the duration of a with-block and yield the Profiler."""
+    previous = _ACTIVE
+    profiler = enable()
+    try:
+        yield profiler
+    finally:
+        globals()["_ACTIVE"] = previous
+
+
+def timed(name: str, **args: object):
+    """Context manager timing a stage when profiling is enabled."""
+    profiler = _ACTIVE
+    if profiler is None:
+        return _NULL
+    return profiler.span(name, args)
+
+
+def record(name: str, value: float) -> None:
+    """Record a counter sample (e.g. solver iterations) when profiling is enabled."""
+    profiler = _ACTIVE
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def profiled(name: str) -> Callable:
+    """Decorator timing every call of a function under name."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _ACTIVE
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with profiler.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
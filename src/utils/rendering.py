@@ -0,0 +1,144 @@
+"""Incremental, parallel rendering of report figures.
+
+Each figure is described by a FigureSpec naming a function in
+src.utils.plotting and its inputs. A figure is redrawn only when the hash of
+its inputs, parameters and plotting code differs from the one recorded for
+the existing PNG; the rest are drawn in a process pool whose workers use
+the Agg backend. Serial rendering draws in the calling process and leaves
+its backend alone, so a notebook or GUI session keeps its own.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.profiling import timed
+
+MANIFEST_NAME = ".render_manifest.json"
+
+
+@dataclass
+class FigureSpec:
+    filename: str
+    plot: str
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+def _update(h: Any, obj: Any) -> None:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        # values, dates and labels all end up on the figure
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        names = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        h.update(repr(list(names)).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype.str}:{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, pd.Index):
+        h.update(pd.util.hash_pandas_object(obj).values.tobytes())
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        # e.g. WeightEvents: hash the stored fields, not the repr
+        h.update(type(obj).__name__.encode())
+        for f in fields(obj):
+            if f.compare:
+                h.update(f.name.encode())
+                _update(h, getattr(obj, f.name))
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            h.update(repr(key).encode())
+            _update(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _update(h, item)
+    else:
+        h.update(repr(obj).encode())
+
+
+def content_hash(*objs: Any) -> str:
+    """Digest of frames (with labels), arrays, dataclasses and plain containers."""
+    h = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+
+def figure_hash(spec: FigureSpec) -> str:
+    from src.utils import plotting
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(spec.plot.encode())
+    h.update(inspect.getsource(getattr(plotting, spec.plot)).encode())
+    _update(h, spec.args)
+    _update(h, spec.kwargs)
+    return h.hexdigest()
+
+
+def _use_headless_backend() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render(spec: FigureSpec, out_path: str) -> str:
+    from src.utils import plotting
+
+    getattr(plotting, spec.plot)(*spec.args, out_path=out_path, **spec.kwargs)
+    return out_path
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, str]:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+
+def render_figures(
+    specs: Sequence[FigureSpec],
+    out_dir: str,
+    n_jobs: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """Render the figures whose inputs changed; returns filename -> "rendered" | "cached"."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out)
+
+    status: Dict[str, str] = {}
+    todo: List[FigureSpec] = []
+    hashes: Dict[str, str] = {}
+    for spec in specs:
+        digest = figure_hash(spec)
+        hashes[spec.filename] = digest
+        if not force and manifest.get(spec.filename) == digest and (out / spec.filename).exists():
+            status[spec.filename] = "cached"
+        else:
+            todo.append(spec)
+
+    with timed("render", figures=len(todo)):
+        n_jobs = min(n_jobs or os.cpu_count() or 1, len(todo))
+        if n_jobs <= 1:
+            for spec in todo:
+                _render(spec, str(out / spec.filename))
+        elif todo:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_use_headless_backend) as pool:
+                list(pool.map(_render, todo, [str(out / s.filename) for s in todo]))
+
+    for spec in todo:
+        manifest[spec.filename] = hashes[spec.filename]
+        status[spec.filename] = "rendered"
+    tmp = out / f"{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, out / MANIFEST_NAME)
+    return status
@@ -1,6 +1,26 @@
 import sys
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def make_returns():
+    """Factory for synthetic daily returns: i.i.d. normal draws on business days.
+
+    Columns are A0, A1, ... unless given, in which case they set the number of assets.
+    """
+
+    def make(n_obs=200, n_assets=4, seed=0, loc=0.0004, scale=0.01, start="2020-01-01", columns=None):
+        columns = [f"A{i}" for i in range(n_assets)] if columns is None else list(columns)
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range(start, periods=n_obs)
+        return pd.DataFrame(rng.normal(loc, scale, size=(n_obs, len(columns))), index=dates, columns=columns)
+
+    return make
@@ -1,7 +1,8 @@
 import numpy as np
 import pandas as pd
+import pytest
 
-from src.strategies.backtest import run_backtest
+from src.strategies.backtest import account_rebalances, rebalance_schedule, run_backtest, should_rebalance
 
 
 def test_backtest_runs_and_applies_costs():
@@ -22,3 +23,69 @@ def test_backtest_runs_and_applies_costs():
 
     # metrics computed for each strategy
     assert len(res.metrics) == 5
+
+
+def test_rebalance_schedule_matches_should_rebalance():
+    for window, freq in [(30, "monthly"), (3, "monthly"), (70, "weekly"), (10, "quarterly"), (10, "daily")]:
+        expected, last = [], 0
+        for i in range(window, 200):
+            if should_rebalance(i, freq, last):
+                expected.append(i)
+                last = i
+        assert list(rebalance_schedule(200, window, freq)) == expected
+
+
+def test_backtest_with_factor_covariance():
+    rng = np.random.default_rng(8)
+    dates = pd.date_range("2020-01-01", periods=80, freq="B")
+    returns = pd.DataFrame(rng.normal(0.0003, 0.01, size=(80, 12)), index=dates)
+    res = run_backtest(returns, window=40, cov_method="factor", solver="active_set")
+    assert not res.returns.isna().any().any()
+    assert np.allclose(res.weights["min_variance"].iloc[-1].sum(), 1.0)
+
+
+def _drift_loop(values, offsets, events, tc):
+    """Day-by-day reference: the book drifts with returns and is reset at each event."""
+    book = np.zeros(values.shape[1])
+    out, turnover = np.zeros(len(values)), np.zeros(len(values))
+    starts = dict(zip(offsets, events))
+    for t, x in enumerate(values):
+        if t in starts:
+            turnover[t] = np.abs(starts[t] - book).sum()
+            book = starts[t].copy()
+        clean = np.nan_to_num(x)
+        gross = book @ clean
+        out[t] = (gross if np.isfinite(x).all() else np.nan) - tc * turnover[t]
+        book = book * (1 + clean) / (1 + gross)
+    return out, turnover
+
+
+def test_drift_accounting_matches_daily_loop():
+    rng = np.random.default_rng(3)
+    values = rng.normal(0.0005, 0.02, size=(60, 4))
+    values[17, 2] = np.nan
+    offsets = np.array([0, 10, 25, 44])
+    events = rng.dirichlet(np.ones(4), size=4) * 1.2
+    returns_hist, turnover_hist, before, _ = account_rebalances(values, offsets, {"s": events}, tc=0.001)
+
+    expected, expected_turnover = _drift_loop(values, offsets, events, 0.001)
+    np.testing.assert_allclose(returns_hist["s"], expected, atol=1e-14)
+    np.testing.assert_allclose(turnover_hist["s"], expected_turnover, atol=1e-14)
+    assert np.isnan(returns_hist["s"][17])
+    # the book ahead of an event is the previous event's weights grown and renormalised
+    assert before["s"][1].sum() == pytest.approx(1.2, rel=1e-2)
+    assert not np.allclose(before["s"][1], events[0])
+
+
+def test_fixed_accounting_holds_weights_constant():
+    rng = np.random.default_rng(4)
+    values = rng.normal(0.0, 0.01, size=(30, 3))
+    events = np.array([[0.2, 0.3, 0.5], [0.5, 0.5, 0.0]])
+    returns_hist, turnover_hist, _, growth = account_rebalances(values, np.array([5, 20]), {"s": events}, tc=0.0, accounting="fixed")
+
+    np.testing.assert_allclose(returns_hist["s"][:5], 0.0)
+    np.testing.assert_allclose(returns_hist["s"][5:20], values[5:20] @ events[0])
+    np.testing.assert_allclose(turnover_hist["s"][[5, 20]], [1.0, 1.0])
+    assert growth is None
+    with pytest.raises(ValueError):
+        run_backtest(pd.DataFrame(values), window=10, accounting="buy_and_hold")
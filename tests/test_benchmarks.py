@@ -0,0 +1,22 @@
+from benchmarks.scaling import BenchRecord, compare, load_results, run_suite, synthetic_returns, write_results
+
+
+def test_synthetic_panel_shape():
+    rets = synthetic_returns(12, 60, seed=1)
+    assert rets.shape == (60, 12)
+    assert not rets.isna().any().any()
+
+
+def test_suite_round_trip_and_regression_flag(tmp_path):
+    records = run_suite(assets=[5], lengths=[80], stages=["shrinkage_covariance", "risk_parity"], repeat=1)
+    assert {r.stage for r in records} == {"shrinkage_covariance", "risk_parity"}
+
+    path = tmp_path / "bench.json"
+    write_results(records, str(path))
+    assert load_results(str(path)) == records
+
+    base = [BenchRecord("ensure_psd", 50, 252, 0.010, 3), BenchRecord("risk_parity", 50, 252, 0.010, 3)]
+    cur = [BenchRecord("ensure_psd", 50, 252, 0.011, 3), BenchRecord("risk_parity", 50, 252, 0.020, 3)]
+    table = compare(base, cur, threshold=0.25).set_index("stage")
+    assert not table.loc["ensure_psd", "regression"]
+    assert table.loc["risk_parity", "regression"]
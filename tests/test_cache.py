@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import rebalance_schedule, run_backtest
+from src.strategies.cache import ResultCache, content_key
+
+
+def test_content_key_depends_on_contents_not_identity():
+    a = np.arange(12.0).reshape(4, 3)
+    assert content_key(a, "ewma") == content_key(a.copy(), "ewma")
+    assert content_key(a, "ewma") != content_key(a, "sample")
+    assert content_key(a) != content_key(a.T)
+    frame = pd.DataFrame(a, index=pd.date_range("2020-01-01", periods=4))
+    assert content_key(frame) == content_key(a)
+
+    def estimator(x):
+        return x
+
+    before = content_key(estimator, a)
+
+    # same qualified name, edited body
+    def estimator(x):
+        return 2 * x
+
+    assert content_key(estimator, a) != before
+
+
+def test_memory_lru_and_disk_tier(tmp_path):
+    cache = ResultCache(max_bytes=3 * 800, disk_dir=str(tmp_path), disk_max_bytes=10**9)
+    for i in range(4):
+        cache.put(f"k{i}", np.full(100, float(i)))
+    assert len(cache) == 3
+    # evicted from memory but still served from disk, read-only
+    value = cache.get("k0")
+    assert value[0] == 0.0 and not value.flags.writeable
+
+    fresh = ResultCache(disk_dir=str(tmp_path))
+    assert fresh.get("k3")[0] == 3.0
+    assert fresh.get("missing") is None and fresh.misses == 1
+
+    # entries written by other code are not served
+    assert ResultCache(disk_dir=str(tmp_path), code_version="edited").get("k3") is None
+
+    small = ResultCache(disk_dir=str(tmp_path), disk_max_bytes=1000)
+    small.put("big", np.zeros(100))
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+
+def test_backtest_reuses_cached_covariances_and_weights():
+    rng = np.random.default_rng(9)
+    dates = pd.date_range("2020-01-01", periods=100, freq="B")
+    returns = pd.DataFrame(rng.normal(0.0004, 0.01, size=(100, 4)), index=dates, columns=list("ABCD"))
+
+    plain = run_backtest(returns, window=40, cov_method="ewma")
+    cache = ResultCache()
+    first = run_backtest(returns, window=40, cov_method="ewma", cache=cache)
+    misses = cache.misses
+    second = run_backtest(returns, window=40, cov_method="ewma", gamma=3.0, cache=cache)
+
+    pd.testing.assert_frame_equal(first.returns, plain.returns)
+    # only the mean-variance solves depend on gamma
+    assert cache.misses - misses == len(rebalance_schedule(len(returns), 40, "monthly"))
+    assert second.metrics.loc["min_variance"].equals(first.metrics.loc["min_variance"])
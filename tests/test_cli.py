@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.startup import heavy_imports
+from src.cli.__main__ import build_parser, main
+
+
+def test_parser_does_not_import_numeric_stack():
+    assert heavy_imports() == []
+
+
+def test_subcommands_share_data_arguments():
+    parser = build_parser()
+    args = parser.parse_args(["backtest", "--tickers", "AAA", "BBB", "--window", "20", "--no_report"])
+    assert args.command == "backtest"
+    assert args.tickers == ["AAA", "BBB"] and args.window == 20 and args.no_report
+    args = parser.parse_args(["sweep", "--gamma", "1", "5"])
+    assert args.gamma == [1.0, 5.0]
+
+
+def test_backtest_then_report(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2020-01-01", periods=120)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(120, 3)), axis=0)), index=dates, columns=["A", "B", "C"])
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    prices.to_csv(tmp_path / "data" / "raw" / "prices.csv")
+    monkeypatch.chdir(tmp_path)
+
+    main(["backtest", "--tickers", "A", "B", "C", "--window", "40", "--strategies", "equal_weight", "--no_report"])
+    assert (tmp_path / "reports" / "backtest_result.pkl").exists()
+    assert not (tmp_path / "reports" / "metrics.csv").exists()
+
+    main(["report", "--render_jobs", "1"])
+    metrics = pd.read_csv(tmp_path / "reports" / "metrics.csv", index_col=0)
+    assert list(metrics.index) == ["equal_weight"]
+    assert (tmp_path / "reports" / "figures" / "cumulative_returns.png").exists()
@@ -1,7 +1,21 @@
+import pickle
+
 import numpy as np
 import pandas as pd
 
-from src.strategies.covariance import ewma_covariance, sample_covariance, shrinkage_covariance
+from src.strategies.allocations import apply_vol_targeting, mean_variance_weights, min_variance_weights, risk_parity_weights
+from src.strategies.covariance import (
+    CovarianceMatrix,
+    RollingCovariance,
+    covariance_from_moment,
+    ensure_psd,
+    ewma_covariance,
+    ewma_moment,
+    factor_covariance,
+    sample_covariance,
+    shrinkage_covariance,
+    stacked_covariance,
+)
 
 
 def _psd(matrix: np.ndarray, tol: float = 1e-8) -> bool:
@@ -21,3 +35,168 @@ def test_covariance_shapes_and_psd():
     for mat in [sample, ewma, shrink]:
         assert mat.shape == (4, 4)
         assert _psd(mat)
+
+
+def test_rolling_covariance_matches_batch_estimators():
+    rng = np.random.default_rng(1)
+    data = rng.normal(0, 0.01, size=(120, 5))
+    rets = pd.DataFrame(data, columns=list("ABCDE"))
+    window = 40
+
+    estimators = {
+        "sample": (lambda w: sample_covariance(w)),
+        "ewma": (lambda w: ewma_covariance(w, lam=0.94)),
+        "shrinkage": (lambda w: shrinkage_covariance(w, shrinkage=0.1)),
+    }
+    for method, batch in estimators.items():
+        rolling = RollingCovariance(5, window, method=method)
+        for i, row in enumerate(data):
+            rolling.push(row)
+            if i + 1 >= window and (i + 1) % 7 == 0:
+                expected = batch(rets.iloc[i + 1 - window : i + 1])
+                np.testing.assert_allclose(rolling.covariance(), expected, rtol=1e-8, atol=1e-12)
+
+    rolling = RollingCovariance(5, window, method="sample")
+    rolling.update(data[:70])
+    np.testing.assert_allclose(rolling.values(), data[30:70])
+    np.testing.assert_allclose(rolling.mean(), data[30:70].mean(axis=0))
+
+
+def test_factor_covariance_products_match_dense_form():
+    rng = np.random.default_rng(4)
+    factors = rng.normal(0, 0.01, size=(150, 2))
+    loadings = rng.normal(1.0, 0.3, size=(40, 2))
+    data = factors @ loadings.T + rng.normal(0, 0.005, size=(150, 40))
+    rets = pd.DataFrame(data)
+
+    fc = factor_covariance(rets, n_factors=2)
+    dense = fc.to_dense()
+    assert fc.shape == (40, 40) and _psd(dense)
+    np.testing.assert_allclose(np.diag(dense), np.diag(sample_covariance(rets)), rtol=1e-10)
+
+    w = rng.dirichlet(np.ones(40))
+    np.testing.assert_allclose(fc @ w, dense @ w, rtol=1e-12)
+    np.testing.assert_allclose(w @ fc, dense @ w, rtol=1e-12)
+    assert np.isclose(w @ fc @ w, fc.quad(w))
+    np.testing.assert_allclose(fc.solve(w), np.linalg.solve(dense, w), rtol=1e-8)
+    idx = np.arange(0, 40, 3)
+    np.testing.assert_allclose(fc.solve(w[idx], idx), np.linalg.solve(dense[np.ix_(idx, idx)], w[idx]), rtol=1e-8)
+
+    mu = data.mean(axis=0)
+    np.testing.assert_allclose(
+        min_variance_weights(fc, solver="active_set"), min_variance_weights(dense, solver="active_set"), atol=1e-10
+    )
+    np.testing.assert_allclose(
+        mean_variance_weights(mu, fc, gamma=5.0, solver="active_set"),
+        mean_variance_weights(mu, dense, gamma=5.0, solver="active_set"),
+        atol=1e-10,
+    )
+    assert np.isclose(risk_parity_weights(fc).sum(), 1.0)
+
+
+def test_stacked_covariance_matches_single_windows():
+    rng = np.random.default_rng(6)
+    windows = rng.normal(0, 0.01, size=(4, 50, 5))
+    singles = {"sample": sample_covariance, "ewma": ewma_covariance, "shrinkage": shrinkage_covariance}
+    for method, single in singles.items():
+        stacked = stacked_covariance(windows, method=method)
+        for k in range(len(windows)):
+            np.testing.assert_allclose(stacked[k], single(pd.DataFrame(windows[k])), rtol=1e-10, atol=1e-14)
+
+
+def test_moment_blocks_give_sub_universe_estimates():
+    rng = np.random.default_rng(6)
+    rets = pd.DataFrame(rng.normal(0, 0.01, size=(60, 6)), columns=list("ABCDEF"))
+    idx = np.array([4, 0, 2])
+    sub = rets.iloc[:, idx]
+    moments = {"sample": np.asarray(rets.cov()), "shrinkage": np.asarray(rets.cov()), "ewma": ewma_moment(rets)}
+    expected = {"sample": sample_covariance(sub), "shrinkage": shrinkage_covariance(sub), "ewma": ewma_covariance(sub)}
+    for method, moment in moments.items():
+        block = covariance_from_moment(moment[np.ix_(idx, idx)], method)
+        np.testing.assert_allclose(block, expected[method], rtol=1e-12, atol=1e-15)
+
+        rolling = RollingCovariance(6, 60, method=method)
+        rolling.update(rets.values)
+        np.testing.assert_allclose(covariance_from_moment(rolling.moment(), method), rolling.covariance(), atol=1e-15)
+
+
+def test_ensure_psd_skips_eigendecomposition_when_positive_definite():
+    rng = np.random.default_rng(8)
+    data = rng.normal(0, 0.01, size=(200, 30))
+    shrink = shrinkage_covariance(pd.DataFrame(data))
+    assert isinstance(shrink, CovarianceMatrix) and not shrink.repaired
+    sample = np.cov(data.T)
+    moment = 0.9 * sample + 0.1 * np.diag(np.diag(sample))
+    eigvals, eigvecs = np.linalg.eigh(moment)
+    np.testing.assert_allclose(shrink, (eigvecs * eigvals) @ eigvecs.T, rtol=1e-12, atol=1e-18)
+
+    # fewer rows than assets: clipping is needed and the eigenpairs are kept
+    short = ensure_psd(np.cov(data[:20].T))
+    assert short.repaired and np.linalg.eigvalsh(short).min() > 1e-6 - 1e-12
+
+    for cov in (shrink, short, shrink.scaled(4.0)):
+        dense = np.asarray(cov)
+        b = rng.normal(size=30)
+        np.testing.assert_allclose(cov.solve(b), np.linalg.solve(dense, b), rtol=1e-10)
+        assert np.isclose(cov.quad(b), b @ dense @ b, rtol=1e-12)
+        for idx in (np.arange(2, 30), np.arange(0, 30, 4)):
+            expected = np.linalg.solve(dense[np.ix_(idx, idx)], b[idx])
+            np.testing.assert_allclose(cov.solve(b[idx], idx), expected, rtol=1e-10)
+    assert shrink.scaled(4.0).cholesky() is shrink.cholesky()
+
+    # arithmetic gives plain arrays; copies from a cache or pickle start unfactored
+    assert type(2.0 * shrink) is np.ndarray and type(shrink @ b) is np.ndarray
+    restored = pickle.loads(pickle.dumps(shrink))
+    assert isinstance(restored, CovarianceMatrix) and restored._chol is None
+    np.testing.assert_array_equal(restored, shrink)
+
+
+def test_optimizers_reuse_covariance_factorization():
+    rng = np.random.default_rng(9)
+    data = rng.normal(0.0005, 0.01, size=(150, 12))
+    cov = shrinkage_covariance(pd.DataFrame(data))
+    dense, mu = np.asarray(cov), data.mean(axis=0)
+    np.testing.assert_allclose(min_variance_weights(cov, solver="active_set"), min_variance_weights(dense, solver="active_set"), atol=1e-12)
+    np.testing.assert_allclose(
+        mean_variance_weights(mu, cov, gamma=5.0, solver="active_set"),
+        mean_variance_weights(mu, dense, gamma=5.0, solver="active_set"),
+        atol=1e-12,
+    )
+    assert cov.cholesky() is not None
+    np.testing.assert_allclose(risk_parity_weights(cov), risk_parity_weights(dense), atol=1e-12)
+
+    w = np.ones(12) / 12
+    info = apply_vol_targeting(w, data, target_vol=0.05, lmax=10.0, cov=cov)
+    assert np.isclose(info["leverage"], 0.05 / (np.sqrt(252 * w @ dense @ w) + 1e-8))
+
+
+def test_ensure_psd_keeps_its_cholesky_factor(monkeypatch):
+    import src.strategies.covariance as covariance
+
+    calls = []
+
+    def count(owner, name):
+        fn = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            calls.append(name)
+            return fn(*args, **kwargs)
+
+        monkeypatch.setattr(owner, name, wrapper)
+
+    count(covariance, "dpotrf")
+    count(covariance, "cho_factor")
+    count(np.linalg, "cholesky")
+
+    rng = np.random.default_rng(10)
+    data = rng.normal(0.0005, 0.01, size=(150, 12))
+    cov = shrinkage_covariance(pd.DataFrame(data))
+    assert calls == ["dpotrf"] and not cov.repaired
+
+    dense, b = np.asarray(cov), rng.normal(size=12)
+    np.testing.assert_allclose(cov.solve(b), np.linalg.solve(dense, b), rtol=1e-10)
+    np.testing.assert_allclose(cov.scaled(5.0).solve(b), np.linalg.solve(5.0 * dense, b), rtol=1e-10)
+    assert np.isclose(cov.quad(b), b @ dense @ b, rtol=1e-12)
+    w = min_variance_weights(cov, solver="active_set")
+    assert np.all(w > 0) and np.isclose(w.sum(), 1.0)
+    assert calls == ["dpotrf"]
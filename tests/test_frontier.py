@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.allocations import mean_variance_weights, min_variance_weights
+from src.strategies.backtest import run_backtest
+from src.strategies.covariance import factor_covariance, shrinkage_covariance
+from src.strategies.frontier import efficient_frontier, frontier_segments
+
+
+def _inputs(n_assets=12, n_obs=150, seed=9):
+    rng = np.random.default_rng(seed)
+    mix = rng.normal(0, 1, size=(n_assets, n_assets)) / np.sqrt(n_assets)
+    rets = pd.DataFrame(rng.normal(0.0005, 0.01, size=(n_obs, n_assets)) @ mix)
+    return rets, rets.mean().values
+
+
+def test_frontier_matches_single_solves():
+    rets, mu = _inputs()
+    gammas = np.geomspace(0.5, 200, 25)
+    for cov in (shrinkage_covariance(rets), factor_covariance(rets, n_factors=3)):
+        frontier = efficient_frontier(mu, cov, gammas)
+        for gamma, w in zip(gammas, frontier.weights):
+            expected = mean_variance_weights(mu, cov, gamma=gamma, solver="active_set")
+            np.testing.assert_allclose(w, expected, atol=1e-8)
+        np.testing.assert_allclose(frontier.expected_returns, frontier.weights @ mu)
+        # lower risk aversion buys return with volatility
+        assert np.all(np.diff(frontier.expected_returns) <= 1e-12)
+        assert np.all(np.diff(frontier.volatilities) <= 1e-12)
+
+
+def test_frontier_corners_span_min_variance_to_max_return():
+    rets, mu = _inputs()
+    cov = shrinkage_covariance(rets)
+    corners = efficient_frontier(mu, cov, gammas=None)
+    assert np.isinf(corners.gammas[0])
+    np.testing.assert_allclose(corners.weights[0], min_variance_weights(cov, solver="active_set"), atol=1e-8)
+    assert corners.weights[-1].argmax() == mu.argmax()
+    assert len(frontier_segments(mu, cov)) == len(corners.gammas)
+    with pytest.raises(ValueError):
+        efficient_frontier(mu, cov, [0.0, 1.0])
+
+
+def test_backtest_stores_frontier_per_rebalance():
+    rets, _ = _inputs(n_assets=5, n_obs=120)
+    rets.index = pd.date_range("2021-01-01", periods=len(rets), freq="B")
+    gammas = [2.0, 10.0, 50.0]
+    res = run_backtest(rets, window=60, rebalance="monthly", solver="active_set", strategies=["mean_variance"], frontier_gammas=gammas)
+
+    frontiers = res.frontiers
+    assert frontiers.weights.shape == (len(res.events["mean_variance"]), 3, 5)
+    assert frontiers.dates.equals(res.events["mean_variance"].dates)
+    # the gamma=10 frontier point is the mean-variance strategy's own allocation
+    np.testing.assert_allclose(frontiers.weights[:, 1], res.events["mean_variance"].values, atol=1e-8)
+    assert frontiers.summary().shape == (len(frontiers.dates) * 3, 2)
+    assert run_backtest(rets, window=60, strategies=["equal_weight"]).frontiers is None
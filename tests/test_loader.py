@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from src.data.loader import compute_log_returns, csv_fetcher, load_frame, load_prices_and_returns
+
+
+def _write_prices(path, periods):
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2021-01-01", periods=60, freq="B")
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(60, 3)), axis=0)),
+        index=dates,
+        columns=["AAA", "BBB", "CCC"],
+    )
+    prices.iloc[:periods].to_csv(path)
+    return prices
+
+
+def test_npy_cache_is_memory_mapped_and_updates_incrementally(tmp_path):
+    source = tmp_path / "source.csv"
+    full = _write_prices(source, periods=40)
+    kwargs = dict(
+        tickers=["AAA", "BBB", "CCC"],
+        start="2021-01-01",
+        end="2021-12-31",
+        price_path=str(tmp_path / "raw" / "prices.csv"),
+        returns_path=str(tmp_path / "processed" / "returns.csv"),
+        fetcher=csv_fetcher(str(source)),
+        cache_format="npy",
+    )
+
+    prices, returns = load_prices_and_returns(**kwargs)
+    assert len(prices) == 40 and len(returns) == 39
+    cached = load_frame(kwargs["returns_path"], "npy")
+    base = cached.values
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+    # new bars arrive at the source; the cache is extended rather than rebuilt
+    _write_prices(source, periods=60)
+    prices, returns = load_prices_and_returns(update=True, **kwargs)
+    assert len(prices) == 60
+    expected = compute_log_returns(full, returns_path=None)
+    pd.testing.assert_frame_equal(returns, expected, check_freq=False)
+
+    reloaded = load_frame(kwargs["returns_path"], "npy")
+    np.testing.assert_allclose(reloaded.values, expected.values)
+    assert (reloaded.index == expected.index).all()
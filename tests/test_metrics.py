@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.metrics import bootstrap_ci, compute_metrics, compute_metrics_table, rolling_drawdown, rolling_sharpe, rolling_volatility
+
+
+@pytest.fixture
+def panel(make_returns):
+    returns = make_returns(500, seed=21, columns="abc")
+    turnover = pd.DataFrame(np.random.default_rng(22).uniform(0, 0.2, size=returns.shape), index=returns.index, columns=returns.columns)
+    return returns, turnover
+
+
+def test_metrics_table_matches_per_series_metrics(panel):
+    returns, turnover = panel
+    table = compute_metrics_table(returns, turnover, target_vol=0.12)
+    for col in returns.columns:
+        expected = compute_metrics(returns[col], turnover[col], target_vol=0.12)
+        pd.testing.assert_series_equal(table.loc[col], expected, check_names=False, rtol=1e-10)
+
+
+def test_rolling_series_shapes(panel):
+    returns, _ = panel
+    sharpe = rolling_sharpe(returns, window=63)
+    dd = rolling_drawdown(returns, window=63)
+    assert sharpe.shape == returns.shape and sharpe.iloc[:62].isna().all().all()
+    assert (dd <= 0).all().all()
+    # the two rolling figures use the same (sample) volatility
+    np.testing.assert_allclose(sharpe * rolling_volatility(returns, window=63), returns.rolling(63).mean() * 252)
+
+
+def test_bootstrap_intervals(panel):
+    returns, turnover = panel
+    ci = bootstrap_ci(returns, n_boot=500, block=20, seed=1)
+    point = compute_metrics_table(returns, turnover)
+    assert (ci["Sharpe_lo"] < point["Sharpe"]).all() and (point["Sharpe"] < ci["Sharpe_hi"]).all()
+    assert (ci["CAGR_lo"] < ci["CAGR_hi"]).all()
+
+    # a single block spanning the whole history reproduces the original path
+    whole = bootstrap_ci(returns, n_boot=10, block=len(returns))
+    np.testing.assert_allclose(whole["Sharpe_lo"], point["Sharpe"], rtol=1e-8)
+    np.testing.assert_allclose(whole["CAGR_hi"], point["CAGR"], rtol=1e-8)
@@ -1,6 +1,15 @@
 import numpy as np
 
-from src.strategies.allocations import equal_weight, mean_variance_weights, min_variance_weights, risk_parity_weights
+from src.strategies.allocations import (
+    equal_weight,
+    mean_variance_weights,
+    mean_variance_weights_batch,
+    min_variance_weights,
+    min_variance_weights_batch,
+    risk_parity_weights,
+    risk_parity_weights_batch,
+)
+from src.utils.profiling import profiling
 
 
 def test_weights_sum_to_one_and_nonnegative():
@@ -24,3 +33,94 @@ def test_weights_sum_to_one_and_nonnegative():
 
     # stability: risk parity should tilt toward lower variance asset
     assert w_rp[0] >= w_rp[2]
+
+
+def test_risk_parity_records_iterations_performed():
+    cov = np.diag([0.01, 0.02, 0.04])
+    with profiling() as profiler:
+        risk_parity_weights(np.eye(3))  # equal weight already balances risk
+        risk_parity_weights(cov, max_iter=2)
+    counts = profiler.summary().set_index("name").loc["risk_parity.iterations"]
+    assert counts["total"] == 3 and counts["max"] == 2
+
+
+def test_active_set_solver_matches_slsqp_and_warm_starts():
+    rng = np.random.default_rng(3)
+    data = rng.normal(0.0004, 0.01, size=(200, 6))
+    cov = np.cov(data.T)
+    mu = data.mean(axis=0)
+
+    w_slsqp = min_variance_weights(cov)
+    w_qp, info = min_variance_weights(cov, solver="active_set", return_info=True)
+    assert info.converged and info.status == "optimal"
+    assert np.isclose(w_qp.sum(), 1.0) and np.all(w_qp >= 0)
+    assert w_qp @ cov @ w_qp <= w_slsqp @ cov @ w_slsqp + 1e-12
+
+    w_mv = mean_variance_weights(mu, cov, gamma=5.0, solver="active_set")
+    obj = lambda w: -mu @ w + 2.5 * w @ cov @ w
+    assert obj(w_mv) <= obj(mean_variance_weights(mu, cov, gamma=5.0)) + 1e-12
+
+    # a warm start from the previous solution only needs to confirm the active set
+    cov_next = cov * 1.01 + 1e-7 * np.eye(6)
+    _, warm = min_variance_weights(cov_next, solver="active_set", w0=w_qp, return_info=True)
+    assert warm.converged and warm.iterations == 1
+
+
+def test_batched_risk_parity_matches_single_and_equalises_risk():
+    cov = np.array(
+        [
+            [0.01, 0.002, 0.001],
+            [0.002, 0.015, 0.003],
+            [0.001, 0.003, 0.02],
+        ]
+    )
+    rng = np.random.default_rng(5)
+    stack = [cov]
+    for _ in range(9):
+        data = rng.normal(0, 0.01, size=(120, 3)) * rng.uniform(0.5, 2.0, size=3)
+        stack.append(np.cov(data.T))
+    stack = np.array(stack)
+
+    w_batch = risk_parity_weights_batch(stack)
+    assert w_batch.shape == (10, 3)
+    np.testing.assert_allclose(w_batch[0], risk_parity_weights(cov), atol=1e-5)
+    np.testing.assert_allclose(risk_parity_weights_batch(cov), w_batch[0])
+
+    rc = w_batch * np.einsum("kij,kj->ki", stack, w_batch)
+    shares = rc / rc.sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(shares, 1.0 / 3.0, atol=1e-10)
+
+
+def test_batched_risk_parity_on_wide_universes():
+    rng = np.random.default_rng(8)
+    n = 120
+    vols = np.exp(rng.uniform(np.log(1e-3), np.log(0.2), size=n))
+    stack = []
+    for rho in (0.0, 0.6, 0.95):
+        corr = np.full((n, n), rho)
+        np.fill_diagonal(corr, 1.0)
+        stack.append(corr * np.outer(vols, vols))
+    stack = np.array(stack)
+
+    w, converged = risk_parity_weights_batch(stack, return_info=True)
+    assert converged.all() and (w > 0).all()
+    rc = w * np.einsum("kij,kj->ki", stack, w)
+    np.testing.assert_allclose(rc / rc.sum(axis=1, keepdims=True), 1.0 / n, rtol=1e-8)
+
+    # an exhausted iteration budget is reported, not passed off as converged
+    _, converged = risk_parity_weights_batch(stack, max_iter=1, return_info=True)
+    assert not converged.any()
+
+
+def test_batched_qp_weights_match_active_set():
+    rng = np.random.default_rng(12)
+    samples = rng.normal(size=(20, 40, 6)) * rng.uniform(0.5, 2.0, size=6)
+    covs = np.einsum("kti,ktj->kij", samples, samples) / 40
+    mu = rng.normal(0.0, 0.3, size=(20, 6))
+
+    w = min_variance_weights_batch(covs)
+    np.testing.assert_allclose(w, [min_variance_weights(c, solver="active_set") for c in covs], atol=1e-10)
+    w = mean_variance_weights_batch(mu, covs, gamma=5.0)
+    expected = [mean_variance_weights(m, c, gamma=5.0, solver="active_set") for m, c in zip(mu, covs)]
+    np.testing.assert_allclose(w, expected, atol=1e-10)
+    assert (w.min(axis=1) == 0).any()  # some problems needed the active-set fallback
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.backtest import run_backtest
+from src.strategies.storage import open_backtest, save_backtest
+from src.utils.pipeline import Pipeline, Stage, load_artifact
+
+CALLS = []
+
+
+def demean(returns, scale):
+    CALLS.append("demeaned")
+    return (returns - returns.mean()) * scale
+
+
+def backtest(returns, window):
+    CALLS.append("backtest")
+    return run_backtest(returns, window=window, rebalance="weekly", solver="active_set", strategies=["equal_weight", "min_variance"])
+
+
+def _pipeline(tmp_path, make_returns, seed=1, scale=1.0, window=40):
+    def simulate(seed):
+        CALLS.append("returns")
+        return make_returns(120, seed=seed)
+
+    return Pipeline(
+        [
+            Stage("returns", simulate, "frame", params={"seed": seed}),
+            Stage("demeaned", demean, "frame", deps=("returns",), params={"scale": scale}),
+            Stage("backtest", backtest, "backtest", deps=("returns",), params={"window": window}),
+        ],
+        str(tmp_path / "artifacts"),
+    )
+
+
+def test_only_changed_stages_rerun(tmp_path, make_returns):
+    CALLS.clear()
+    assert set(_pipeline(tmp_path, make_returns).run().values()) == {"ran"}
+    assert set(_pipeline(tmp_path, make_returns).run().values()) == {"cached"}
+
+    CALLS.clear()
+    status = _pipeline(tmp_path, make_returns, scale=2.0).run()
+    assert status == {"returns": "cached", "demeaned": "ran", "backtest": "cached"}
+    assert CALLS == ["demeaned"]
+
+    # same output from a forced rerun leaves the dependants cached
+    CALLS.clear()
+    status = _pipeline(tmp_path, make_returns, scale=2.0).run(force=["returns"])
+    assert status == {"returns": "ran", "demeaned": "cached", "backtest": "cached"}
+
+    status = _pipeline(tmp_path, make_returns, seed=2, scale=2.0).run(targets=["backtest"])
+    assert status == {"returns": "ran", "backtest": "ran"}
+
+    np.testing.assert_array_equal(load_artifact("returns", str(tmp_path / "artifacts")).to_numpy(), make_returns(120, seed=2).to_numpy())
+    with pytest.raises(FileNotFoundError):
+        load_artifact("missing", str(tmp_path / "artifacts"))
+
+
+def test_pipeline_rejects_unordered_dependencies(tmp_path, make_returns):
+    stages = _pipeline(tmp_path, make_returns).stages
+    with pytest.raises(ValueError):
+        Pipeline([stages[1], stages[0]], str(tmp_path))
+
+
+def test_saved_backtest_reopens_memory_mapped(tmp_path, make_returns):
+    result = run_backtest(make_returns(120, seed=5), window=40, rebalance="weekly", solver="active_set", frontier_gammas=[2.0, 10.0])
+    save_backtest(result, str(tmp_path / "bt"), {"window": 40})
+    reopened = open_backtest(str(tmp_path / "bt"))
+
+    assert isinstance(reopened.events["min_variance"].values.base, np.memmap)
+    assert not reopened.returns.values.flags.writeable
+    pd.testing.assert_frame_equal(reopened.returns, result.returns, check_freq=False)
+    pd.testing.assert_frame_equal(reopened.turnover, result.turnover, check_freq=False)
+    pd.testing.assert_frame_equal(reopened.metrics, result.metrics)
+    for name, events in result.events.items():
+        np.testing.assert_array_equal(reopened.events[name].values, events.values)
+        np.testing.assert_array_equal(reopened.events[name].offsets, events.offsets)
+    np.testing.assert_array_equal(reopened.frontiers.weights, result.frontiers.weights)
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import run_backtest
+from src.utils.profiling import get_profiler, profiling, record, timed
+
+
+def test_hooks_are_inert_when_disabled():
+    assert get_profiler() is None
+    with timed("noop"):
+        record("noop.count", 1)
+    assert get_profiler() is None
+
+
+def test_profiled_backtest_collects_stages_and_writes_trace(tmp_path):
+    rng = np.random.default_rng(12)
+    dates = pd.date_range("2020-01-01", periods=90, freq="B")
+    returns = pd.DataFrame(rng.normal(0.0004, 0.01, size=(90, 3)), index=dates, columns=["A", "B", "C"])
+
+    with profiling() as profiler:
+        run_backtest(returns, window=30, solver="active_set")
+    assert get_profiler() is None
+
+    summary = profiler.summary().set_index("name")
+    for stage in ["covariance", "allocator.min_variance", "allocator.risk_parity", "accounting", "metrics"]:
+        assert summary.loc[stage, "kind"] == "time_s"
+    assert summary.loc["covariance", "calls"] == 3
+    assert summary.loc["risk_parity.iterations", "kind"] == "count"
+    assert summary.loc["active_set.iterations", "calls"] == 6
+
+    path = tmp_path / "trace.json"
+    profiler.write_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert {e["ph"] for e in events} == {"X", "C"}
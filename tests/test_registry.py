@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.strategies.backtest import run_backtest
+from src.strategies.registry import available_strategies, register_strategy, unregister_strategy
+
+
+def test_custom_strategy_runs_alone_and_shares_covariance(make_returns):
+    seen = []
+
+    @register_strategy("inverse_vol_test")
+    def inverse_vol(ctx):
+        seen.append(id(ctx.cov))
+        w = 1.0 / np.sqrt(np.diag(ctx.cov))
+        return w / w.sum()
+
+    @register_strategy("cov_probe_test")
+    def cov_probe(ctx):
+        seen.append(id(ctx.cov))
+        return np.ones(ctx.n_assets) / ctx.n_assets
+
+    try:
+        assert "inverse_vol_test" in available_strategies()
+        with pytest.raises(ValueError):
+            register_strategy("inverse_vol_test", inverse_vol)
+
+        res = run_backtest(make_returns(90, seed=11, columns="ABC"), window=30, strategies=["risk_parity", "inverse_vol_test", "cov_probe_test"])
+        assert list(res.returns.columns) == ["risk_parity", "inverse_vol_test", "cov_probe_test"]
+        assert list(res.metrics.index) == ["risk_parity", "inverse_vol_test", "cov_probe_test"]
+        # both probes see the same covariance object at each rebalance
+        assert seen[0::2] == seen[1::2]
+        assert np.allclose(res.weights["inverse_vol_test"].iloc[-1].sum(), 1.0)
+    finally:
+        unregister_strategy("inverse_vol_test")
+        unregister_strategy("cov_probe_test")
+
+
+def test_unknown_strategy_raises(make_returns):
+    with pytest.raises(ValueError):
+        run_backtest(make_returns(90, seed=11, columns="ABC"), window=30, strategies=["no_such_strategy"])
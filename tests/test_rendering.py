@@ -0,0 +1,39 @@
+import matplotlib
+
+from src.utils.rendering import FigureSpec, figure_hash, render_figures
+
+
+def test_figures_are_reused_until_inputs_change(tmp_path, make_returns):
+    rets = make_returns(60, seed=0, loc=0.0, columns="ab")
+    specs = [
+        FigureSpec("cum.png", "plot_cumulative_returns", (rets,)),
+        FigureSpec("vol.png", "plot_rolling_vol", (rets,), {"window": 10}),
+    ]
+    assert render_figures(specs, str(tmp_path), n_jobs=1) == {"cum.png": "rendered", "vol.png": "rendered"}
+    assert (tmp_path / "cum.png").exists()
+    assert set(render_figures(specs, str(tmp_path), n_jobs=1).values()) == {"cached"}
+
+    changed = [specs[0], FigureSpec("vol.png", "plot_rolling_vol", (rets,), {"window": 20})]
+    assert render_figures(changed, str(tmp_path), n_jobs=1) == {"cum.png": "cached", "vol.png": "rendered"}
+
+    (tmp_path / "cum.png").unlink()
+    assert render_figures(changed, str(tmp_path), n_jobs=1)["cum.png"] == "rendered"
+
+
+def test_hash_covers_values_and_labels(make_returns):
+    rets = make_returns(60, seed=1, loc=0.0, columns="ab")
+    base = figure_hash(FigureSpec("x.png", "plot_drawdowns", (rets,)))
+    assert base == figure_hash(FigureSpec("x.png", "plot_drawdowns", (rets.copy(),)))
+    assert base != figure_hash(FigureSpec("x.png", "plot_drawdowns", (rets.rename(columns={"a": "c"}),)))
+    assert base != figure_hash(FigureSpec("x.png", "plot_drawdowns", (rets * 1.01,)))
+
+
+def test_serial_rendering_keeps_the_callers_backend(tmp_path, make_returns):
+    previous = matplotlib.get_backend()
+    matplotlib.use("svg")
+    try:
+        render_figures([FigureSpec("cum.png", "plot_cumulative_returns", (make_returns(60, seed=2, loc=0.0, columns="ab"),))], str(tmp_path), n_jobs=1)
+        assert matplotlib.get_backend() == "svg"
+    finally:
+        matplotlib.use(previous)
+    assert (tmp_path / "cum.png").exists()
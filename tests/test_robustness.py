@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from src.strategies.backtest import run_backtest
+from src.strategies.robustness import backtest_paths, block_bootstrap_paths, robustness_summary, run_robustness
+
+
+def test_batched_paths_match_run_backtest(make_returns):
+    returns = make_returns(200, seed=2, columns="ABCD")
+    rngs = [np.random.default_rng(i) for i in range(3)]
+    paths = block_bootstrap_paths(returns.to_numpy(), rngs, n_obs=150, block=10)
+    strategies = ["equal_weight", "min_variance", "mean_variance", "vol_target"]
+    names, path_returns, path_turnover = backtest_paths(paths, window=60, rebalance="weekly", tc_bps=10.0, strategies=strategies)
+
+    for j in range(len(paths)):
+        single = run_backtest(pd.DataFrame(paths[j]), window=60, rebalance="weekly", tc_bps=10.0, solver="active_set", strategies=strategies)
+        np.testing.assert_allclose(path_returns[j], single.returns[names].to_numpy(), atol=1e-10)
+        np.testing.assert_allclose(path_turnover[j], single.turnover[names].to_numpy(), atol=1e-10)
+
+
+def test_run_robustness_streams_and_ignores_batch_size(tmp_path, make_returns):
+    returns = make_returns(200, seed=2, columns="ABCD")
+    out = tmp_path / "paths.csv"
+    kwargs = dict(n_paths=9, window=60, strategies=["equal_weight", "risk_parity"], seed=4)
+    table = run_robustness(returns, batch_size=4, out_path=str(out), **kwargs)
+
+    assert len(table) == 18 and sorted(table["path"].unique()) == list(range(9))
+    pd.testing.assert_frame_equal(pd.read_csv(out), table, check_dtype=False)
+    pd.testing.assert_frame_equal(run_robustness(returns, batch_size=9, **kwargs), table)
+
+    summary = robustness_summary(table)
+    assert summary.loc[("risk_parity", 0.5), "Sharpe"] == table.loc[table.strategy == "risk_parity", "Sharpe"].median()
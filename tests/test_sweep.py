@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from src.strategies.backtest import run_backtest
+from src.strategies.sweep import expand_grid, run_sweep
+
+
+def test_expand_grid_rejects_unknown_keys():
+    assert len(expand_grid({"window": [20, 30], "gamma": [1.0, 5.0, 10.0]})) == 6
+    with pytest.raises(ValueError):
+        expand_grid({"windw": [20]})
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_sweep_matches_serial_backtests(n_jobs, make_returns):
+    returns = make_returns(80, seed=7, loc=0.0003, columns="ABC")
+    grid = {"window": [20, 30], "cov_method": ["sample", "shrinkage"]}
+    table = run_sweep(returns, grid, tc_bps=5.0, n_jobs=n_jobs)
+
+    assert len(table) == 4 * 5
+    assert list(table.columns[:3]) == ["window", "cov_method", "strategy"]
+
+    row = table[(table["window"] == 30) & (table["cov_method"] == "sample")].set_index("strategy")
+    expected = run_backtest(returns, window=30, cov_method="sample", tc_bps=5.0).metrics
+    np.testing.assert_allclose(row[expected.columns].values, expected.values)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.backtest import run_backtest
+from src.strategies.tuning import candidate_grid, walk_forward_tune
+
+VOLS = 0.01 * np.linspace(0.5, 2.0, 5)
+
+
+def test_candidate_grid_drops_unused_parameters():
+    cands = candidate_grid({"window": [60], "cov_method": ["sample", "ewma"], "lam": [0.9, 0.95], "shrinkage": [0.1, 0.2], "gamma": [5.0]})
+    assert cands == [(60, "sample", None, None, 5.0), (60, "ewma", 0.9, None, 5.0), (60, "ewma", 0.95, None, 5.0)]
+    with pytest.raises(ValueError):
+        candidate_grid({"alpha": [1]})
+
+
+def test_single_candidate_reproduces_backtest(make_returns):
+    returns = make_returns(400, 5, seed=9, scale=VOLS, start="2019-01-01")
+    grid = {"window": [60], "cov_method": ["shrinkage"], "shrinkage": [0.1], "gamma": [10.0]}
+    res = walk_forward_tune(returns, grid, n_folds=2, n_jobs=1)
+    start = 60 + 2 * 21
+    batch = run_backtest(returns.iloc[start - 60 :], window=60, solver="active_set", strategies=["mean_variance"])
+    np.testing.assert_allclose(res.backtest.returns["tuned_mean_variance"], batch.returns["mean_variance"], atol=1e-12)
+
+
+def test_choices_use_only_past_data_and_parallel_matches_serial(make_returns):
+    returns = make_returns(400, 5, seed=9, scale=VOLS, start="2019-01-01")
+    grid = {"window": [40, 80], "cov_method": ["shrinkage", "ewma"], "gamma": [2.0, 20.0]}
+    serial = walk_forward_tune(returns, grid, n_folds=3, n_jobs=1)
+    parallel = walk_forward_tune(returns, grid, n_folds=3, n_jobs=2)
+    pd.testing.assert_frame_equal(serial.choices, parallel.choices)
+
+    # changing data after a rebalance must not change the choice made at it
+    cutoff = serial.choices.index[2]
+    shocked = returns.copy()
+    shocked.loc[shocked.index >= cutoff] *= -3.0
+    again = walk_forward_tune(shocked, grid, n_folds=3, n_jobs=1)
+    pd.testing.assert_frame_equal(again.choices.iloc[:3], serial.choices.iloc[:3])
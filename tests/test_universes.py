@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.universe import union_tickers
+from src.strategies.backtest import run_backtest
+from src.strategies.universes import run_universes
+
+UNIVERSES = {
+    "all": ["SPY", "TLT", "GLD", "EEM", "QQQ"],
+    "no_gold": ["SPY", "TLT", "EEM", "QQQ"],
+    "equities": ["QQQ", "SPY", "EEM"],
+}
+
+
+@pytest.fixture
+def returns(make_returns):
+    """Correlated returns on the union of the universes' tickers."""
+    tickers = union_tickers(UNIVERSES)
+    mix = np.random.default_rng(40).normal(0, 0.006, size=(len(tickers), len(tickers)))
+    panel = make_returns(200, seed=4, scale=1.0, columns=tickers)
+    return pd.DataFrame(panel.to_numpy() @ mix, index=panel.index, columns=tickers)
+
+
+@pytest.mark.parametrize("cov_method", ["shrinkage", "ewma"])
+def test_universes_match_separate_backtests(cov_method, returns):
+    kwargs = dict(window=60, rebalance="weekly", tc_bps=10.0, cov_method=cov_method, solver="active_set", strategies=["min_variance", "mean_variance", "vol_target"])
+    results = run_universes(returns, UNIVERSES, **kwargs)
+
+    assert list(results) == list(UNIVERSES)
+    for name, tickers in UNIVERSES.items():
+        expected = run_backtest(returns[tickers], **kwargs)
+        assert list(results[name].events["min_variance"].columns) == tickers
+        np.testing.assert_allclose(results[name].returns.values, expected.returns.values, atol=1e-12)
+        np.testing.assert_allclose(results[name].turnover.values, expected.turnover.values, atol=1e-10)
+
+
+def test_universes_factor_covariance_and_validation(returns):
+    results = run_universes(returns, UNIVERSES, window=60, cov_method="factor", solver="active_set", strategies=["min_variance"])
+    for name, tickers in UNIVERSES.items():
+        weights = results[name].events["min_variance"].values
+        assert weights.shape[1] == len(tickers)
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0, atol=1e-8)
+
+    with pytest.raises(ValueError, match="VNQ"):
+        run_universes(returns, {"bad": ["SPY", "VNQ"]}, window=60)
+    with pytest.raises(ValueError):
+        run_universes(returns, {}, window=60)
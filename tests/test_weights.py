@@ -0,0 +1,65 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.backtest import run_backtest
+from src.strategies.weights import WeightEvents
+from src.utils.rendering import FigureSpec, figure_hash
+
+
+@pytest.fixture
+def returns(make_returns):
+    return make_returns(120, seed=7, columns="ABC")
+
+
+def _result(returns, **kwargs):
+    return run_backtest(returns, window=15, rebalance="monthly", strategies=["equal_weight", "min_variance"], solver="active_set", **kwargs)
+
+
+def test_events_store_one_row_per_rebalance_and_expand_lazily(returns):
+    res = _result(returns, accounting="fixed")
+    ev = res.events["min_variance"]
+    assert ev.values.shape == (5, 3) and ev._dense is None
+
+    dense = res.weights["min_variance"]
+    assert dense.shape == (105, 3) and ev._dense is dense
+    # held weights only change on event dates
+    changes = dense.index[(dense.diff().abs().sum(axis=1) > 0).to_numpy()]
+    assert set(changes) <= set(ev.dates)
+    pd.testing.assert_series_equal(ev.at(dense.index[50]), dense.iloc[50], check_names=False)
+    assert (ev.at(dense.index[0]) == 0).all()
+
+    # turnover straight from the events matches the daily accounting
+    np.testing.assert_allclose(ev.turnover().to_numpy(), res.turnover.loc[ev.dates, "min_variance"].to_numpy())
+    restored = pickle.loads(pickle.dumps(ev))
+    assert restored._dense is None
+    np.testing.assert_array_equal(restored.values, ev.values)
+    assert restored.dates.equals(ev.dates)
+
+
+def test_daily_weights_explain_returns(returns):
+    for accounting in ("fixed", "drift"):
+        res = _result(returns, accounting=accounting, tc_bps=0.0)
+        ev = res.events["min_variance"]
+        assert ev.accounting == accounting
+        dense = res.weights["min_variance"]
+        explained = (dense * returns.loc[dense.index]).sum(axis=1)
+        np.testing.assert_allclose(explained.to_numpy(), res.returns["min_variance"].to_numpy(), atol=1e-15)
+        pd.testing.assert_series_equal(ev.at(dense.index[50]), dense.iloc[50], check_names=False)
+        x, y = ev.step_points()
+        np.testing.assert_allclose(y.sum(axis=1)[-1], ev.gross().iloc[-1])
+
+    # the drifting book matches the pre-trade book at the next event
+    k = 2
+    day_before = dense.index.get_loc(ev.dates[k]) - 1
+    grown = dense.iloc[day_before] * (1 + returns.loc[dense.index[day_before]])
+    np.testing.assert_allclose(grown / (1 - dense.iloc[day_before].sum() + grown.sum()), ev.before[k], atol=1e-15)
+
+
+def test_figure_hash_tracks_event_values(returns):
+    ev = _result(returns).events["equal_weight"]
+    other = WeightEvents(ev.index, ev.columns, ev.offsets, ev.values * 0.5)
+    assert figure_hash(FigureSpec("w.png", "plot_weights", (ev, "t"))) == figure_hash(FigureSpec("w.png", "plot_weights", (ev, "t")))
+    assert figure_hash(FigureSpec("w.png", "plot_weights", (ev, "t"))) != figure_hash(FigureSpec("w.png", "plot_weights", (other, "t")))
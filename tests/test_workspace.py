@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.strategies.allocations import mean_variance_weights, min_variance_weights, risk_parity_weights
+from src.strategies.backtest import account_rebalances, run_backtest
+from src.strategies.cache import ResultCache
+from src.strategies.covariance import RollingCovariance, ensure_psd, ewma_moment, shrink_sample
+from src.strategies.workspace import SQUARE_A, Workspace, compare_precision
+
+
+def test_ewma_moment_matches_recursion(make_returns):
+    data = make_returns(200, 6, seed=3, start="2018-01-01").to_numpy()
+    expected = np.zeros((data.shape[1],) * 2)
+    for row in data:
+        expected = 0.94 * expected + 0.06 * np.outer(row, row)
+    np.testing.assert_allclose(ewma_moment(data), expected, rtol=1e-12, atol=1e-20)
+
+
+def test_workspace_kernels_are_bit_identical(make_returns):
+    data = make_returns(200, 6, seed=3, start="2018-01-01").to_numpy()
+    sample = np.cov(data.T)
+    ws = Workspace()
+    np.testing.assert_array_equal(ensure_psd(sample, workspace=ws), ensure_psd(sample))
+    np.testing.assert_array_equal(shrink_sample(sample, 0.1, None, ws), shrink_sample(sample, 0.1, None))
+    for method in RollingCovariance.METHODS:
+        plain = RollingCovariance(data.shape[1], 60, method=method)
+        reused = RollingCovariance(data.shape[1], 60, method=method, workspace=ws)
+        for rc in (plain, reused):
+            rc.update(data[:100])
+        np.testing.assert_array_equal(reused.covariance(), plain.covariance())
+    # two shared n x n buffers, reused from the second call on
+    assert ws.nbytes == 2 * sample.nbytes
+    assert ws.reuses > ws.allocations
+    # a step never writes over its own input
+    with pytest.raises(ValueError):
+        ensure_psd(ws.get(SQUARE_A, sample.shape), workspace=ws)
+
+    # the drift accounting borrows the same buffer for its segment products
+    offsets = np.arange(0, 100, 21)
+    events = {"a": np.full((len(offsets), data.shape[1]), 1.0 / data.shape[1])}
+    plain = account_rebalances(data[:100], offsets, events, 0.0005)
+    reused = account_rebalances(data[:100], offsets, events, 0.0005, workspace=ws)
+    np.testing.assert_allclose(reused[0]["a"], plain[0]["a"], rtol=0, atol=1e-15)
+
+
+def test_workspace_allocators_match(make_returns):
+    returns = make_returns(200, 6, seed=3, start="2018-01-01")
+    cov, mu = np.cov(returns.to_numpy().T), returns.mean().to_numpy()
+    ws = Workspace()
+    for solver in ("slsqp", "active_set"):
+        np.testing.assert_allclose(min_variance_weights(cov, solver=solver, workspace=ws), min_variance_weights(cov, solver=solver), atol=1e-8)
+        np.testing.assert_allclose(
+            mean_variance_weights(mu, cov, solver=solver, workspace=ws), mean_variance_weights(mu, cov, solver=solver), atol=1e-8
+        )
+    np.testing.assert_allclose(risk_parity_weights(cov, workspace=ws), risk_parity_weights(cov), atol=1e-12)
+
+
+def test_float32_storage_backtest(make_returns):
+    returns = make_returns(200, 6, seed=3, start="2018-01-01")
+    kwargs = dict(window=60, rebalance="weekly", solver="active_set", frontier_gammas=[2.0, 10.0])
+    reference = run_backtest(returns, **kwargs)
+    reduced = run_backtest(returns, storage_dtype="float32", workspace=Workspace(), **kwargs)
+
+    for name, ev in reduced.events.items():
+        assert ev.values.dtype == np.float32 and ev.before.dtype == np.float32
+        np.testing.assert_allclose(ev.values, reference.events[name].values, atol=1e-6)
+    assert reduced.frontiers.weights.dtype == np.float32
+    np.testing.assert_allclose(reduced.returns.to_numpy(), reference.returns.to_numpy(), atol=1e-8)
+
+    # cached covariances are stored in float32; the exact QPs barely move
+    cache = ResultCache()
+    cached = run_backtest(returns, storage_dtype="float32", cache=cache, strategies=["min_variance", "mean_variance"], **kwargs)
+    assert [v.dtype for v, _ in cache._memory.values() if np.ndim(v) == 2] == [np.float32] * len(cached.events["min_variance"])
+    for name, ev in cached.events.items():
+        np.testing.assert_allclose(ev.values, reference.events[name].values, atol=1e-4)
+    with pytest.raises(ValueError):
+        run_backtest(returns, storage_dtype="float16", **kwargs)
+
+
+def test_compare_precision_reports_savings(make_returns):
+    table = compare_precision(make_returns(200, 6, seed=3, start="2018-01-01"), window=60, rebalance="weekly", solver="active_set", strategies=["min_variance", "equal_weight"])
+    assert list(table.index) == ["min_variance", "equal_weight"]
+    assert (table["bytes_saved"] * 2 == table["weights_bytes_float64"]).all()
+    assert (table["max_weight_error"] < 1e-4).all() and (table["max_return_error"] < 1e-6).all()
+    assert table.attrs["total_bytes_saved"] == table["bytes_saved"].sum()
+    assert table.attrs["workspace_bytes"] > 0